@@ -1,7 +1,7 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import Session
 import os
 import json
 import csv
@@ -15,8 +15,12 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-from models import Base, Task, SalesData, TaskStatus
-from queue_manager import QueueManager
+from models import Task, SalesData, TaskStatus
+from database import DATABASE_URL, MIGRATE_ON_STARTUP, SessionLocal, engine, get_db, get_session_factory, init_db
+from queue_manager import create_queue_manager, create_sources
+from task_dedup import find_reusable, parameters_hash, result_task_id, settle_followers, source_version
+from task_summary import load_summary
+from task_data import EXPORT_FORMATS, export_rows, fetch_page, parse_date, parse_fields
 import logging
 import redis
 logger = logging.getLogger(__name__)
@@ -37,11 +41,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor of the next page of task data
+    expose_headers=["X-Next-Cursor"],
 )
 # Redis configuration
 REDIS_ENABLED = os.environ.get('REDIS_ENABLED', 'true').lower() == 'true'
 REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
 CACHE_TTL = int(os.environ.get('CACHE_TTL', '300'))  # Default: 5 minutes
+
+# API-only mode: set to false to only enqueue tasks and leave processing
+# to standalone workers (python -m worker)
+RUN_QUEUE_WORKERS = os.environ.get('RUN_QUEUE_WORKERS', 'true').lower() == 'true'
 # Initialize Redis manager
 
 class SimpleRedisManager:
@@ -81,21 +91,8 @@ class SimpleRedisManager:
 
 redis_manager = SimpleRedisManager(REDIS_URL)
 
-# Set up database
-DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///sales_data.db')
-engine = create_engine(DATABASE_URL)
-Base.metadata.create_all(engine)
-
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Database engine, session factory and get_db live in database.py so
+# standalone workers can use them without importing the API
 
 # Pydantic models for API
 class TaskRequest(BaseModel):
@@ -109,20 +106,23 @@ class TaskResponse(BaseModel):
     created_at: str
     updated_at: str
     parameters: Dict[str, Any]
+    # Set when the task shares the result of an identical task
+    result_task_id: Optional[int] = None
 
     class Config:
         orm_mode = True
 
 class SalesDataResponse(BaseModel):
+    # Everything but id may be left out by a fields= projection
     id: int
-    task_id: int
-    source: str
-    company: Optional[str]
-    car_model: Optional[str]
-    sale_date: Optional[str]
-    price: Optional[float]
-    year: Optional[int]
-    month: Optional[int]
+    task_id: Optional[int] = None
+    source: Optional[str] = None
+    company: Optional[str] = None
+    car_model: Optional[str] = None
+    sale_date: Optional[str] = None
+    price: Optional[float] = None
+    year: Optional[int] = None
+    month: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -238,10 +238,14 @@ async def login_simple(request: LoginRequest):
 
 
 # Initialize queue manager
-queue_manager = QueueManager(SessionLocal)
+queue_manager = create_queue_manager(SessionLocal, DATABASE_URL)
 
 @app.on_event("startup")
 async def startup_event():
+    # Create and migrate the schema before any worker touches it
+    if MIGRATE_ON_STARTUP:
+        init_db(engine)
+
       # Connect to Redis
     if REDIS_ENABLED:
         try:
@@ -260,10 +264,13 @@ async def startup_event():
 
 
 
-    # Start the queue manager
-
-    
-    queue_manager.start()
+    # Start the queue manager, unless standalone workers consume the queue
+    if RUN_QUEUE_WORKERS:
+        queue_manager.start()
+    elif not queue_manager.use_redis:
+        logger.error("API-only mode without Redis: queued tasks will not be processed by any worker")
+    else:
+        logger.info("API-only mode: tasks are enqueued for standalone workers")
 
     # Create sample data directory if it doesn't exist
     data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
@@ -443,7 +450,8 @@ async def get_tasks(db: Session = Depends(get_db), _: dict = Depends(get_current
         status=task.status.value,
         created_at=task.created_at.isoformat(),
         updated_at=task.updated_at.isoformat(),
-        parameters=task.parameters
+        parameters=task.parameters,
+        result_task_id=task.result_task_id
     ) for task in tasks]
 
 @app.post("/api/tasks", response_model=TaskResponse, status_code=201)
@@ -451,24 +459,35 @@ async def create_task(
     task_data: TaskRequest, 
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    _: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user)
 ):
     """Create a new task"""
     parameters = {"source_a": task_data.source_a, "source_b": task_data.source_b, "source_c": task_data.source_c }
-    task = Task(parameters=parameters)
+    task = Task(parameters=parameters, params_hash=parameters_hash(parameters))
+    
+    # Attach to an identical task that is running or recently completed
+    # rather than fetching and storing the same rows again
+    owner = find_reusable(db, task.params_hash, source_version(create_sources()))
+    if owner:
+        task.result_task_id = owner.id
+        task.status = owner.status
     db.add(task)
     db.commit()
     db.refresh(task)
     
     # Add task to queue as a background task
-    background_tasks.add_task(queue_manager.add_task, task.id)
+    if owner:
+        logger.info(f"Task {task.id} shares the result of task {owner.id} ({owner.status.value})")
+    else:
+        background_tasks.add_task(queue_manager.add_task, task.id, task.parameters, current_user["username"])
     
     return TaskResponse(
         id=task.id,
         status=task.status.value,
         created_at=task.created_at.isoformat(),
         updated_at=task.updated_at.isoformat(),
-        parameters=task.parameters
+        parameters=task.parameters,
+        result_task_id=task.result_task_id
     )
 
 @app.get("/api/tasks/{task_id}", response_model=TaskResponse)
@@ -483,34 +502,143 @@ async def get_task(task_id: int, db: Session = Depends(get_db), _: dict = Depend
         status=task.status.value,
         created_at=task.created_at.isoformat(),
         updated_at=task.updated_at.isoformat(),
-        parameters=task.parameters
+        parameters=task.parameters,
+        result_task_id=task.result_task_id
     )
 
-@app.get("/api/tasks/{task_id}/data", response_model=List[SalesDataResponse])
-async def get_task_data(task_id: int, db: Session = Depends(get_db), _: dict = Depends(get_current_user)):
-    """Get data for a specific task"""
-    # Check if task exists and is completed
+@app.get("/api/tasks/{task_id}/progress")
+async def get_task_progress(task_id: int, db: Session = Depends(get_db), _: dict = Depends(get_current_user)):
+    """Get row counts, percentage and ETA reported by the task's worker"""
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    progress = queue_manager.get_task_progress(result_task_id(task))
+    return {"id": task.id, "status": task.status.value, **progress}
+
+@app.post("/api/tasks/{task_id}/resume", response_model=TaskResponse)
+async def resume_task(
+    task_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Queue a failed task again, continuing after its last committed chunk"""
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.status != TaskStatus.FAILED:
+        raise HTTPException(status_code=400, detail="Only failed tasks can be resumed")
+    if task.result_task_id:
+        raise HTTPException(status_code=400, detail=f"Task shares the result of task {task.result_task_id}; "
+                                                    f"resume that task instead")
+    
+    # The worker resumes from the checkpoint when the source data is
+    # unchanged, and starts over otherwise
+    task.status = TaskStatus.PENDING
+    task.checkpoint = task.checkpoint or {}
+    settle_followers(db, task)
+    db.commit()
+    db.refresh(task)
+    background_tasks.add_task(queue_manager.add_task, task.id, task.parameters, current_user["username"])
+    
+    return TaskResponse(
+        id=task.id,
+        status=task.status.value,
+        created_at=task.created_at.isoformat(),
+        updated_at=task.updated_at.isoformat(),
+        parameters=task.parameters,
+        result_task_id=task.result_task_id
+    )
+
+def completed_task_or_error(db, task_id):
+    """The task, or a 404/400 HTTPException if it is missing or not completed"""
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
         
     if task.status != TaskStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="Task not completed yet")
-        
-    # Get data associated with the task
-    data = db.query(SalesData).filter(SalesData.task_id == task_id).all()
-    
-    return [SalesDataResponse(
-        id=item.id,
-        task_id=item.task_id,
-        source=item.source,
-        company=item.company,
-        car_model=item.car_model,
-        sale_date=item.sale_date.isoformat() if item.sale_date else None,
-        price=item.price,
-        year=item.year,
-        month=item.month
-    ) for item in data]
+    return task
+
+def parse_data_query(fields, company, model, start_date, end_date):
+    """Projected columns and filters of a task data request, or a 400 HTTPException"""
+    try:
+        columns = parse_fields(fields)
+        filters = dict(companies=company, models=model, start_date=parse_date(start_date),
+                       end_date=parse_date(end_date))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return columns, filters
+
+@app.get("/api/tasks/{task_id}/data", response_model=List[SalesDataResponse], response_model_exclude_unset=True)
+async def get_task_data(
+    task_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[int] = None,
+    fields: Optional[str] = None,
+    company: Optional[List[str]] = Query(None),
+    model: Optional[List[str]] = Query(None),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_db),
+    session_factory=Depends(get_session_factory),
+    _: dict = Depends(get_current_user)
+):
+    """
+    Get data for a specific task, all of it or one page at a time
+
+    Rows come in id order. Without limit or cursor every row is returned,
+    streamed in export batches. With either, at most limit rows are
+    returned (DATA_PAGE_SIZE by default) and, when more rows follow, the
+    X-Next-Cursor header holds the cursor to pass for the next page.
+    fields is a comma-separated projection; company and model may be
+    repeated.
+    """
+    task = completed_task_or_error(db, task_id)
+    columns, filters = parse_data_query(fields, company, model, start_date, end_date)
+
+    if limit is None and cursor is None:
+        # Clients that do not page get every row, as before pagination
+        return StreamingResponse(export_rows(session_factory, result_task_id(task), 'json', columns, **filters),
+                                 media_type=EXPORT_FORMATS['json'])
+
+    # Get data associated with the task, or the task it shares results with
+    page, next_cursor = fetch_page(db, result_task_id(task), columns, limit=limit, cursor=cursor, **filters)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return page
+
+@app.get("/api/tasks/{task_id}/export")
+async def export_task_data(
+    task_id: int,
+    format: str = "ndjson",
+    fields: Optional[str] = None,
+    company: Optional[List[str]] = Query(None),
+    model: Optional[List[str]] = Query(None),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_db),
+    session_factory=Depends(get_session_factory),
+    _: dict = Depends(get_current_user)
+):
+    """
+    Stream all data of a specific task as NDJSON, CSV or a JSON array
+
+    Takes the same fields and filters as /data. Rows are read and sent in
+    batches, so memory use does not grow with the size of the task.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    task = completed_task_or_error(db, task_id)
+    columns, filters = parse_data_query(fields, company, model, start_date, end_date)
+
+    return StreamingResponse(
+        export_rows(session_factory, result_task_id(task), format, columns, **filters),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="task_{task_id}.{format}"'}
+    )
 
 @app.get("/api/tasks/{task_id}/summary")
 async def get_task_summary(task_id: int, db: Session = Depends(get_db), _: dict = Depends(get_current_user)):
@@ -522,71 +650,10 @@ async def get_task_summary(task_id: int, db: Session = Depends(get_db), _: dict
         
     if task.status != TaskStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="Task not completed yet")
-        
-    # Sales by company
-    sales_by_company = db.query(
-        SalesData.company,
-        func.count(SalesData.id).label('count'),
-        func.sum(SalesData.price).label('total_sales')
-    ).filter(
-        SalesData.task_id == task_id
-    ).group_by(
-        SalesData.company
-    ).all()
-    
-    # Sales by year and month
-    sales_by_time = db.query(
-        SalesData.year,
-        SalesData.month,
-        func.count(SalesData.id).label('count'),
-        func.sum(SalesData.price).label('total_sales')
-    ).filter(
-        SalesData.task_id == task_id
-    ).group_by(
-        SalesData.year,
-        SalesData.month
-    ).all()
-    
-    # Sales by source
-    sales_by_source = db.query(
-        SalesData.source,
-        func.count(SalesData.id).label('count'),
-        func.sum(SalesData.price).label('total_sales')
-    ).filter(
-        SalesData.task_id == task_id
-    ).group_by(
-        SalesData.source
-    ).all()
     
-    # Sales by car model
-    sales_by_model = db.query(
-        SalesData.car_model,
-        func.count(SalesData.id).label('count'),
-        func.sum(SalesData.price).label('total_sales')
-    ).filter(
-        SalesData.task_id == task_id
-    ).group_by(
-        SalesData.car_model
-    ).all()
-    
-    return {
-        "sales_by_company": [
-            {"company": company, "count": count, "total_sales": float(total_sales)}
-            for company, count, total_sales in sales_by_company
-        ],
-        "sales_by_time": [
-            {"year": year, "month": month, "count": count, "total_sales": float(total_sales)}
-            for year, month, count, total_sales in sales_by_time
-        ],
-        "sales_by_source": [
-            {"source": source, "count": count, "total_sales": float(total_sales)}
-            for source, count, total_sales in sales_by_source
-        ],
-        "sales_by_model": [
-            {"model": model, "count": count, "total_sales": float(total_sales)}
-            for model, count, total_sales in sales_by_model
-        ]
-    }
+    # Stored at completion; rows may belong to an identical task this one
+    # shares results with
+    return load_summary(db, result_task_id(task))
 
 @app.get("/api/companies", response_model=List[str])
 async def get_companies(db: Session = Depends(get_db), _: dict = Depends(get_current_user)):
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+API Source Benchmark
+
+Measures APIDataSource throughput against the local stub sales API with
+simulated per-request latency, comparing one page at a time with the
+concurrent in-flight window.
+
+Run from the backend directory:
+    python -m benchmarks.bench_api_source --records 50000 --latency 0.05
+"""
+
+import argparse
+import time
+
+from data_sources.api_source import APIDataSource
+from tests.api_stub import StubSalesAPI, generate_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of server latency per request")
+    parser.add_argument("--windows", default="1,4,8,16", help="Comma separated in-flight windows to compare")
+    args = parser.parse_args()
+
+    records = generate_records(args.records)
+    pages = -(-args.records // args.page_size)
+    print(f"API source benchmark: {args.records:,} records, {pages} pages, {args.latency * 1000:.0f}ms latency\n")
+
+    with StubSalesAPI(records, latency=args.latency) as stub:
+        baseline = None
+        for window in (int(w) for w in args.windows.split(",")):
+            stub.max_in_flight = 0
+            source = APIDataSource(stub.url, page_size=args.page_size, max_in_flight=window)
+            start = time.perf_counter()
+            count = sum(len(chunk) for chunk in source.get_data_chunks())
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  window {window:>3}  {elapsed:7.2f}s  {count / elapsed:12,.0f} records/s  "
+                  f"(server saw {stub.max_in_flight} concurrent, {baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+CSV Source Benchmark
+
+Compares the chunked CSVDataSource pipeline against the original
+read-everything-then-filter implementation on a synthetic file. Both sides
+also build the sales_data rows save_data would insert, so the per-row CPU
+figure covers parsing, filtering and the persistence prep.
+
+Run from the backend directory:
+    python -m benchmarks.bench_csv_source --rows 5000000
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from data_sources.csv_source import CSVDataSource
+from data_sources.records import sales_rows
+
+COMPANIES = {
+    "Toyota": ["Camry", "Corolla", "RAV4", "Highlander"],
+    "Honda": ["Accord", "Civic", "CR-V", "Pilot"],
+    "Ford": ["Mustang", "Explorer", "F-150"],
+    "Chevrolet": ["Malibu", "Equinox", "Silverado"],
+    "Tesla": ["Model 3", "Model Y", "Model S"],
+}
+
+DEFAULT_FILTERS = {
+    "companies": ["Toyota", "Honda"],
+    "start_date": "2023-06-01",
+    "end_date": "2024-06-01",
+}
+
+
+def generate_csv(path, rows, distinct_dates=5000, seed=42):
+    """Write a synthetic sales file with `rows` records over `distinct_dates` sale_date values"""
+    rng = random.Random(seed)
+    companies = list(COMPANIES)
+    start = datetime(2022, 1, 1)
+    step = 3 * 365 * 86400 // distinct_dates
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["company", "car_model", "sale_date", "price"])
+        for _ in range(rows):
+            company = rng.choice(companies)
+            sale_date = start + timedelta(seconds=rng.randrange(distinct_dates) * step)
+            writer.writerow([
+                company,
+                rng.choice(COMPANIES[company]),
+                sale_date.isoformat(),
+                rng.randrange(15000, 90000, 100),
+            ])
+
+
+def legacy_get_data(file_path, filters):
+    """The original CSVDataSource.get_data: list(DictReader) then filter"""
+    with open(file_path, 'r', newline='', encoding='utf-8') as file:
+        data = list(csv.DictReader(file))
+
+    start_date = datetime.fromisoformat(filters['start_date']) if filters.get('start_date') else None
+    end_date = datetime.fromisoformat(filters['end_date']) if filters.get('end_date') else None
+    companies = filters.get('companies', [])
+    models = filters.get('models', [])
+
+    filtered_data = []
+    for record in data:
+        try:
+            sale_date = datetime.fromisoformat(record['sale_date'])
+        except (ValueError, TypeError):
+            try:
+                sale_date = datetime.strptime(record['sale_date'], '%Y-%m-%d')
+            except (ValueError, TypeError):
+                continue
+        if start_date and sale_date < start_date:
+            continue
+        if end_date and sale_date > end_date:
+            continue
+        if companies and record.get('company') not in companies:
+            continue
+        if models and record.get('car_model') not in models:
+            continue
+        filtered_data.append(record)
+    return filtered_data
+
+
+def legacy_pipeline(file_path, filters):
+    """Legacy get_data followed by the original save_data row building"""
+    rows = []
+    for record in legacy_get_data(file_path, filters):
+        # The original save_data parsed sale_date a second time
+        try:
+            sale_date = datetime.fromisoformat(record['sale_date'])
+        except (ValueError, TypeError):
+            try:
+                sale_date = datetime.strptime(record['sale_date'], '%Y-%m-%d')
+            except (ValueError, TypeError):
+                sale_date = None
+        rows.append({
+            'task_id': 1,
+            'source': 'source_b',
+            'company': record.get('company'),
+            'car_model': record.get('car_model'),
+            'sale_date': sale_date,
+            'price': float(record.get('price', 0)),
+            'year': sale_date.year if sale_date else None,
+            'month': sale_date.month if sale_date else None
+        })
+    return rows
+
+
+def chunked_pipeline(file_path, filters):
+    """Consume the new pipeline one chunk at a time, as QueueManager does"""
+    source = CSVDataSource(file_path, use_cache=False)
+    count = 0
+    for chunk in source.get_data_chunks(filters):
+        count += sum(1 for _ in sales_rows(chunk, 1, 'source_b'))
+    return count
+
+
+def measure(name, func, rows, repeat=1):
+    # Timing and memory are measured in separate runs because tracemalloc
+    # slows allocation-heavy code down considerably. The best of `repeat`
+    # timed runs is reported, since one run is at the mercy of machine noise
+    cpu = elapsed = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = func()
+        run_cpu = time.process_time() - cpu_start
+        run_elapsed = time.perf_counter() - start
+        del result
+        cpu = run_cpu if cpu is None else min(cpu, run_cpu)
+        elapsed = run_elapsed if elapsed is None else min(elapsed, run_elapsed)
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = result if isinstance(result, int) else len(result)
+    del result
+
+    print(f"  {name:<10} {elapsed:8.2f}s  {rows / elapsed:12,.0f} rows/s  "
+          f"{cpu / rows * 1e6:6.2f} us CPU/row  "
+          f"peak {peak / 1024 / 1024:9.1f} MiB  ({count:,} rows kept)")
+    return cpu, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Rows in the generated file")
+    parser.add_argument("--file", help="Use an existing CSV file instead of generating one")
+    parser.add_argument("--distinct-dates", type=int, default=5000,
+                        help="Distinct sale_date values in the generated file")
+    parser.add_argument("--no-filters", action="store_true", help="Keep every row instead of DEFAULT_FILTERS")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per pipeline, best reported")
+    args = parser.parse_args()
+    filters = {} if args.no_filters else DEFAULT_FILTERS
+
+    path = args.file
+    generated = path is None
+    if generated:
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        print(f"Generating {args.rows:,} rows in {path}...")
+        generate_csv(path, args.rows, args.distinct_dates)
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = sum(1 for _ in f) - 1
+        print(f"CSV source benchmark: {rows:,} rows, filters={filters}\n")
+        legacy_cpu, legacy_peak = measure("legacy", lambda: legacy_pipeline(path, filters), rows, args.repeat)
+        chunked_cpu, chunked_peak = measure("chunked", lambda: chunked_pipeline(path, filters), rows, args.repeat)
+        print(f"\n  per-row CPU {legacy_cpu / chunked_cpu:.2f}x lower, "
+              f"peak memory {legacy_peak / max(chunked_peak, 1):.1f}x lower")
+    finally:
+        if generated:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Ingestion Benchmark
+
+Compares the ORM save_data path (one SalesData object per row) against the
+bulk Core executemany path on a scratch SQLite database.
+
+Run from the backend directory:
+    python -m benchmarks.bench_ingest --rows 500000 --batch-size 5000
+"""
+
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base
+from data_sources.csv_source import CSVDataSource
+from data_sources.records import make_record
+
+
+def generate_records(rows):
+    start = datetime(2023, 1, 1)
+    for i in range(rows):
+        yield make_record("Toyota", "Camry", start + timedelta(minutes=i), 20000 + i % 10000)
+
+
+def run(bulk, rows, batch_size):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        try:
+            return CSVDataSource().save_data(session, 1, generate_records(rows), bulk=bulk, batch_size=batch_size)
+        finally:
+            session.close()
+            engine.dispose()
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"Ingestion benchmark: {args.rows:,} rows, batch size {args.batch_size:,}\n")
+    results = {}
+    for name, bulk in (("orm", False), ("bulk", True)):
+        stats = run(bulk, args.rows, args.batch_size)
+        results[name] = stats
+        print(f"  {name:<5} {stats['seconds']:8.2f}s  {stats['rows_per_second']:12,.0f} rows/s")
+    print(f"\n  bulk speedup {results['orm']['seconds'] / results['bulk']['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
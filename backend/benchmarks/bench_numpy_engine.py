@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+NumPy Engine Benchmark
+
+Times task filters over the same synthetic records with:
+
+  loop     the original per-record _apply_filters loop over typed records
+  python   SourceSnapshot.select (date bisect + inverted indexes)
+  mask     ColumnarSnapshot.mask alone, the vectorized filter
+  numpy    ColumnarSnapshot.select, the mask plus SaleRecords for every match
+
+Requires NumPy. Run from the backend directory:
+    python -m benchmarks.bench_numpy_engine --rows 1000000
+"""
+
+import argparse
+from datetime import datetime
+
+from benchmarks.bench_snapshot_index import generate_records, timed
+from data_sources.columnar import ColumnarSnapshot
+from data_sources.snapshot import SourceSnapshot
+
+FILTERS = {
+    "2 companies, 1 year": {"companies": ["Company 1", "Company 2"],
+                            "start_date": "2021-01-01", "end_date": "2021-12-31"},
+    "10 companies": {"companies": [f"Company {i}" for i in range(10)]},
+    "models list": {"models": [f"Model {i}-{i}" for i in range(25)]},
+    "6 months": {"start_date": "2022-01-01", "end_date": "2022-06-30"},
+}
+
+
+def loop(records, filters):
+    """The original _apply_filters: list membership and datetime compares per record"""
+    start_date = datetime.fromisoformat(filters['start_date']) if filters.get('start_date') else None
+    end_date = datetime.fromisoformat(filters['end_date']) if filters.get('end_date') else None
+    companies = filters.get('companies', [])
+    models = filters.get('models', [])
+
+    filtered = []
+    for record in records:
+        if start_date and record.sale_date < start_date:
+            continue
+        if end_date and record.sale_date > end_date:
+            continue
+        if companies and record.company not in companies:
+            continue
+        if models and record.car_model not in models:
+            continue
+        filtered.append(record)
+    return len(filtered)
+
+
+def count(rows):
+    return sum(1 for _ in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to filter")
+    parser.add_argument("--companies", type=int, default=50, help="Distinct companies")
+    parser.add_argument("--models", type=int, default=50, help="Models per company")
+    args = parser.parse_args()
+
+    records = list(generate_records(args.rows, args.companies, args.models, 3 * 365))
+    python_snapshot, python_build = timed(SourceSnapshot.from_records, records)
+    numpy_snapshot, numpy_build = timed(ColumnarSnapshot.from_records, records)
+    print(f"{args.rows:,} rows; build python {python_build:.1f}s, numpy {numpy_build:.1f}s\n")
+
+    print(f"  {'filter':<22} {'rows':>9} {'loop':>8} {'python':>8} {'mask':>8} {'numpy':>8} {'loop/numpy':>11}")
+    for name, filters in FILTERS.items():
+        expected, loop_seconds = timed(loop, records, filters)
+        python_count, python_seconds = timed(lambda: count(python_snapshot.select(filters)))
+        _, mask_seconds = timed(numpy_snapshot.mask, filters)
+        numpy_count, numpy_seconds = timed(lambda: count(numpy_snapshot.select(filters)))
+        assert expected == python_count == numpy_count, name
+        print(f"  {name:<22} {expected:>9,} {loop_seconds:>7.3f}s {python_seconds:>7.3f}s "
+              f"{mask_seconds:>7.3f}s {numpy_seconds:>7.3f}s {loop_seconds / numpy_seconds:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Redis Round Trip Benchmark
+
+Counts the Redis round trips of a task's queue lifecycle (enqueue, claim,
+complete, and the failure path) for the original one-command-per-field
+sequence and for QueueManager's pipelined / scripted transitions, then
+estimates the per-task overhead at a few network round trip times.
+
+The stream backend (QUEUE_BACKEND=stream) is measured too. Its claim costs
+one round trip more than the list backend's claim script: XREADGROUP
+returns the entry, then a separate HSET marks the task processing, as the
+task id is only known once the read returns. The periodic XAUTOCLAIM check
+for stalled entries (every claim_idle_ms / 2 per consumer) is not counted.
+
+Uses fakeredis unless --redis-url is given:
+    python -m benchmarks.bench_redis_roundtrips --tasks 1000
+    python -m benchmarks.bench_redis_roundtrips --redis-url redis://host:6379/15
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import redis
+import queue_manager as queue_manager_module
+from queue_manager import QueueManager
+
+RTT_MS = (0.2, 1.0, 2.0)
+STREAM_CONSUMER = "bench-consumer"
+
+
+class RoundTripCounter:
+    """Counts packets sent by a client's connections: one per command or pipeline"""
+    def __init__(self, client):
+        self.count = 0
+        connection_class = client.connection_pool.connection_class
+        send = connection_class.send_packed_command
+        counter = self
+
+        def counted(connection, *args, **kwargs):
+            counter.count += 1
+            return send(connection, *args, **kwargs)
+
+        connection_class.send_packed_command = counted
+
+
+def legacy_lifecycle(client, task_id, fail=False):
+    """The command sequence QueueManager used to send for one task"""
+    now = datetime.utcnow().isoformat()
+    client.rpush("task_queue", task_id)
+    client.hset(f"task:{task_id}", "status", "queued")
+    client.hset(f"task:{task_id}", "queued_at", now)
+    client.sadd("all_tasks", task_id)
+    client.blpop("task_queue", timeout=1)
+    client.hset(f"task:{task_id}", "status", "processing")
+    client.hset(f"task:{task_id}", "started_at", now)
+    if fail:
+        client.hset(f"task:{task_id}", "error_details", "boom")
+        client.hset(f"task:{task_id}", "error_time", now)
+        client.hset(f"task:{task_id}", "status", "failed")
+        client.hset(f"task:{task_id}", "error", "boom")
+        client.hset(f"task:{task_id}", "failed_at", now)
+        client.sadd("failed_tasks", task_id)
+    else:
+        client.hset(f"task:{task_id}", "progress", 100)
+        client.hset(f"task:{task_id}", "records_processed", 1000)
+        client.hset(f"task:{task_id}", "status", "completed")
+        client.hset(f"task:{task_id}", "completed_at", now)
+
+
+def pipelined_lifecycle(manager, task_id, fail=False):
+    """The same lifecycle through QueueManager's transitions"""
+    manager._redis_enqueue(task_id)
+    claimed = manager._redis_claim(timeout=1)
+    assert claimed == task_id
+    if fail:
+        manager._redis_fail(task_id, "boom")
+    else:
+        manager._redis_complete(task_id, 1000)
+
+
+def stream_lifecycle(manager, task_id, fail=False):
+    """The same lifecycle through the stream backend, as a worker runs it"""
+    manager._redis_enqueue(task_id)
+    entry = manager.stream_queue.read(STREAM_CONSUMER, block_ms=10)
+    assert entry.task_id == task_id
+    manager._run_task = _failing_run if fail else _completed_run
+    try:
+        manager._process_stream_entry("bench", STREAM_CONSUMER, entry)
+    except RuntimeError:
+        pass
+
+
+def _completed_run(worker_id, task_id):
+    return 1000
+
+
+def _failing_run(worker_id, task_id):
+    raise RuntimeError("boom")
+
+
+def measure(name, counter, lifecycle, tasks, fail=False):
+    counter.count = 0
+    start = time.perf_counter()
+    for task_id in range(1, tasks + 1):
+        lifecycle(task_id, fail)
+    elapsed = time.perf_counter() - start
+    per_task = counter.count / tasks
+    overhead = "  ".join(f"{per_task * rtt:5.1f} ms @ {rtt:g} ms" for rtt in RTT_MS)
+    print(f"  {name:<22} {per_task:5.1f} round trips/task  {elapsed / tasks * 1e6:7.0f} us/task here  "
+          f"network: {overhead}")
+    return per_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1000, help="Task lifecycles per measurement")
+    parser.add_argument("--redis-url", help="Real Redis to use (keys task_queue, task:*, ... are written)")
+    args = parser.parse_args()
+
+    if args.redis_url:
+        client = redis.from_url(args.redis_url)
+    else:
+        import fakeredis
+        client = fakeredis.FakeRedis()
+        queue_manager_module.redis.from_url = lambda url: client
+    manager = QueueManager(None, use_redis=True, redis_url=args.redis_url or "redis://fake")
+    client.ping()
+    counter = RoundTripCounter(client)
+    # Load the claim script once so EVALSHA does not miss during the run
+    manager._redis_claim(timeout=1)
+    stream_manager = QueueManager(None, use_redis=True, redis_url=args.redis_url or "redis://fake",
+                                  queue_backend="stream")
+    # Register the consumer and run the stalled entry check up front; they
+    # are not per task
+    stream_manager.stream_queue.read(STREAM_CONSUMER, block_ms=10)
+
+    print(f"Round trips per task lifecycle ({args.tasks:,} tasks)\n")
+    for fail in (False, True):
+        print("failure path:" if fail else "success path:")
+        before = measure("legacy", counter, lambda t, f: legacy_lifecycle(client, t, f), args.tasks, fail)
+        after = measure("pipelined/scripted", counter, lambda t, f: pipelined_lifecycle(manager, t, f), args.tasks, fail)
+        stream = measure("stream backend", counter, lambda t, f: stream_lifecycle(stream_manager, t, f),
+                         args.tasks, fail)
+        print(f"  {before / after:.1f}x fewer round trips (list), {before / stream:.1f}x (stream)\n")
+
+
+if __name__ == "__main__":
+    main()
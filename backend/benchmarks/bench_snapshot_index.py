@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Snapshot Index Benchmark
+
+Builds a SourceSnapshot of synthetic sales (50 companies x 500 models by
+default) and times task filters two ways:
+
+  scan     every row checked with the original list-membership filters
+  indexed  SourceSnapshot.select (date bisect + company/model indexes)
+
+Records are generated on the fly, so only the snapshot itself is held in
+memory.
+
+Run from the backend directory:
+    python -m benchmarks.bench_snapshot_index --rows 10000000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from data_sources.records import SaleRecord
+from data_sources.snapshot import SourceSnapshot
+
+START = datetime(2020, 1, 1)
+
+
+def generate_records(rows, companies, models, days, seed=42):
+    """Yield `rows` SaleRecords; every company sells its own `models` models"""
+    rng = random.Random(seed)
+    dates = [START + timedelta(days=i) for i in range(days)]
+    for _ in range(rows):
+        company = rng.randrange(companies)
+        sale_date = dates[rng.randrange(days)]
+        yield SaleRecord(f"Company {company}", f"Model {company}-{rng.randrange(models)}",
+                         sale_date, float(rng.randrange(15000, 90000, 100)),
+                         sale_date.year, sale_date.month)
+
+
+def scan(snapshot, filters):
+    """The original _apply_filters logic, run over every snapshot row"""
+    start_date = datetime.fromisoformat(filters['start_date']) if filters.get('start_date') else None
+    end_date = datetime.fromisoformat(filters['end_date']) if filters.get('end_date') else None
+    companies = filters.get('companies', [])
+    models = filters.get('models', [])
+
+    count = 0
+    offsets = snapshot.date_offsets
+    for date_code, sale_date in enumerate(snapshot.dates):
+        for row in range(offsets[date_code], offsets[date_code + 1]):
+            if start_date and sale_date < start_date:
+                continue
+            if end_date and sale_date > end_date:
+                continue
+            if companies and snapshot.companies[snapshot.company_codes[row]] not in companies:
+                continue
+            if models and snapshot.models[snapshot.model_codes[row]] not in models:
+                continue
+            count += 1
+    return count
+
+
+def indexed(snapshot, filters):
+    return sum(1 for _ in snapshot.select(filters))
+
+
+def task_filters(companies, models):
+    return {
+        "one company": {"companies": ["Company 7"]},
+        "5 companies, 1 month": {"companies": [f"Company {i}" for i in range(0, companies, max(1, companies // 5))][:5],
+                                 "start_date": "2021-03-01", "end_date": "2021-03-31"},
+        "3 models": {"models": ["Model 1-1", "Model 2-2", "Model 3-3"]},
+        "company + 20 models, 1 quarter": {"companies": ["Company 3"],
+                                           "models": [f"Model 3-{i}" for i in range(min(20, models))],
+                                           "start_date": "2022-01-01", "end_date": "2022-03-31"},
+        "1 week": {"start_date": "2021-06-01", "end_date": "2021-06-07"},
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Rows in the snapshot")
+    parser.add_argument("--companies", type=int, default=50, help="Distinct companies")
+    parser.add_argument("--models", type=int, default=500, help="Models per company")
+    parser.add_argument("--days", type=int, default=3 * 365, help="Distinct sale dates")
+    args = parser.parse_args()
+
+    print(f"Building snapshot of {args.rows:,} rows "
+          f"({args.companies} companies x {args.models} models, {args.days} days)...")
+    snapshot, seconds = timed(SourceSnapshot.from_records,
+                              generate_records(args.rows, args.companies, args.models, args.days))
+    print(f"  built in {seconds:.1f}s, ~{snapshot.nbytes / 1024 / 1024:.0f} MiB\n")
+
+    print(f"  {'filter':<32} {'rows':>9} {'scan':>9} {'indexed':>9} {'speedup':>8}")
+    for name, filters in task_filters(args.companies, args.models).items():
+        expected, scan_seconds = timed(scan, snapshot, filters)
+        count, index_seconds = timed(indexed, snapshot, filters)
+        assert count == expected, (name, count, expected)
+        print(f"  {name:<32} {count:>9,} {scan_seconds:>8.2f}s {index_seconds:>8.3f}s "
+              f"{scan_seconds / max(index_seconds, 1e-9):>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
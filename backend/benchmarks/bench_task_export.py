@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Task Data Export Benchmark
+
+Compares the original /data response (every row loaded as an ORM object,
+turned into a list of Pydantic models and encoded as one JSON body)
+against the streaming NDJSON and CSV export on a scratch SQLite database.
+Reports server-side time to first byte (the first chunk of rows ready to
+send; the CSV header chunk does not count), total time and peak Python
+memory (tracemalloc, in a separate pass).
+
+Run from the backend directory:
+    python -m benchmarks.bench_task_export --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, SalesData
+from task_data import export_rows
+
+TASK_ID = 1
+MODELS = (("Toyota", "Camry"), ("Honda", "Civic"), ("Ford", "Focus"), ("BMW", "X3"), ("Kia", "Rio"))
+
+
+class SalesDataResponse(BaseModel):
+    """The /data response model as it was before projection"""
+    id: int
+    task_id: int
+    source: str
+    company: Optional[str]
+    car_model: Optional[str]
+    sale_date: Optional[str]
+    price: Optional[float]
+    year: Optional[int]
+    month: Optional[int]
+
+
+def populate(engine, rows):
+    start = datetime(2023, 1, 1)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.executemany(
+            "INSERT INTO sales_data (task_id, source, company, car_model, sale_date, price, year, month) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((TASK_ID, "source_a", *MODELS[i % len(MODELS)],
+              (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S.%f"),
+              20000.0 + i % 10000, 2023, 1 + i % 12) for i in range(rows))
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def materialized(session_factory):
+    """The original /data response: ORM rows, then Pydantic models, then one JSON body"""
+    db = session_factory()
+    try:
+        data = db.query(SalesData).filter(SalesData.task_id == TASK_ID).all()
+    finally:
+        db.close()
+    items = [SalesDataResponse(
+        id=item.id,
+        task_id=item.task_id,
+        source=item.source,
+        company=item.company,
+        car_model=item.car_model,
+        sale_date=item.sale_date.isoformat() if item.sale_date else None,
+        price=item.price,
+        year=item.year,
+        month=item.month
+    ).model_dump() for item in data]
+    yield json.dumps(items)
+
+
+def streamed(export_format):
+    def run(session_factory):
+        return export_rows(session_factory, TASK_ID, export_format)
+    return run
+
+
+def measure(session_factory, chunks_of, header_chunks):
+    """Seconds to the first chunk of rows and to the last, and bytes produced"""
+    start = time.perf_counter()
+    first, size = None, 0
+    for index, chunk in enumerate(chunks_of(session_factory)):
+        if first is None and index >= header_chunks:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    return first, time.perf_counter() - start, size
+
+
+def peak_memory(session_factory, chunks_of):
+    tracemalloc.start()
+    try:
+        for _ in chunks_of(session_factory):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        populate(engine, args.rows)
+        session_factory = sessionmaker(bind=engine)
+
+        print(f"Task export benchmark: {args.rows:,} rows\n")
+        print(f"  {'':<13} {'first byte':>10} {'total':>9} {'body':>10} {'peak memory':>12}")
+        for name, chunks_of, header_chunks in (("materialized", materialized, 0),
+                                               ("ndjson", streamed("ndjson"), 0),
+                                               ("csv", streamed("csv"), 1)):
+            first, total, size = measure(session_factory, chunks_of, header_chunks)
+            peak = peak_memory(session_factory, chunks_of)
+            print(f"  {name:<13} {first:9.3f}s {total:8.2f}s {size / 2**20:7.0f} MB {peak / 2**20:9.0f} MB")
+        engine.dispose()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
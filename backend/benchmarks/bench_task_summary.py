@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Task Summary Aggregation Benchmark
+
+Compares the summary computations on a scratch SQLite database holding one
+large task next to a smaller one: one GROUP BY query per section (four
+scans of the task's rows, what task_summary.compute_summary runs on SQLite)
+against a single GROUP BY over all the section columns whose groups are
+rolled up in Python. The single scan is not faster on SQLite, which sorts
+the task's rows for every GROUP BY, so compute_summary only takes a single
+scan on dialects with GROUP BY GROUPING SETS, which this benchmark does not
+cover.
+
+Run from the backend directory:
+    python -m benchmarks.bench_task_summary --rows 5000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, SalesData
+from task_summary import GROUP_COLUMNS, GROUPINGS, compute_summary
+
+TASK_ID = 1
+COMPANIES = {
+    "Toyota": ("Camry", "Corolla", "RAV4", "Prius"),
+    "Honda": ("Civic", "Accord", "CR-V", "Fit"),
+    "Ford": ("F-150", "Focus", "Escape", "Mustang"),
+    "BMW": ("3 Series", "5 Series", "X3", "X5"),
+    "Kia": ("Rio", "Sportage", "Sorento", "Soul"),
+}
+SOURCES = ("source_a", "source_b", "source_c")
+
+
+def four_queries(db, task_id):
+    """The original summary: one GROUP BY query per section"""
+    summary = {}
+    for key, columns, names in GROUPINGS:
+        rows = db.query(
+            *columns,
+            func.count(SalesData.id),
+            func.sum(SalesData.price)
+        ).filter(
+            SalesData.task_id == task_id
+        ).group_by(
+            *columns
+        ).all()
+        summary[key] = [dict(zip(names, row[:len(names)]), count=row[-2], total_sales=float(row[-1] or 0))
+                        for row in rows]
+    return summary
+
+
+def single_group_by(db, task_id):
+    """One GROUP BY over every section column, rolled up per section in Python"""
+    positions = {key: [GROUP_COLUMNS.index(column) for column in columns] for key, columns, _ in GROUPINGS}
+    groups = {key: {} for key, _, _ in GROUPINGS}
+    rows = db.query(
+        *GROUP_COLUMNS,
+        func.count(SalesData.id),
+        func.sum(SalesData.price)
+    ).filter(
+        SalesData.task_id == task_id
+    ).group_by(
+        *GROUP_COLUMNS
+    )
+    for row in rows:
+        count, total = row[-2], row[-1] or 0
+        for key, indexes in positions.items():
+            group = groups[key].setdefault(tuple(row[i] for i in indexes), [0, 0])
+            group[0] += count
+            group[1] += total
+    return {key: [dict(zip(names, values), count=count, total_sales=float(total))
+                  for values, (count, total) in groups[key].items()]
+            for key, _, names in GROUPINGS}
+
+
+def generate_rows(task_id, rows):
+    models = [(company, model) for company, names in COMPANIES.items() for model in names]
+    for i in range(rows):
+        company, model = models[i % len(models)]
+        year, month = 2021 + (i // 7) % 3, 1 + (i // 11) % 12
+        yield (task_id, SOURCES[i % len(SOURCES)], company, model, 20000.0 + i % 10000, year, month)
+
+
+def populate(engine, rows):
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        statement = "INSERT INTO sales_data (task_id, source, company, car_model, price, year, month) " \
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+        cursor.executemany(statement, generate_rows(TASK_ID, rows))
+        cursor.executemany(statement, generate_rows(TASK_ID + 1, rows // 10))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def timed(function, db, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(db, TASK_ID)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def same_summary(a, b):
+    """Same groups with the same counts and (up to float rounding) totals"""
+    for key, _, names in GROUPINGS:
+        left = {tuple(group[name] for name in names): group for group in a[key]}
+        right = {tuple(group[name] for name in names): group for group in b[key]}
+        if left.keys() != right.keys():
+            return False
+        for values, group in left.items():
+            other = right[values]
+            if group["count"] != other["count"] or abs(group["total_sales"] - other["total_sales"]) > 1e-6 * abs(other["total_sales"]):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        print(f"Task summary benchmark: {args.rows:,} rows in the task, best of {args.repeat}\n")
+        start = time.perf_counter()
+        populate(engine, args.rows)
+        print(f"  populated in {time.perf_counter() - start:.1f}s\n")
+
+        db = sessionmaker(bind=engine)()
+        try:
+            four, expected = timed(four_queries, db, args.repeat)
+            single, rolled_up = timed(single_group_by, db, args.repeat)
+            current, summary = timed(compute_summary, db, args.repeat)
+        finally:
+            db.close()
+            engine.dispose()
+    finally:
+        os.remove(path)
+
+    print(f"  four queries     {four:8.2f}s")
+    print(f"  single GROUP BY  {single:8.2f}s  ({four / single:.1f}x)")
+    print(f"  compute_summary  {current:8.2f}s  ({four / current:.1f}x)")
+    print(f"\n  results match: {same_summary(rolled_up, expected) and same_summary(summary, expected)}")
+
+
+if __name__ == "__main__":
+    main()
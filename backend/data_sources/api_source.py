@@ -1,15 +1,88 @@
 # backend/data_sources/api_source.py
-import requests
+import os
+import asyncio
+import random
 import logging
-from datetime import datetime
-from models import SalesData
+from collections import deque
+import httpx
+from data_sources.dates import DateParser
+from data_sources.ingest import save_rows, DEFAULT_BATCH_SIZE
+from data_sources.pipeline import chunked, DEFAULT_CHUNK_SIZE
+from data_sources.records import normalize_records, sales_rows
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Records per page requested from the sales API
+DEFAULT_PAGE_SIZE = 1000
+
+# Pages requested concurrently (and pooled connections kept open)
+DEFAULT_MAX_IN_FLIGHT = 8
+
+# Retries per page for transport errors and retryable status codes
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Returned when no API URL is configured, for local development and demos
+SAMPLE_API_DATA = [
+    {
+        "company": "Tesla",
+        "car_model": "Model 3",
+        "sale_date": "2024-01-15T14:30:00",
+        "price": 45000
+    },
+    {
+        "company": "Tesla",
+        "car_model": "Model Y",
+        "sale_date": "2024-02-20T10:15:00",
+        "price": 55000
+    },
+    {
+        "company": "Nissan",
+        "car_model": "Leaf",
+        "sale_date": "2024-03-05T16:45:00",
+        "price": 32000
+    },
+    {
+        "company": "BMW",
+        "car_model": "i4",
+        "sale_date": "2024-03-18T09:30:00",
+        "price": 65000
+    },
+    {
+        "company": "Tesla",
+        "car_model": "Model S",
+        "sale_date": "2024-04-10T11:20:00",
+        "price": 85000
+    }
+]
+
 class APIDataSource:
-    def __init__(self, api_url=None):
-        self.api_url = api_url or "https://my-api-endpoint.com/sales"
+    """
+    Paginated sales API client
+    
+    The API is expected to answer GET {api_url}?page=N&page_size=M with
+    {"data": [...], "page": N, "total_pages": T}; a bare JSON list is treated
+    as a single page. start_date, end_date, companies and models are pushed
+    down as query parameters (lists comma separated) and re-applied locally
+    in case the server ignores any of them.
+    """
+    # The API may change between runs without any version to tell, so a
+    # failed task always fetches this source again from the start
+    resumable = False
+
+    def __init__(self, api_url=None, page_size=DEFAULT_PAGE_SIZE, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, timeout=10.0):
+        self.api_url = api_url or os.environ.get('API_SOURCE_URL')
+        self.page_size = page_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.date_parser = DateParser()
+        # Upper bound on the rows being fetched, known after the first page
+        self.expected_rows = None
         
     def get_data(self, filters=None):
         """
@@ -23,53 +96,13 @@ class APIDataSource:
                 - models (list): List of car models to include
                 
         Returns:
-            list: Filtered data records
+            list: Filtered SaleRecords
         """
         if filters is None:
             filters = {}
             
         try:
-            # For demonstration, we'll simulate API data
-            # In a real application, you would make a request to the API
-            # response = requests.get(self.api_url, params=filters)
-            # api_data = response.json()
-            
-            # Simulate API response for demo purposes
-            api_data = [
-                {
-                    "company": "Tesla",
-                    "car_model": "Model 3",
-                    "sale_date": "2024-01-15T14:30:00",
-                    "price": 45000
-                },
-                {
-                    "company": "Tesla",
-                    "car_model": "Model Y",
-                    "sale_date": "2024-02-20T10:15:00",
-                    "price": 55000
-                },
-                {
-                    "company": "Nissan",
-                    "car_model": "Leaf",
-                    "sale_date": "2024-03-05T16:45:00",
-                    "price": 32000
-                },
-                {
-                    "company": "BMW",
-                    "car_model": "i4",
-                    "sale_date": "2024-03-18T09:30:00",
-                    "price": 65000
-                },
-                {
-                    "company": "Tesla",
-                    "car_model": "Model S",
-                    "sale_date": "2024-04-10T11:20:00",
-                    "price": 85000
-                }
-            ]
-            
-            # Apply filters
-            filtered_data = self._apply_filters(api_data, filters)
+            filtered_data = list(self.iter_data(filters))
             
             logger.info(f"Retrieved {len(filtered_data)} records from API source")
             return filtered_data
@@ -77,78 +110,148 @@ class APIDataSource:
         except Exception as e:
             logger.error(f"Error retrieving data from API source: {str(e)}")
             return []
+
+    def iter_data(self, filters=None):
+        """
+        Lazily fetch filtered records, page by page
+        
+        Args:
+            filters (dict): Same filters as get_data
+            
+        Yields:
+            SaleRecord: Filtered records
+        """
+        filters = filters or {}
+        # One parser for every page, so its memo and hit rate span the fetch
+        date_parser = self.date_parser = DateParser()
+        if not self.api_url:
+            yield from normalize_records(SAMPLE_API_DATA, filters, date_parser)
+            return
+        
+        for page in self.iter_pages(filters):
+            yield from normalize_records(page, filters, date_parser)
     
-    def _apply_filters(self, data, filters):
-        filtered_data = []
+    def get_data_chunks(self, filters=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Stream filtered records in bounded chunks, ready for save_data
         
-        start_date = filters.get('start_date')
-        end_date = filters.get('end_date')
-        companies = filters.get('companies', [])
-        models = filters.get('models', [])
+        Args:
+            filters (dict): Same filters as get_data
+            chunk_size (int): Maximum number of records per chunk
+            
+        Yields:
+            list: Filtered SaleRecords
+        """
+        count = 0
+        try:
+            for chunk in chunked(self.iter_data(filters), chunk_size):
+                count += len(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"Error streaming data from API source: {str(e)}")
+            raise
+        logger.info(f"Streamed {count} records from API source "
+                    f"({self.date_parser.summary()})")
+
+    def iter_pages(self, filters=None):
+        """
+        Fetch every page of the API concurrently, yielding them in page order
         
-        start_date = datetime.fromisoformat(start_date) if start_date else None
-        end_date = datetime.fromisoformat(end_date) if end_date else None
+        The first page tells us total_pages; after that up to max_in_flight
+        requests are kept running over one pooled AsyncClient while pages are
+        handed to the caller, so memory is bounded by the window rather than
+        by the size of the result set.
         
-        for record in data:
-            # Parse sale date
-            sale_date = None
-            if 'sale_date' in record:
-                try:
-                    sale_date = datetime.fromisoformat(record['sale_date'])
-                except (ValueError, TypeError):
-                    continue
+        Args:
+            filters (dict): Filters pushed down as query parameters
             
-            # Apply date filters
-            if start_date and (not sale_date or sale_date < start_date):
-                continue
-                
-            if end_date and (not sale_date or sale_date > end_date):
-                continue
-                
-            # Apply company filter
-            if companies and record.get('company') not in companies:
-                continue
-                
-            # Apply model filter
-            if models and record.get('car_model') not in models:
-                continue
-                
-            filtered_data.append(record)
+        Yields:
+            list: Raw records of one page
+        """
+        params = self._query_params(filters or {})
+        loop = asyncio.new_event_loop()
+        limits = httpx.Limits(max_connections=self.max_in_flight,
+                              max_keepalive_connections=self.max_in_flight)
+        client = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+        pending = deque()
+        try:
+            records, total_pages = self._parse_page(
+                loop.run_until_complete(self._fetch_page(client, params, 1)))
+            self.expected_rows = len(records) if total_pages == 1 else total_pages * self.page_size
+            yield records
             
-        return filtered_data
-        
-    def save_data(self, session, task_id, data):
+            next_page = 2
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < self.max_in_flight:
+                    pending.append(loop.create_task(self._fetch_page(client, params, next_page)))
+                    next_page += 1
+                records, _ = self._parse_page(loop.run_until_complete(pending.popleft()))
+                yield records
+        finally:
+            for request in pending:
+                request.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(client.aclose())
+            loop.close()
+
+    async def _fetch_page(self, client, params, page):
+        """Fetch one page, retrying transient failures with exponential backoff"""
+        page_params = dict(params, page=page, page_size=self.page_size)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.get(self.api_url, params=page_params)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = str(e) or type(e).__name__
+            
+            if attempt == self.max_retries:
+                raise RuntimeError(f"API page {page} failed after {attempt + 1} attempts: {error}")
+            
+            delay = self.backoff * (2 ** attempt) * (1 + random.random())
+            logger.warning(f"API page {page} attempt {attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _parse_page(payload):
+        if isinstance(payload, list):
+            return payload, 1
+        return payload.get('data', []), int(payload.get('total_pages', 1))
+
+    @staticmethod
+    def _query_params(filters):
+        params = {}
+        for key in ('start_date', 'end_date'):
+            if filters.get(key):
+                params[key] = filters[key]
+        for key in ('companies', 'models'):
+            if filters.get(key):
+                params[key] = ','.join(filters[key])
+        return params
+    
+    def _apply_filters(self, data, filters):
+        return list(normalize_records(data, filters, DateParser()))
+
+    def save_data(self, session, task_id, data, bulk=False, batch_size=DEFAULT_BATCH_SIZE, commit=True):
         """
         Save data to the database
         
         Args:
             session: SQLAlchemy session
             task_id (int): Task ID
-            data (list): Data records to save
+            data (iterable): SaleRecords to save
+            bulk (bool): Insert with Core executemany, committing per batch
+            batch_size (int): Rows per batch in bulk mode
+            commit (bool): Commit the rows, or leave that to the caller
+            
+        Returns:
+            dict: rows, seconds and rows_per_second for this call
         """
-        for record in data:
-            try:
-                sale_date = None
-                if 'sale_date' in record:
-                    try:
-                        sale_date = datetime.fromisoformat(record['sale_date'])
-                    except (ValueError, TypeError):
-                        sale_date = None
-                
-                sales_data = SalesData(
-                    task_id=task_id,
-                    source='source_c',  # New source identifier
-                    company=record.get('company'),
-                    car_model=record.get('car_model'),
-                    sale_date=sale_date,
-                    price=float(record.get('price', 0)),
-                    year=sale_date.year if sale_date else None,
-                    month=sale_date.month if sale_date else None
-                )
-                
-                session.add(sales_data)
-            except Exception as e:
-                logger.error(f"Error saving record to database: {str(e)}")
-                
-        session.commit()
-        logger.info(f"Saved {len(data)} records from API source to database")
\ No newline at end of file
+        stats = save_rows(session, sales_rows(data, task_id, 'source_c'), bulk=bulk, batch_size=batch_size,
+                          commit=commit)
+        logger.info(f"Saved {stats['rows']} records from API source to database "
+                    f"({stats['rows_per_second']:.0f} rows/s, {'bulk' if bulk else 'orm'})")
+        return stats
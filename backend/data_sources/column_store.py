@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+On-disk columnar cache of source files
+
+Each source file version is compiled once into a directory of .npy column
+files plus a dictionary.json of the distinct values, next to the source in
+a .columns directory (or under COLUMN_STORE_DIR). Workers open those
+columns with mmap, so startup skips parsing entirely and every process
+shares the same pages through the OS page cache.
+
+The directory name carries the source file's mtime and size, so a changed
+source file simply has no compiled version yet: it is rebuilt on first use
+and older versions are removed.
+
+Compile ahead of time from the backend directory:
+    python -m data_sources.column_store            # data/*.json, data/*.csv
+    python -m data_sources.column_store path/to/file.csv ...
+"""
+
+import os
+import re
+import json
+import glob
+import shutil
+import logging
+import argparse
+import threading
+from datetime import datetime
+from data_sources.columnar import ColumnarSnapshot, np
+from data_sources.snapshot import file_version
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sources read compiled columns when the numpy engine is used
+COLUMN_STORE_ENABLED = os.environ.get('COLUMN_STORE', 'true').lower() == 'true'
+
+# Where compiled columns go; defaults to a .columns directory beside each source
+COLUMN_STORE_DIR = os.environ.get('COLUMN_STORE_DIR')
+
+STORE_DIR_NAME = '.columns'
+COLUMNS = ('company_codes', 'model_codes', 'date_codes', 'sale_dates', 'prices')
+DICTIONARY_FILE = 'dictionary.json'
+
+
+def store_path(source_path, hash_content=False):
+    """
+    Directory holding the compiled columns of the current source version
+
+    Args:
+        source_path (str): Source file path
+        hash_content (bool): Also key the directory on a content hash
+
+    Returns:
+        str: Directory path, which may not exist yet
+    """
+    path, mtime_ns, size, *digest = file_version(source_path, hash_content)
+    directory = COLUMN_STORE_DIR or os.path.join(os.path.dirname(path), STORE_DIR_NAME)
+    name = f"{os.path.basename(path)}.{mtime_ns}-{size}"
+    if digest:
+        name += f"-{digest[0][:16]}"
+    return os.path.join(directory, name)
+
+
+def save(snapshot, directory):
+    """
+    Write a ColumnarSnapshot to directory
+
+    Columns are written to a private temporary directory that is renamed
+    into place, so readers never see a partial store. If another process
+    finished the same version first, its copy is kept.
+    """
+    temp = f"{directory}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(temp)
+    try:
+        for name in COLUMNS:
+            np.save(os.path.join(temp, f"{name}.npy"), getattr(snapshot, name))
+        with open(os.path.join(temp, DICTIONARY_FILE), 'w', encoding='utf-8') as file:
+            json.dump({
+                'companies': snapshot.companies,
+                'models': snapshot.models,
+                'dates': [d.isoformat() if d else None for d in snapshot.dates],
+            }, file)
+        os.rename(temp, directory)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise
+    finally:
+        shutil.rmtree(temp, ignore_errors=True)
+
+
+def load(directory):
+    """
+    Open compiled columns with mmap
+
+    Returns:
+        ColumnarSnapshot: Snapshot backed by read-only memory maps
+
+    Raises:
+        FileNotFoundError: If the directory has not been compiled
+    """
+    with open(os.path.join(directory, DICTIONARY_FILE), 'r', encoding='utf-8') as file:
+        dictionary = json.load(file)
+    columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in COLUMNS}
+    dates = [datetime.fromisoformat(d) if d else None for d in dictionary['dates']]
+    return ColumnarSnapshot(dictionary['companies'], dictionary['models'], dates, **columns)
+
+
+def open_snapshot(source_path, build, hash_content=False):
+    """
+    Load the compiled columns of a source file, compiling them first if needed
+
+    Args:
+        source_path (str): Source file path
+        build (callable): Parses the source into a ColumnarSnapshot
+        hash_content (bool): Also key the store on a content hash
+
+    Returns:
+        ColumnarSnapshot: mmap-backed snapshot, or the freshly built in-memory
+            one if the store cannot be written
+    """
+    directory = store_path(source_path, hash_content)
+    try:
+        return load(directory)
+    except FileNotFoundError:
+        pass
+
+    snapshot = build()
+    try:
+        save(snapshot, directory)
+    except OSError as e:
+        logger.warning(f"Could not write column store {directory}: {str(e)}")
+        return snapshot
+    logger.info(f"Compiled {len(snapshot)} rows of {source_path} into {directory}")
+    _remove_stale(directory)
+    return load(directory)
+
+
+def _remove_stale(directory):
+    """Delete compiled older versions of the same source file"""
+    parent, name = os.path.split(directory)
+    version = re.compile(re.escape(name.rsplit('.', 1)[0]) + r'\.\d+-\d+(-[0-9a-f]+)?$')
+    for other in os.listdir(parent):
+        if other != name and version.match(other):
+            # Processes that still map the old files keep them until they close
+            shutil.rmtree(os.path.join(parent, other), ignore_errors=True)
+
+
+def compile_sources(paths):
+    """
+    Compile source files ahead of time
+
+    Args:
+        paths (list): .json and .csv source files
+
+    Returns:
+        dict: Store directory per source path
+    """
+    # Imported here: the sources themselves import this module
+    from data_sources.csv_source import CSVDataSource
+    from data_sources.json_source import JSONDataSource
+
+    compiled = {}
+    for path in paths:
+        source_class = CSVDataSource if path.endswith('.csv') else JSONDataSource
+        source = source_class(path, use_cache=False, engine='numpy', column_store=True)
+        source.build_snapshot()
+        compiled[path] = store_path(path, source.hash_content)
+    return compiled
+
+
+def main():
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="Source files (default: data/*.json and data/*.csv)")
+    args = parser.parse_args()
+    if np is None:
+        parser.error("NumPy is required to compile column stores")
+
+    paths = args.paths or sorted(glob.glob(os.path.join(data_dir, '*.json')) + glob.glob(os.path.join(data_dir, '*.csv')))
+    for path, directory in compile_sources(paths).items():
+        print(f"{path} -> {directory}")
+
+
+if __name__ == "__main__":
+    main()
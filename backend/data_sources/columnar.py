@@ -0,0 +1,194 @@
+import os
+import sys
+import logging
+from array import array
+from functools import partial
+from data_sources.records import RecordFilter, SaleRecord
+from data_sources.snapshot import SourceSnapshot, _Dictionary
+
+try:
+    import numpy as np
+except ImportError:  # Optional, only needed for the numpy engine
+    np = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Snapshot engine used when a source is not given one: 'python' or 'numpy'
+DEFAULT_ENGINE = os.environ.get('SOURCE_ENGINE', 'python').lower()
+
+# Matching rows turned back into SaleRecords per block, bounding the
+# temporary Python lists select builds
+SELECT_BLOCK_SIZE = 65536
+
+_new_record = tuple.__new__
+_fallback_logged = False
+
+
+def _object_array(values):
+    """1-d object array of values, even when they are tuples or lists"""
+    result = np.empty(len(values), dtype=object)
+    result[:] = values
+    return result
+
+
+class ColumnarSnapshot:
+    """
+    NumPy columns for a normalized source file
+
+    sale_date is a datetime64[us] column (NaT for records without one),
+    price a float64 column, and company/car_model are int32 codes into lists
+    of distinct values. A task's filters are evaluated as a single boolean
+    mask over whole columns instead of record by record; only the matching
+    rows are turned back into SaleRecords, in file order. date_codes index
+    the distinct sale dates so those rows reuse one datetime per day rather
+    than converting datetime64 values back one by one.
+
+    Drop-in alternative to SourceSnapshot for the snapshot cache.
+    """
+    engine = 'numpy'
+
+    def __init__(self, companies, models, dates, company_codes, model_codes, date_codes, sale_dates, prices):
+        self.companies = companies
+        self.models = models
+        self.dates = dates
+        self.company_codes = company_codes
+        self.model_codes = model_codes
+        self.date_codes = date_codes
+        self.sale_dates = sale_dates
+        self.prices = prices
+        self._company_lookup = {value: code for code, value in enumerate(companies)}
+        self._model_lookup = {value: code for code, value in enumerate(models)}
+        self._company_values = _object_array(companies)
+        self._model_values = _object_array(models)
+        self._date_values = _object_array(dates)
+        self._year_values = _object_array([d.year if d else None for d in dates])
+        self._month_values = _object_array([d.month if d else None for d in dates])
+        self.nbytes = self._estimate_nbytes()
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build the columns from unfiltered SaleRecords
+
+        Args:
+            records: Iterable of SaleRecords, e.g. a source's normalized rows
+
+        Returns:
+            ColumnarSnapshot: The encoded columns
+        """
+        companies = _Dictionary()
+        models = _Dictionary()
+        dates = _Dictionary()
+        company_codes = array('i')
+        model_codes = array('i')
+        date_codes = array('i')
+        prices = array('d')
+
+        for company, car_model, sale_date, price, _, _ in records:
+            company_codes.append(companies.encode(company))
+            model_codes.append(models.encode(car_model))
+            date_codes.append(dates.encode(sale_date))
+            prices.append(price)
+
+        # Few distinct dates: convert those once, then gather per row
+        date_codes = np.frombuffer(date_codes, dtype=np.int32).copy()
+        date_table = np.array(dates.values, dtype='datetime64[us]')
+        return cls(companies.values, models.values, dates.values,
+                   np.frombuffer(company_codes, dtype=np.int32).copy(),
+                   np.frombuffer(model_codes, dtype=np.int32).copy(),
+                   date_codes, date_table[date_codes],
+                   np.frombuffer(prices, dtype=np.float64).copy())
+
+    def __len__(self):
+        return len(self.prices)
+
+    def _estimate_nbytes(self):
+        """Approximate memory held by the snapshot"""
+        columns = sum(column.nbytes for column in
+                      (self.company_codes, self.model_codes, self.date_codes, self.sale_dates, self.prices))
+        values = sum(sys.getsizeof(v) for v in self.companies) + sum(sys.getsizeof(v) for v in self.models)
+        # Lookup dicts and object arrays built around the distinct values
+        return columns + values + 80 * (len(self.companies) + len(self.models)) + 150 * len(self.dates)
+
+    def mask(self, filters):
+        """
+        Evaluate task filters over whole columns
+
+        Args:
+            filters (dict): Same filters as the sources' get_data
+
+        Returns:
+            numpy.ndarray: Boolean mask of matching rows
+        """
+        record_filter = RecordFilter(filters)
+        mask = np.ones(len(self), dtype=bool)
+        # NaT compares False, so undated records fail any date filter
+        if record_filter.start_date:
+            mask &= self.sale_dates >= np.datetime64(record_filter.start_date, 'us')
+        if record_filter.end_date:
+            mask &= self.sale_dates <= np.datetime64(record_filter.end_date, 'us')
+        if record_filter.companies is not None:
+            mask &= self._allowed(record_filter.companies, self._company_lookup)[self.company_codes]
+        if record_filter.models is not None:
+            mask &= self._allowed(record_filter.models, self._model_lookup)[self.model_codes]
+        return mask
+
+    def count(self, filters):
+        """Number of records select would yield"""
+        return int(np.count_nonzero(self.mask(filters)))
+
+    def select(self, filters):
+        """
+        Apply task filters to the snapshot
+
+        Args:
+            filters (dict): Same filters as the sources' get_data
+
+        Yields:
+            SaleRecord: Matching records, in file order
+        """
+        rows = np.flatnonzero(self.mask(filters))
+        new_record = partial(_new_record, SaleRecord)
+        for start in range(0, len(rows), SELECT_BLOCK_SIZE):
+            block = rows[start:start + SELECT_BLOCK_SIZE]
+            date_codes = self.date_codes[block]
+            # Records are assembled from whole column lists, not field by field
+            yield from map(new_record, zip(self._company_values[self.company_codes[block]].tolist(),
+                                           self._model_values[self.model_codes[block]].tolist(),
+                                           self._date_values[date_codes].tolist(),
+                                           self.prices[block].tolist(),
+                                           self._year_values[date_codes].tolist(),
+                                           self._month_values[date_codes].tolist()))
+
+    @staticmethod
+    def _allowed(values, lookup):
+        """Boolean lookup table over codes, True for the allowed values"""
+        table = np.zeros(len(lookup), dtype=bool)
+        table[[lookup[value] for value in values if value in lookup]] = True
+        return table
+
+
+def snapshot_type(engine=None):
+    """
+    Resolve a snapshot engine name to its snapshot class
+
+    Args:
+        engine (str): 'python' or 'numpy'; defaults to SOURCE_ENGINE
+
+    Returns:
+        type: SourceSnapshot or ColumnarSnapshot. 'numpy' falls back to
+            SourceSnapshot when NumPy is not installed.
+    """
+    global _fallback_logged
+    engine = (engine or DEFAULT_ENGINE).lower()
+    if engine == SourceSnapshot.engine:
+        return SourceSnapshot
+    if engine != ColumnarSnapshot.engine:
+        raise ValueError(f"Unknown snapshot engine: {engine}")
+    if np is None:
+        if not _fallback_logged:
+            logger.warning("NumPy is not installed, using the python snapshot engine")
+            _fallback_logged = True
+        return SourceSnapshot
+    return ColumnarSnapshot
@@ -1,16 +1,39 @@
 import csv
 import os
 import logging
-from datetime import datetime
-from models import SalesData
+from itertools import chain
+from operator import itemgetter
+from data_sources.dates import DateParser, fromisoformat
+from data_sources.ingest import save_rows, DEFAULT_BATCH_SIZE
+from data_sources.pipeline import DEFAULT_CHUNK_SIZE
+from data_sources import column_store as store
+from data_sources.columnar import snapshot_type
+from data_sources.file_source import FileSourceMixin
+from data_sources.records import RecordFilter, SaleRecord, sales_rows
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class CSVDataSource:
-    def __init__(self, file_path=None):
+# Tried after datetime.fromisoformat for sale_date values
+CSV_DATE_FORMATS = ('%Y-%m-%d',)
+
+
+class CSVDataSource(FileSourceMixin):
+    source_name = 'CSV'
+
+    def __init__(self, file_path=None, use_cache=True, hash_content=False, engine=None, column_store=None):
+        self.date_parser = DateParser(CSV_DATE_FORMATS)
         self.file_path = file_path or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
                                                  'data', 'sample_data_b.csv')
+        # Serve repeated tasks from the process-wide snapshot cache
+        self.use_cache = use_cache
+        self.hash_content = hash_content
+        # 'python' (indexed arrays) or 'numpy' (vectorized masks) snapshots
+        self.snapshot_type = snapshot_type(engine)
+        # numpy snapshots are read from mmapped columns compiled on disk
+        self.column_store = store.COLUMN_STORE_ENABLED if column_store is None else column_store
+        # Rows the last get_data_chunks call will yield, when known up front
+        self.expected_rows = None
         
     def get_data(self, filters=None):
         """
@@ -24,19 +47,13 @@ class CSVDataSource:
                 - models (list): List of car models to include
                 
         Returns:
-            list: Filtered data records
+            list: Filtered SaleRecords
         """
         if filters is None:
             filters = {}
             
         try:
-            data = []
-            with open(self.file_path, 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                data = list(reader)
-                
-            # Apply filters
-            filtered_data = self._apply_filters(data, filters)
+            filtered_data = list(self.iter_data(filters))
             
             logger.info(f"Retrieved {len(filtered_data)} records from CSV source")
             return filtered_data
@@ -44,86 +61,145 @@ class CSVDataSource:
         except Exception as e:
             logger.error(f"Error retrieving data from CSV source: {str(e)}")
             return []
-            
-    def _apply_filters(self, data, filters):
-        filtered_data = []
+
+    def iter_data(self, filters=None):
+        """
+        Lazily read and filter the CSV file row by row
         
-        start_date = filters.get('start_date')
-        end_date = filters.get('end_date')
-        companies = filters.get('companies', [])
-        models = filters.get('models', [])
+        Cheap predicates (company/model set membership on the raw row) run
+        before the sale date is parsed, and the sale date and price are parsed
+        exactly once, straight into a SaleRecord, for rows that survive.
         
-        start_date = datetime.fromisoformat(start_date) if start_date else None
-        end_date = datetime.fromisoformat(end_date) if end_date else None
+        Args:
+            filters (dict): Same filters as get_data
+            
+        Returns:
+            generator: Filtered SaleRecords
+        """
+        filters = filters or {}
+        if self._cached():
+            return self._snapshot().select(filters)
+        self.date_parser = DateParser(CSV_DATE_FORMATS)
+        return chain.from_iterable(self._iter_file_chunks(filters, self.date_parser))
+
+    def _parse_snapshot(self):
+        self.date_parser = DateParser(CSV_DATE_FORMATS)
+        snapshot = self.snapshot_type.from_records(chain.from_iterable(self._iter_file_chunks({}, self.date_parser)))
+        logger.info(f"Parsed {len(snapshot)} records from CSV source "
+                    f"({self.date_parser.summary()})")
+        return snapshot
+
+    def _iter_file_chunks(self, filters, date_parser, chunk_size=DEFAULT_CHUNK_SIZE):
+        with open(self.file_path, 'r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                return
+            yield from self._iter_filtered_chunks(reader, header, filters, date_parser, chunk_size)
+
+    def _iter_chunks(self, filters, chunk_size):
+        if self._cached():
+            return super()._iter_chunks(filters, chunk_size)
+        # Uncached files are read straight into chunks, sparing every row a
+        # hop through a generator and islice
+        self.date_parser = DateParser(CSV_DATE_FORMATS)
+        return self._iter_file_chunks(filters or {}, self.date_parser, chunk_size)
+            
+    def _iter_filtered_chunks(self, rows, header, filters, date_parser, chunk_size):
+        record_filter = RecordFilter(filters)
+        start_date = record_filter.start_date
+        end_date = record_filter.end_date
+        companies = record_filter.companies
+        models = record_filter.models
+        parse_fallback = date_parser.fallback
+        new_record = tuple.__new__
         
-        for record in data:
-            # Parse sale date
-            sale_date = None
-            if 'sale_date' in record:
-                try:
-                    sale_date = datetime.fromisoformat(record['sale_date'])
-                except (ValueError, TypeError):
-                    try:
-                        # Try different date formats
-                        sale_date = datetime.strptime(record['sale_date'], '%Y-%m-%d')
-                    except (ValueError, TypeError):
-                        continue
+        # Columns missing from the header are read from padding appended to
+        # each row, holding the same defaults the dict-based sources use
+        width = len(header)
+        columns = {name: index for index, name in enumerate(header)}
+        padding = []
+        indices = []
+        for name, default in (('company', None), ('car_model', None), ('sale_date', None), ('price', 0)):
+            if name not in columns:
+                columns[name] = width + len(padding)
+                padding.append(default)
+            indices.append(columns[name])
+        get_fields = itemgetter(*indices)
+        has_date = 'sale_date' in header
+        if not has_date and (start_date or end_date):
+            return
+        
+        # The checks below run once per row of the file, so row shape
+        # problems are handled on the IndexError (free to set up on 3.11+)
+        # rather than tested for on every row
+        chunk = []
+        append = chunk.append
+        for row in rows:
+            try:
+                company, car_model, sale_date, price = get_fields(row)
+            except IndexError:
+                # csv.DictReader skips blank lines and fills short rows with None
+                if not row:
+                    continue
+                company, car_model, sale_date, price = get_fields(row[:width] + [None] * (width - len(row)) + padding)
             
-            # Apply date filters
-            if start_date and (not sale_date or sale_date < start_date):
-                continue
-                
-            if end_date and (not sale_date or sale_date > end_date):
+            # Apply company and model filters before touching the date
+            if companies is not None and company not in companies:
                 continue
                 
-            # Apply company filter
-            if companies and record.get('company') not in companies:
+            if models is not None and car_model not in models:
                 continue
-                
-            # Apply model filter
-            if models and record.get('car_model') not in models:
+            
+            # Parse sale date and apply date filters; DateParser inlined:
+            # fromisoformat first, memoized strptime only for what it rejects
+            if has_date:
+                try:
+                    sale_date = fromisoformat(sale_date)
+                except (ValueError, TypeError):
+                    sale_date = parse_fallback(sale_date)
+                    if sale_date is None:
+                        continue
+                if start_date and sale_date < start_date:
+                    continue
+                if end_date and sale_date > end_date:
+                    continue
+            
+            # Inlined make_record
+            try:
+                price = float(price)
+            except (ValueError, TypeError):
+                logger.warning(f"Skipping record with invalid price: {price!r}")
                 continue
-                
-            filtered_data.append(record)
             
-        return filtered_data
-        
-    def save_data(self, session, task_id, data):
+            if sale_date is None:
+                append(new_record(SaleRecord, (company, car_model, None, price, None, None)))
+            else:
+                append(new_record(SaleRecord, (company, car_model, sale_date, price, sale_date.year, sale_date.month)))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+                append = chunk.append
+        if chunk:
+            yield chunk
+
+    def save_data(self, session, task_id, data, bulk=False, batch_size=DEFAULT_BATCH_SIZE, commit=True):
         """
         Save data to the database
         
         Args:
             session: SQLAlchemy session
             task_id (int): Task ID
-            data (list): Data records to save
+            data (iterable): SaleRecords to save
+            bulk (bool): Insert with Core executemany, committing per batch
+            batch_size (int): Rows per batch in bulk mode
+            commit (bool): Commit the rows, or leave that to the caller
+            
+        Returns:
+            dict: rows, seconds and rows_per_second for this call
         """
-        for record in data:
-            try:
-                sale_date = None
-                if 'sale_date' in record:
-                    try:
-                        sale_date = datetime.fromisoformat(record['sale_date'])
-                    except (ValueError, TypeError):
-                        try:
-                            # Try different date formats
-                            sale_date = datetime.strptime(record['sale_date'], '%Y-%m-%d')
-                        except (ValueError, TypeError):
-                            sale_date = None
-                
-                sales_data = SalesData(
-                    task_id=task_id,
-                    source='source_b',
-                    company=record.get('company'),
-                    car_model=record.get('car_model'),
-                    sale_date=sale_date,
-                    price=float(record.get('price', 0)),
-                    year=sale_date.year if sale_date else None,
-                    month=sale_date.month if sale_date else None
-                )
-                
-                session.add(sales_data)
-            except Exception as e:
-                logger.error(f"Error saving record to database: {str(e)}")
-                
-        session.commit()
-        logger.info(f"Saved {len(data)} records from CSV source to database")
\ No newline at end of file
+        stats = save_rows(session, sales_rows(data, task_id, 'source_b'), bulk=bulk, batch_size=batch_size,
+                          commit=commit)
+        logger.info(f"Saved {stats['rows']} records from CSV source to database "
+                    f"({stats['rows_per_second']:.0f} rows/s, {'bulk' if bulk else 'orm'})")
+        return stats
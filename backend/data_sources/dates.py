@@ -0,0 +1,132 @@
+from datetime import datetime
+
+# Distinct non-ISO sale_date strings remembered per parser
+DEFAULT_MEMO_SIZE = 16384
+
+# Bound once: the data sources call it for every row
+fromisoformat = datetime.fromisoformat
+
+# Memo value of a raw date no format matches
+_UNPARSEABLE = object()
+
+
+class DateParser:
+    """
+    sale_date parser shared by the data sources
+
+    datetime.fromisoformat (C implemented) is tried first for every value;
+    it covers YYYY-MM-DD and YYYY-MM-DDTHH:MM:SS and is cheaper than any
+    memo lookup, so ISO feeds pay nothing extra. Only values it rejects go
+    to fallback(), which tries the strptime formats and memoizes the result
+    in a dict keyed on the raw value. Once a format matches it is tried
+    first for the rest of the file.
+
+    Hot loops may inline the fromisoformat attempt and call fallback()
+    themselves, saving a method call per row.
+
+    Create one parser per fetch so the remembered format stays per file.
+
+    Args:
+        formats (tuple): Fallback strptime formats, in order of preference
+        memo_size (int): Maximum number of memoized raw values
+    """
+    def __init__(self, formats=(), memo_size=DEFAULT_MEMO_SIZE):
+        self.formats = tuple(formats)
+        self.preferred_format = None
+        self.format_counts = dict.fromkeys(self.formats, 0)
+        self.memo = {}
+        self.memo_size = memo_size
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def __call__(self, value):
+        """
+        Parse a raw sale_date
+
+        Returns:
+            datetime: The parsed date, or None if no format matches
+        """
+        try:
+            return fromisoformat(value)
+        except (ValueError, TypeError):
+            return self.fallback(value)
+
+    def fallback(self, value):
+        """
+        Parse a raw sale_date that fromisoformat rejected
+
+        Returns:
+            datetime: The parsed date, or None if no format matches
+        """
+        try:
+            result = self.memo.get(value)
+        except TypeError:
+            # Unhashable values are never dates
+            self.failures += 1
+            return None
+
+        if result is None:
+            self.misses += 1
+            result = self._parse(value)
+            if len(self.memo) < self.memo_size:
+                self.memo[value] = result
+        else:
+            self.hits += 1
+
+        if result is _UNPARSEABLE:
+            self.failures += 1
+            return None
+        return result
+
+    def _parse(self, value):
+        preferred = self.preferred_format
+        if preferred is not None:
+            try:
+                result = datetime.strptime(value, preferred)
+            except (ValueError, TypeError):
+                pass
+            else:
+                self.format_counts[preferred] += 1
+                return result
+
+        for date_format in self.formats:
+            if date_format == preferred:
+                continue
+            try:
+                result = datetime.strptime(value, date_format)
+            except (ValueError, TypeError):
+                continue
+            self.preferred_format = date_format
+            self.format_counts[date_format] += 1
+            return result
+
+        return _UNPARSEABLE
+
+    def stats(self):
+        """
+        Get fallback memo and format counters
+
+        Returns:
+            dict: fallbacks (values fromisoformat rejected), memo hits,
+                misses and hit_rate among them, memo size, per-format match
+                counts, the format currently tried first and the number of
+                failures
+        """
+        fallbacks = self.hits + self.misses
+        return {
+            "fallbacks": fallbacks,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / fallbacks if fallbacks else 0.0,
+            "size": len(self.memo),
+            "max_size": self.memo_size,
+            "formats": dict(self.format_counts),
+            "preferred_format": self.preferred_format,
+            "failures": self.failures,
+        }
+
+    def summary(self):
+        """Fallback counters for log lines"""
+        stats = self.stats()
+        return f"{stats['fallbacks']} non-ISO dates, memo hit rate {stats['hit_rate']:.1%}"
@@ -0,0 +1,101 @@
+import logging
+from data_sources import column_store as store
+from data_sources.columnar import ColumnarSnapshot
+from data_sources.pipeline import chunked, DEFAULT_CHUNK_SIZE
+from data_sources.snapshot import snapshot_cache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FileSourceMixin:
+    """
+    Snapshot caching, row order and chunked streaming of the file sources
+
+    Classes using it set source_name and the file_path, use_cache,
+    hash_content, snapshot_type, column_store and expected_rows attributes,
+    and implement iter_data and _parse_snapshot.
+    """
+    # Rows come back in the same order for the same file version and
+    # row_order, so a failed task may skip the rows it already saved
+    resumable = True
+
+    # Name used in log lines, e.g. 'JSON'
+    source_name = 'file'
+
+    def _cached(self):
+        return self.use_cache and snapshot_cache.cacheable(self.file_path)
+
+    def _snapshot(self):
+        return snapshot_cache.get(self.file_path, self.build_snapshot, self.hash_content,
+                                  self.snapshot_type.engine)
+
+    def count_data(self, filters=None):
+        """
+        Count matching records from the cached snapshot
+
+        Args:
+            filters (dict): Same filters as get_data
+
+        Returns:
+            int: Matching records, or None if the file is streamed uncached
+        """
+        if self._cached():
+            return self._snapshot().count(filters or {})
+        return None
+
+    def row_order(self):
+        """
+        What decides the order get_data_chunks yields rows in
+
+        Cached python snapshots yield rows by sale date, numpy snapshots and
+        streamed (uncached) files in file order, so the engine and whether
+        the file is cached under the current SNAPSHOT_CACHE_MB are part of a
+        task's source version.
+
+        Returns:
+            tuple: (snapshot engine, column store) or ('stream',)
+        """
+        if self._cached():
+            return (self.snapshot_type.engine, bool(self.column_store))
+        return ('stream',)
+
+    def build_snapshot(self):
+        """
+        Parse the whole file into a snapshot of the configured engine
+
+        Returns:
+            SourceSnapshot or ColumnarSnapshot: Every valid record of the file
+        """
+        if self.column_store and self.snapshot_type is ColumnarSnapshot:
+            return store.open_snapshot(self.file_path, self._parse_snapshot, self.hash_content)
+        return self._parse_snapshot()
+
+    def get_data_chunks(self, filters=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Stream filtered records in bounded chunks, ready for save_data
+
+        Peak memory is one chunk regardless of the file size. Unlike get_data,
+        errors are logged and re-raised so a half-read file is never mistaken
+        for a complete one.
+
+        Args:
+            filters (dict): Same filters as get_data
+            chunk_size (int): Maximum number of records per chunk
+
+        Yields:
+            list: Filtered SaleRecords
+        """
+        count = 0
+        try:
+            self.expected_rows = self.count_data(filters)
+            for chunk in self._iter_chunks(filters, chunk_size):
+                count += len(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"Error streaming data from {self.source_name} source: {str(e)}")
+            raise
+        logger.info(f"Streamed {count} records from {self.source_name} source")
+
+    def _iter_chunks(self, filters, chunk_size):
+        return chunked(self.iter_data(filters), chunk_size)
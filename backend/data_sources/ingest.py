@@ -0,0 +1,56 @@
+import time
+from sqlalchemy import insert
+from models import SalesData
+from data_sources.pipeline import chunked
+
+# Rows per executemany/commit in bulk mode
+DEFAULT_BATCH_SIZE = 5000
+
+
+def save_rows(session, rows, bulk=False, batch_size=DEFAULT_BATCH_SIZE, commit=True):
+    """
+    Persist sales_data rows through either the ORM or Core executemany
+
+    The ORM path adds one SalesData object per row and commits once. The bulk
+    path skips the unit of work entirely: each batch is sent as a single
+    Core insert() executemany and committed, so memory stays bounded by
+    batch_size however many rows come through.
+
+    With commit=False nothing is committed: the rows are only sent to the
+    database, and the caller commits them together with its own changes.
+
+    Args:
+        session: SQLAlchemy session
+        rows: Iterable of dicts keyed by sales_data column names
+        bulk (bool): Use the Core executemany path
+        batch_size (int): Rows per batch and commit in bulk mode
+        commit (bool): Commit the rows; otherwise leave the transaction open
+
+    Returns:
+        dict: rows, seconds and rows_per_second for the call
+    """
+    start = time.perf_counter()
+    count = 0
+
+    if bulk:
+        statement = insert(SalesData.__table__)
+        for batch in chunked(rows, batch_size):
+            session.execute(statement, batch)
+            if commit:
+                session.commit()
+            count += len(batch)
+    else:
+        for row in rows:
+            session.add(SalesData(**row))
+            count += 1
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": count,
+        "seconds": seconds,
+        "rows_per_second": count / seconds if seconds > 0 else 0.0,
+    }
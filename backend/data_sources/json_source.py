@@ -1,16 +1,111 @@
 import json
 import os
+import re
 import logging
-from datetime import datetime
-from models import SalesData
+from data_sources.dates import DateParser
+from data_sources.ingest import save_rows, DEFAULT_BATCH_SIZE
+from data_sources import column_store as store
+from data_sources.columnar import snapshot_type
+from data_sources.file_source import FileSourceMixin
+from data_sources.records import normalize_records, sales_rows
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class JSONDataSource:
-    def __init__(self, file_path=None):
+# Characters read from the file per refill when streaming
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _iter_json_array(file, read_size=READ_SIZE):
+    """
+    Incrementally parse a top-level JSON array, yielding one element at a time
+
+    Only the current read buffer (plus whatever element straddles its end) is
+    held in memory, so peak usage does not depend on the size of the file.
+
+    Args:
+        file: Text file object positioned at the start of the document
+        read_size (int): Number of characters to read per refill
+
+    Yields:
+        The decoded array elements, in file order
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    in_array = False
+    expect_value = True
+    first = True
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON document")
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        char = buffer[pos]
+        if not in_array:
+            if char != '[':
+                raise ValueError("JSON source must contain a top-level array")
+            in_array = True
+            pos += 1
+            continue
+
+        if char == ']' and (first or not expect_value):
+            return
+
+        if not expect_value:
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            expect_value = True
+            pos += 1
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            value, end = None, None
+
+        # A failed decode or a value touching the end of the buffer may just be
+        # an element cut in half by the read boundary, so refill and retry
+        if end is None or (end == len(buffer) and not eof):
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield value
+        pos = end
+        first = False
+        expect_value = False
+
+class JSONDataSource(FileSourceMixin):
+    source_name = 'JSON'
+
+    def __init__(self, file_path=None, use_cache=True, hash_content=False, engine=None, column_store=None):
+        self.date_parser = DateParser()
         self.file_path = file_path or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
                                                   'data', 'sample_data_a.json')
+        # Serve repeated tasks from the process-wide snapshot cache
+        self.use_cache = use_cache
+        self.hash_content = hash_content
+        # 'python' (indexed arrays) or 'numpy' (vectorized masks) snapshots
+        self.snapshot_type = snapshot_type(engine)
+        # numpy snapshots are read from mmapped columns compiled on disk
+        self.column_store = store.COLUMN_STORE_ENABLED if column_store is None else column_store
+        # Rows the last get_data_chunks call will yield, when known up front
+        self.expected_rows = None
         
     def get_data(self, filters=None):
         """
@@ -24,17 +119,13 @@ class JSONDataSource:
                 - models (list): List of car models to include
                 
         Returns:
-            list: Filtered data records
+            list: Filtered SaleRecords
         """
         if filters is None:
             filters = {}
             
         try:
-            with open(self.file_path, 'r') as file:
-                data = json.load(file)
-                
-            # Apply filters
-            filtered_data = self._apply_filters(data, filters)
+            filtered_data = list(self.iter_data(filters))
             
             logger.info(f"Retrieved {len(filtered_data)} records from JSON source")
             return filtered_data
@@ -42,78 +133,60 @@ class JSONDataSource:
         except Exception as e:
             logger.error(f"Error retrieving data from JSON source: {str(e)}")
             return []
-            
-    def _apply_filters(self, data, filters):
-        filtered_data = []
-        
-        start_date = filters.get('start_date')
-        end_date = filters.get('end_date')
-        companies = filters.get('companies', [])
-        models = filters.get('models', [])
+
+    def iter_records(self):
+        """
+        Stream raw records from the JSON file without loading it whole
         
-        start_date = datetime.fromisoformat(start_date) if start_date else None
-        end_date = datetime.fromisoformat(end_date) if end_date else None
+        Yields:
+            dict: One unfiltered record at a time
+        """
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            yield from _iter_json_array(file)
+
+    def iter_data(self, filters=None):
+        """
+        Lazily fetch filtered records from the JSON source
         
-        for record in data:
-            # Parse sale date
-            sale_date = None
-            if 'sale_date' in record:
-                try:
-                    sale_date = datetime.fromisoformat(record['sale_date'])
-                except (ValueError, TypeError):
-                    continue
-            
-            # Apply date filters
-            if start_date and (not sale_date or sale_date < start_date):
-                continue
-                
-            if end_date and (not sale_date or sale_date > end_date):
-                continue
-                
-            # Apply company filter
-            if companies and record.get('company') not in companies:
-                continue
-                
-            # Apply model filter
-            if models and record.get('car_model') not in models:
-                continue
-                
-            filtered_data.append(record)
+        Args:
+            filters (dict): Same filters as get_data
             
-        return filtered_data
-        
-    def save_data(self, session, task_id, data):
+        Returns:
+            generator: Filtered SaleRecords
+        """
+        filters = filters or {}
+        if self._cached():
+            return self._snapshot().select(filters)
+        self.date_parser = DateParser()
+        return normalize_records(self.iter_records(), filters, self.date_parser)
+
+    def _parse_snapshot(self):
+        self.date_parser = DateParser()
+        snapshot = self.snapshot_type.from_records(normalize_records(self.iter_records(), {}, self.date_parser))
+        logger.info(f"Parsed {len(snapshot)} records from JSON source "
+                    f"({self.date_parser.summary()})")
+        return snapshot
+
+    def _apply_filters(self, data, filters):
+        return list(normalize_records(data, filters, DateParser()))
+
+    def save_data(self, session, task_id, data, bulk=False, batch_size=DEFAULT_BATCH_SIZE, commit=True):
         """
         Save data to the database
         
         Args:
             session: SQLAlchemy session
             task_id (int): Task ID
-            data (list): Data records to save
+            data (iterable): SaleRecords to save
+            bulk (bool): Insert with Core executemany, committing per batch
+            batch_size (int): Rows per batch in bulk mode
+            commit (bool): Commit the rows, or leave that to the caller
+            
+        Returns:
+            dict: rows, seconds and rows_per_second for this call
         """
-        for record in data:
-            try:
-                sale_date = None
-                if 'sale_date' in record:
-                    try:
-                        sale_date = datetime.fromisoformat(record['sale_date'])
-                    except (ValueError, TypeError):
-                        sale_date = None
-                
-                sales_data = SalesData(
-                    task_id=task_id,
-                    source='source_a',
-                    company=record.get('company'),
-                    car_model=record.get('car_model'),
-                    sale_date=sale_date,
-                    price=float(record.get('price', 0)),
-                    year=sale_date.year if sale_date else None,
-                    month=sale_date.month if sale_date else None
-                )
-                
-                session.add(sales_data)
-            except Exception as e:
-                logger.error(f"Error saving record to database: {str(e)}")
-                
-        session.commit()
-        logger.info(f"Saved {len(data)} records from JSON source to database")
\ No newline at end of file
+        stats = save_rows(session, sales_rows(data, task_id, 'source_a'), bulk=bulk, batch_size=batch_size,
+                          commit=commit)
+        logger.info(f"Saved {stats['rows']} records from JSON source to database "
+                    f"({stats['rows_per_second']:.0f} rows/s, {'bulk' if bulk else 'orm'})")
+        return stats
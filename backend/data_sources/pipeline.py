@@ -0,0 +1,29 @@
+from itertools import islice
+
+# Number of records handed to save_data at a time when streaming a source
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def chunked(iterable, size=DEFAULT_CHUNK_SIZE):
+    """
+    Split an iterable into lists of at most `size` items
+
+    Only one chunk is held in memory at a time, so this can sit between a
+    record generator and save_data without materializing the whole source.
+
+    Args:
+        iterable: Any iterable of records
+        size (int): Maximum number of records per chunk
+
+    Yields:
+        list: The next chunk of records
+    """
+    if size < 1:
+        raise ValueError("Chunk size must be at least 1")
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
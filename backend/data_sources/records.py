@@ -0,0 +1,143 @@
+import logging
+from datetime import datetime
+from data_sources.dates import fromisoformat
+from typing import NamedTuple, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SaleRecord(NamedTuple):
+    """
+    A source record parsed once into typed values
+
+    Filtering and persistence both read these, so sale_date is parsed and
+    price coerced a single time per row instead of once per stage.
+    """
+    company: Optional[str]
+    car_model: Optional[str]
+    sale_date: Optional[datetime]
+    price: float
+    year: Optional[int]
+    month: Optional[int]
+
+
+_new_record = tuple.__new__
+
+
+def make_record(company, car_model, sale_date, price):
+    """
+    Build a SaleRecord from already-extracted raw values
+
+    Args:
+        company (str): Company name
+        car_model (str): Model name
+        sale_date (datetime): Parsed sale date, or None when the source has none
+        price: Raw price value (string or number); missing prices count as 0
+
+    Returns:
+        SaleRecord: The typed record, or None if the price is not a number
+    """
+    try:
+        price = float(price)
+    except (ValueError, TypeError):
+        logger.warning(f"Skipping record with invalid price: {price!r}")
+        return None
+
+    # tuple.__new__ skips the NamedTuple constructor's keyword handling,
+    # which is measurable at millions of rows
+    if sale_date is None:
+        return _new_record(SaleRecord, (company, car_model, None, price, None, None))
+    return _new_record(SaleRecord, (company, car_model, sale_date, price, sale_date.year, sale_date.month))
+
+
+class RecordFilter:
+    """
+    Task filters compiled once per fetch
+
+    Company and model filters are sets so membership is O(1), and they can be
+    checked on raw values before a sale date is ever parsed.
+
+    Args:
+        filters (dict): Filters to apply to the data
+            - start_date (str): Start date in ISO format
+            - end_date (str): End date in ISO format
+            - companies (list): List of companies to include
+            - models (list): List of car models to include
+    """
+    def __init__(self, filters):
+        start_date = filters.get('start_date')
+        end_date = filters.get('end_date')
+        self.start_date = datetime.fromisoformat(start_date) if start_date else None
+        self.end_date = datetime.fromisoformat(end_date) if end_date else None
+        self.companies = set(filters.get('companies') or []) or None
+        self.models = set(filters.get('models') or []) or None
+
+    def matches_labels(self, company, car_model):
+        if self.companies is not None and company not in self.companies:
+            return False
+        if self.models is not None and car_model not in self.models:
+            return False
+        return True
+
+    def matches_date(self, sale_date):
+        if self.start_date and (not sale_date or sale_date < self.start_date):
+            return False
+        if self.end_date and (not sale_date or sale_date > self.end_date):
+            return False
+        return True
+
+
+def normalize_records(data, filters, date_parser):
+    """
+    Filter raw dict records and turn the survivors into SaleRecords
+
+    Args:
+        data: Iterable of raw dict records
+        filters (dict): Task filters, see RecordFilter
+        date_parser (DateParser): Parser for the fetch; records whose
+            sale_date cannot be parsed are dropped
+
+    Yields:
+        SaleRecord: Matching records
+    """
+    record_filter = RecordFilter(filters)
+    parse_fallback = date_parser.fallback
+
+    for record in data:
+        company = record.get('company')
+        car_model = record.get('car_model')
+        if not record_filter.matches_labels(company, car_model):
+            continue
+
+        sale_date = None
+        if 'sale_date' in record:
+            # DateParser inlined, as this runs once per record
+            try:
+                sale_date = fromisoformat(record['sale_date'])
+            except (ValueError, TypeError):
+                sale_date = parse_fallback(record['sale_date'])
+                if sale_date is None:
+                    continue
+
+        if not record_filter.matches_date(sale_date):
+            continue
+
+        normalized = make_record(company, car_model, sale_date, record.get('price', 0))
+        if normalized is not None:
+            yield normalized
+
+
+def sales_rows(records, task_id, source):
+    """Map SaleRecords to sales_data rows for save_rows"""
+    for company, car_model, sale_date, price, year, month in records:
+        yield {
+            'task_id': task_id,
+            'source': source,
+            'company': company,
+            'car_model': car_model,
+            'sale_date': sale_date,
+            'price': price,
+            'year': year,
+            'month': month
+        }
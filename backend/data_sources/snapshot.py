@@ -0,0 +1,410 @@
+import os
+import sys
+import hashlib
+import logging
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import accumulate, chain
+from data_sources.records import RecordFilter, SaleRecord
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Memory budget for all cached snapshots in this process
+DEFAULT_CACHE_BYTES = int(os.environ.get('SNAPSHOT_CACHE_MB', '256')) * 1024 * 1024
+
+_new_record = tuple.__new__
+
+
+def file_version(path, hash_content=False):
+    """
+    Identify the current version of a source file
+
+    Args:
+        path (str): Path of the source file
+        hash_content (bool): Also hash the file contents, for filesystems
+            where mtime is unreliable
+
+    Returns:
+        tuple: (absolute path, mtime in ns, size[, sha1 hex digest])
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (path, stat.st_mtime_ns, stat.st_size)
+    if hash_content:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        version += (digest.hexdigest(),)
+    return version
+
+
+class _Dictionary:
+    """Assigns dense integer codes to values in order of first appearance"""
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _postings(codes, size):
+    """Inverted index: ascending row ids for each code"""
+    rows = [array('I') for _ in range(size)]
+    appends = [posting.append for posting in rows]
+    for row, code in enumerate(codes):
+        appends[code](row)
+    return rows
+
+
+def _slice_postings(postings, allowed, row_low, row_high):
+    """Parts of the allowed codes' posting lists inside [row_low, row_high)"""
+    parts = []
+    for code in allowed:
+        posting = postings[code]
+        start = bisect_left(posting, row_low)
+        end = bisect_left(posting, row_high, start)
+        if start < end:
+            parts.append(posting[start:end])
+    return parts
+
+
+class SourceSnapshot:
+    """
+    Columnar, dictionary-encoded copy of a normalized source file
+
+    company and car_model are stored as integer codes into lists of distinct
+    values; price is a float array. Rows are sorted by sale_date (stable, so
+    file order is kept within a day) with records lacking a sale date last,
+    and date_offsets[code] is the first row of the code-th distinct date. A
+    date-range filter is then two bisects over the distinct dates, and only
+    the rows inside that slice are looked at: O(log D + k) instead of O(N).
+
+    company_rows and model_rows are inverted indexes: for each company or
+    model code, the ascending row ids holding it. Because rows are date
+    sorted, the part of a posting list inside a date range is again found
+    by bisect.
+
+    Build one with from_records, then answer each task with select.
+    """
+    engine = 'python'
+
+    def __init__(self, companies, models, dates, date_offsets, company_codes, model_codes, prices):
+        self.companies = companies
+        self.models = models
+        self.dates = dates
+        self.date_offsets = date_offsets
+        self.company_codes = company_codes
+        self.model_codes = model_codes
+        self.prices = prices
+        self.company_rows = _postings(company_codes, len(companies))
+        self.model_rows = _postings(model_codes, len(models))
+        self._company_lookup = {value: code for code, value in enumerate(companies)}
+        self._model_lookup = {value: code for code, value in enumerate(models)}
+        # (sale_date, year, month) per date code, including the missing-date code
+        self._date_parts = [(d, d.year, d.month) for d in dates] + [(None, None, None)]
+        self.nbytes = self._estimate_nbytes()
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a snapshot from unfiltered SaleRecords
+
+        Args:
+            records: Iterable of SaleRecords, e.g. a source's normalized rows
+
+        Returns:
+            SourceSnapshot: The encoded columns, sorted by sale date
+        """
+        companies = _Dictionary()
+        models = _Dictionary()
+        dates = _Dictionary()
+        company_codes = array('I')
+        model_codes = array('I')
+        date_codes = array('I')
+        prices = array('d')
+
+        for company, car_model, sale_date, price, _, _ in records:
+            company_codes.append(companies.encode(company))
+            model_codes.append(models.encode(car_model))
+            date_codes.append(dates.encode(sale_date))
+            prices.append(price)
+
+        # Re-encode dates in sorted order, with the missing date last
+        date_values = sorted(value for value in dates.values if value is not None)
+        remap = array('I', bytes(4 * len(dates.values)))
+        for new_code, value in enumerate(date_values + [None]):
+            if value in dates.codes:
+                remap[dates.codes[value]] = new_code
+        date_codes = array('I', (remap[code] for code in date_codes))
+
+        # Counting sort by date code: offsets are the start row of each code
+        counts = [0] * (len(date_values) + 2)
+        for code in date_codes:
+            counts[code + 1] += 1
+        date_offsets = array('I', accumulate(counts))
+        positions = list(date_offsets)
+        order = array('I', bytes(4 * len(date_codes)))
+        for row, code in enumerate(date_codes):
+            order[positions[code]] = row
+            positions[code] += 1
+
+        return cls(companies.values, models.values, date_values, date_offsets,
+                   array('I', (company_codes[row] for row in order)),
+                   array('I', (model_codes[row] for row in order)),
+                   array('d', (prices[row] for row in order)))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def _estimate_nbytes(self):
+        """Approximate memory held by the snapshot"""
+        columns = sum(len(column) * column.itemsize for column in
+                      (self.date_offsets, self.company_codes, self.model_codes, self.prices))
+        # Each row appears once in each inverted index
+        columns += 2 * len(self.prices) * 4
+        values = sum(sys.getsizeof(v) for v in self.companies) + sum(sys.getsizeof(v) for v in self.models)
+        # datetime objects plus the lookup dicts and date tuples built around them
+        per_value = 48 + 72 + 100
+        return columns + values + per_value * (len(self.companies) + len(self.models) + len(self.dates))
+
+    def select(self, filters):
+        """
+        Apply task filters to the snapshot
+
+        With no company/model filter the rows of the date range are scanned.
+        Otherwise the index of the more selective filter, cut down to the
+        date range, supplies the candidate rows, and the other filter is
+        checked against its code column, which is the same as intersecting
+        the two row sets without materializing the larger one.
+
+        Args:
+            filters (dict): Same filters as the sources' get_data
+
+        Yields:
+            SaleRecord: Matching records, ordered by sale date
+        """
+        record_filter = RecordFilter(filters)
+        company_allowed = self._allowed_codes(record_filter.companies, self._company_lookup)
+        model_allowed = self._allowed_codes(record_filter.models, self._model_lookup)
+        low, high = self._date_code_range(record_filter)
+        if low == high:
+            return
+
+        companies = self.companies
+        models = self.models
+        company_codes = self.company_codes
+        model_codes = self.model_codes
+        prices = self.prices
+        offsets = self.date_offsets
+        date_parts = self._date_parts
+
+        if company_allowed is None and model_allowed is None:
+            for date_code in range(low, high):
+                sale_date, year, month = date_parts[date_code]
+                for row in range(offsets[date_code], offsets[date_code + 1]):
+                    yield _new_record(SaleRecord, (companies[company_codes[row]], models[model_codes[row]],
+                                                   sale_date, prices[row], year, month))
+            return
+
+        date_code = low
+        next_offset = offsets[low + 1]
+        sale_date, year, month = date_parts[low]
+        for row in self._candidate_rows(company_allowed, model_allowed, offsets[low], offsets[high]):
+            if row >= next_offset:
+                # Candidates ascend, so the date code only moves forward
+                while row >= next_offset:
+                    date_code += 1
+                    next_offset = offsets[date_code + 1]
+                sale_date, year, month = date_parts[date_code]
+            company_code = company_codes[row]
+            if company_allowed is not None and company_code not in company_allowed:
+                continue
+            model_code = model_codes[row]
+            if model_allowed is not None and model_code not in model_allowed:
+                continue
+            yield _new_record(SaleRecord, (companies[company_code], models[model_code],
+                                           sale_date, prices[row], year, month))
+
+    def count(self, filters):
+        """
+        Number of records select would yield, without building them
+
+        Args:
+            filters (dict): Same filters as the sources' get_data
+
+        Returns:
+            int: Matching records
+        """
+        record_filter = RecordFilter(filters)
+        company_allowed = self._allowed_codes(record_filter.companies, self._company_lookup)
+        model_allowed = self._allowed_codes(record_filter.models, self._model_lookup)
+        low, high = self._date_code_range(record_filter)
+        if low == high:
+            return 0
+        row_low, row_high = self.date_offsets[low], self.date_offsets[high]
+        if company_allowed is None and model_allowed is None:
+            return row_high - row_low
+        if model_allowed is None:
+            return sum(len(part) for part in _slice_postings(self.company_rows, company_allowed, row_low, row_high))
+        if company_allowed is None:
+            return sum(len(part) for part in _slice_postings(self.model_rows, model_allowed, row_low, row_high))
+        company_codes = self.company_codes
+        model_codes = self.model_codes
+        rows = self._candidate_rows(company_allowed, model_allowed, row_low, row_high)
+        return sum(1 for row in rows if company_codes[row] in company_allowed and model_codes[row] in model_allowed)
+
+    def _candidate_rows(self, company_allowed, model_allowed, row_low, row_high):
+        """Ascending rows in [row_low, row_high) from the smallest matching index"""
+        options = []
+        if company_allowed is not None:
+            options.append(_slice_postings(self.company_rows, company_allowed, row_low, row_high))
+        if model_allowed is not None:
+            options.append(_slice_postings(self.model_rows, model_allowed, row_low, row_high))
+        slices = min(options, key=lambda parts: sum(len(part) for part in parts))
+        if len(slices) == 1:
+            return slices[0]
+        return sorted(chain.from_iterable(slices))
+
+    def row_range(self, filters):
+        """
+        Rows matching the date filters alone
+
+        Returns:
+            tuple: Half-open (first row, end row) slice of the sorted columns
+        """
+        low, high = self._date_code_range(RecordFilter(filters))
+        return self.date_offsets[low], self.date_offsets[high]
+
+    @staticmethod
+    def _allowed_codes(values, lookup):
+        if values is None:
+            return None
+        return {lookup[value] for value in values if value in lookup}
+
+    def _date_code_range(self, record_filter):
+        """Half-open range of date codes matching the date filters"""
+        if not record_filter.start_date and not record_filter.end_date:
+            # Records without a sale date only match when no date filter is set
+            return 0, len(self.dates) + 1
+        low = bisect_left(self.dates, record_filter.start_date) if record_filter.start_date else 0
+        high = bisect_right(self.dates, record_filter.end_date) if record_filter.end_date else len(self.dates)
+        return low, max(low, high)
+
+
+class SnapshotCache:
+    """
+    Process-wide LRU cache of parsed source files
+
+    Entries are keyed by file_version, so a changed file (new mtime or size,
+    or content hash when requested) is parsed again and the stale snapshot for
+    the same path is dropped. Least recently used snapshots are evicted once
+    their combined nbytes exceeds max_bytes.
+
+    Args:
+        max_bytes (int): Memory budget for all snapshots
+    """
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def cacheable(self, path):
+        """Files larger than the whole budget are streamed instead of cached"""
+        try:
+            return os.path.getsize(path) <= self.max_bytes
+        except OSError:
+            return False
+
+    def get(self, path, build, hash_content=False, engine='python'):
+        """
+        Get the snapshot for the current version of a file, building it if needed
+
+        Args:
+            path (str): Source file path
+            build (callable): Returns a snapshot of the file
+            hash_content (bool): Include a content hash in the cache key
+            engine (str): Snapshot engine build produces; each engine has its
+                own entry for the same file
+
+        Returns:
+            SourceSnapshot: The cached or freshly built snapshot
+        """
+        key = (engine, file_version(path, hash_content))
+        snapshot = self._lookup(key)
+        if snapshot is not None:
+            return snapshot
+
+        # One build per key; concurrent tasks for the same file wait for it
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            snapshot = self._lookup(key, count=False)
+            if snapshot is not None:
+                return snapshot
+
+            try:
+                snapshot = build()
+                with self._lock:
+                    self.misses += 1
+                    self._store(key, snapshot)
+            finally:
+                with self._lock:
+                    self._build_locks.pop(key, None)
+            logger.info(f"Built {engine} snapshot of {path}: {len(snapshot)} rows, {snapshot.nbytes / 1024 / 1024:.1f} MiB")
+            return snapshot
+
+    def _lookup(self, key, count=True):
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is not None:
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+            return snapshot
+
+    def _store(self, key, snapshot):
+        # Drop older versions of the same file
+        engine, (path, *_) = key
+        for stale in [k for k in self._entries if k[0] == engine and k[1][0] == path]:
+            del self._entries[stale]
+
+        if snapshot.nbytes > self.max_bytes:
+            return
+        self._entries[key] = snapshot
+        while self.nbytes > self.max_bytes:
+            evicted, _ = self._entries.popitem(last=False)
+            logger.info(f"Evicted {evicted[0]} snapshot of {evicted[1][0]}")
+
+    @property
+    def nbytes(self):
+        return sum(snapshot.nbytes for snapshot in self._entries.values())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared by every source instance in the process
+snapshot_cache = SnapshotCache()
@@ -0,0 +1,104 @@
+import os
+import sys
+import logging
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import DatabaseError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
+from models import Base
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Create and migrate the schema when the API or a worker starts. Turn off
+# where index builds on a large database should not hold up startup, and
+# run `python -m database` once per deploy instead.
+MIGRATE_ON_STARTUP = os.environ.get('MIGRATE_ON_STARTUP', 'true').lower() == 'true'
+
+def migrate_schema(engine):
+    """
+    Add columns and indexes that were added to the models after a table
+    was created
+
+    create_all only creates missing tables, so existing databases are
+    brought up to date here. Only additive changes are handled: new
+    nullable columns (added without constraints) and new indexes.
+
+    Several processes may migrate at once: indexes are created IF NOT
+    EXISTS, and a column another process added first is not an error.
+
+    Returns:
+        list: Names of the columns and indexes added
+    """
+    inspector = inspect(engine)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                except DatabaseError:
+                    # Lost the race to another process adding the same column
+                    if column.name not in {c['name'] for c in inspect(engine).get_columns(table.name)}:
+                        raise
+                    continue
+                added.append(f"{table.name}.{column.name}")
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                with engine.begin() as connection:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+                added.append(index.name)
+    if added:
+        logger.info(f"Migrated database schema: added {', '.join(added)}")
+    return added
+
+def init_db(engine):
+    """
+    Create missing tables and migrate existing ones
+
+    Returns:
+        list: Names of the columns and indexes added
+    """
+    for table in Base.metadata.sorted_tables:
+        try:
+            table.create(engine, checkfirst=True)
+        except DatabaseError:
+            # Another process created it between the check and the CREATE
+            if not inspect(engine).has_table(table.name):
+                raise
+    return migrate_schema(engine)
+
+# Set up database, shared by the API and standalone queue workers
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///sales_data.db')
+engine = create_engine(DATABASE_URL)
+
+# Create session factory
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Dependency to get DB session
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency to get the session factory, for work that outlives the request
+# such as a streaming response
+def get_session_factory():
+    return SessionLocal
+
+def main():
+    """Create and migrate the schema of DATABASE_URL: python -m database"""
+    added = init_db(engine)
+    logger.info(f"Schema of {DATABASE_URL} is up to date ({len(added)} columns and indexes added)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
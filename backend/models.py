@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import enum
@@ -17,12 +17,23 @@ class Task(Base):
     
     id = Column(Integer, primary_key=True)
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Indexed for the newest-first task list
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Filters and parameters for the data sources
     parameters = Column(JSON)
     
+    # Canonical hash of parameters; identical tasks share one execution
+    params_hash = Column(String(64), index=True)
+    # Task whose sales_data rows hold this task's result, if not its own
+    result_task_id = Column(Integer, ForeignKey('tasks.id'), nullable=True)
+    # Fingerprint of the source files the result was fetched from
+    source_version = Column(String(64))
+    # Rows committed per source key, updated with every committed chunk so
+    # a failed task can resume where it stopped
+    checkpoint = Column(JSON)
+    
     # Relationships
     sales_data = relationship("SalesData", back_populates="task")
     
@@ -32,20 +43,38 @@ class Task(Base):
             "status": self.status.value,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-            "parameters": self.parameters
+            "parameters": self.parameters,
+            "result_task_id": self.result_task_id
         }
 
 
+class TaskSummary(Base):
+    __tablename__ = 'task_summaries'
+    
+    # Aggregates of a completed task's sales_data, stored once at completion
+    task_id = Column(Integer, ForeignKey('tasks.id'), primary_key=True)
+    summary = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class SalesData(Base):
     __tablename__ = 'sales_data'
+    __table_args__ = (
+        # A task's rows in id order, for keyset pages of task data
+        Index('ix_sales_data_task_id_id', 'task_id', 'id'),
+        # A task's rows by company and by month
+        Index('ix_sales_data_task_id_company', 'task_id', 'company'),
+        Index('ix_sales_data_task_id_year_month', 'task_id', 'year', 'month'),
+    )
     
     id = Column(Integer, primary_key=True)
     task_id = Column(Integer, ForeignKey('tasks.id'))
     source = Column(String)  # 'source_a' or 'source_b'
     
     # Common fields from both sources
-    company = Column(String)
-    car_model = Column(String)
+    # Indexed for the distinct company and model lists
+    company = Column(String, index=True)
+    car_model = Column(String, index=True)
     sale_date = Column(DateTime)
     price = Column(Float)
     
@@ -1,29 +1,168 @@
+import os
 import threading
 import time
 import logging
 import json
+import queue
 import traceback
+import multiprocessing
 import redis
-from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
 from models import Task, TaskStatus, SalesData
 from data_sources.json_source import JSONDataSource
 from data_sources.csv_source import CSVDataSource
 from data_sources.api_source import APIDataSource
+from data_sources.ingest import DEFAULT_BATCH_SIZE
+from stream_queue import DEFAULT_CLAIM_IDLE_MS, RedisStreamQueue, consumer_name
+from scheduling import DEFAULT_USER, FairQueue, RedisFairQueue, lane_for
+from task_dedup import settle_followers, source_version
+from task_progress import TaskProgress, parse_progress
+from task_summary import store_summary
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Maximum number of tasks fetching from each source at the same time
+DEFAULT_SOURCE_CONCURRENCY = {
+    'source_a': 4,
+    'source_b': 4,
+    'source_c': 2,
+}
+
+# Fetched chunks waiting to be saved, across all sources of one task
+FETCH_QUEUE_SIZE = 8
+
+# Marks the end of a source's chunk stream
+_SOURCE_DONE = object()
+
+# How tasks run: on the worker threads themselves, or handed to a pool of
+# processes so CPU-bound parsing is not serialized by the GIL
+WORKER_MODES = ('thread', 'process')
+
+# Redis queue implementations: RPUSH/BLPOP on a list, or a stream read
+# through a consumer group with acknowledgements and reclaim
+QUEUE_BACKENDS = ('list', 'stream')
+
+# Task totals kept as counters, and the most recently queued task ids in a
+# sorted set capped at RECENT_TASKS_LIMIT, so queue stats never scan all tasks
+TASK_COUNT_KEY = "stats:tasks_total"
+FAILED_COUNT_KEY = "stats:tasks_failed"
+RECENT_TASKS_KEY = "recent_tasks"
+RECENT_TASKS_LIMIT = 100
+
+# task:{id} hashes expire this long after their last status change
+DEFAULT_TASK_TTL = 7 * 24 * 3600
+
+# QueueManager owned by each process of the process pool
+_process_manager = None
+
+def _init_process_worker(database_url, options, task_progress=None):
+    """
+    Give a pool process its own engine, sessions and Redis connection
+
+    Without Redis, task_progress is the parent's shared progress dict, so
+    progress written here can be read by the API.
+    """
+    global _process_manager
+    engine = create_engine(database_url)
+    _process_manager = QueueManager(sessionmaker(autocommit=False, autoflush=False, bind=engine), **options)
+    if task_progress is not None:
+        _process_manager.task_progress = task_progress
+
+def _process_task_in_worker(task_id):
+    return _process_manager._process_task(task_id)
+
+def create_sources():
+    """Data sources a task fetches from, by parameters key"""
+    return {
+        'source_a': JSONDataSource(),
+        'source_b': CSVDataSource(),
+        'source_c': APIDataSource(),
+    }
+
+def create_queue_manager(db_session_factory, database_url=None, **overrides):
+    """
+    Build a QueueManager from environment configuration
+    
+    Used by both the API process and standalone workers so they agree on
+    the queue settings.
+    
+    Args:
+        db_session_factory: SQLAlchemy session factory
+        database_url (str): Database URL for process-mode workers
+        **overrides: QueueManager arguments taking precedence over the environment
+        
+    Returns:
+        QueueManager: Configured, not yet started
+    """
+    options = {
+        "use_redis": os.environ.get('REDIS_ENABLED', 'true').lower() == 'true',
+        "redis_url": os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+        # Ingestion configuration: Core executemany batches vs. ORM objects
+        "bulk_insert": os.environ.get('BULK_INSERT', 'true').lower() == 'true',
+        "batch_size": int(os.environ.get('INGEST_BATCH_SIZE', str(DEFAULT_BATCH_SIZE))),
+        # Tasks processed concurrently, on threads or a process pool
+        "workers": int(os.environ.get('QUEUE_WORKERS', '1')),
+        "worker_mode": os.environ.get('QUEUE_WORKER_MODE', 'thread').lower(),
+        "queue_backend": os.environ.get('QUEUE_BACKEND', 'list').lower(),
+        "claim_idle_ms": int(os.environ.get('STREAM_CLAIM_IDLE_MS', str(DEFAULT_CLAIM_IDLE_MS))),
+        "task_ttl": int(os.environ.get('REDIS_TASK_TTL', str(DEFAULT_TASK_TTL))),
+        # Commit each chunk with the task checkpoint, or each task at once
+        "chunk_commits": os.environ.get('TASK_CHUNK_COMMITS', 'true').lower() == 'true',
+    }
+    options.update(overrides)
+    return QueueManager(db_session_factory, database_url=database_url, **options)
+
 class QueueManager:
-    def __init__(self, db_session_factory, use_redis=True, redis_url="redis://localhost:6379/0"):
+    def __init__(self, db_session_factory, use_redis=True, redis_url="redis://localhost:6379/0",
+                 bulk_insert=True, batch_size=DEFAULT_BATCH_SIZE, source_concurrency=None,
+                 workers=1, worker_mode='thread', database_url=None, queue_backend='list',
+                 claim_idle_ms=DEFAULT_CLAIM_IDLE_MS, task_ttl=DEFAULT_TASK_TTL, chunk_commits=True):
         self.db_session_factory = db_session_factory
-        self.worker_thread = None
+        self.worker_threads = []
         self.running = False
         
+        # Tasks processed at the same time, each by its own worker thread
+        if worker_mode not in WORKER_MODES:
+            raise ValueError(f"Unknown worker mode: {worker_mode}")
+        self.workers = max(1, workers)
+        self.worker_mode = worker_mode
+        self.database_url = database_url
+        self.source_concurrency = source_concurrency
+        self.process_pool = None
+        self.worker_stats = {}
+        self._stats_lock = threading.Lock()
+        
+        if queue_backend not in QUEUE_BACKENDS:
+            raise ValueError(f"Unknown queue backend: {queue_backend}")
+        self.queue_backend = queue_backend
+        self.stream_queue = None
+        self.fair_queue = None
+        
+        # Ingestion configuration: Core executemany batches vs. ORM objects
+        self.bulk_insert = bulk_insert
+        self.batch_size = batch_size
+        self.chunk_commits = chunk_commits
+        
+        # Progress of running tasks when there is no Redis to keep it in;
+        # entries are dropped when their task finishes. In process mode this
+        # becomes a dict shared with the pool processes.
+        self.task_progress = {}
+        self._progress_sync = None
+        
+        # Per-source limits shared by every task this manager processes
+        limits = dict(DEFAULT_SOURCE_CONCURRENCY, **(source_concurrency or {}))
+        self.source_limits = {source: threading.BoundedSemaphore(limit) for source, limit in limits.items()}
+        
         # Redis configuration
         self.use_redis = use_redis
         self.redis_url = redis_url
         self.redis_client = None
+        self.task_ttl = task_ttl
         
         if self.use_redis:
             try:
@@ -31,6 +170,13 @@ class QueueManager:
                 # Test connection
                 self.redis_client.ping()
                 logger.info(f"Successfully connected to Redis at {self.redis_url}")
+                if queue_backend == 'stream':
+                    self.stream_queue = RedisStreamQueue(self.redis_client, claim_idle_ms=claim_idle_ms)
+                    logger.warning("QUEUE_BACKEND=stream: tasks run in arrival order, without priority "
+                                   "lanes or per-user fairness")
+                else:
+                    self.fair_queue = RedisFairQueue(self.redis_client)
+                self._migrate_task_sets()
             except Exception as e:
                 logger.error(f"Failed to connect to Redis at {self.redis_url}: {str(e)}")
                 logger.error(f"Falling back to in-memory queue.")
@@ -38,8 +184,7 @@ class QueueManager:
         
         # Fall back to in-memory queue if Redis is not available
         if not self.use_redis:
-            import queue
-            self.queue = queue.Queue()
+            self.queue = FairQueue()
             logger.info("Using in-memory queue")
         
     def start(self):
@@ -47,65 +192,112 @@ class QueueManager:
             return
             
         self.running = True
-        self.worker_thread = threading.Thread(target=self._process_queue)
-        self.worker_thread.daemon = True
-        self.worker_thread.start()
-        logger.info("Queue manager started")
+        if self.worker_mode == 'process':
+            if not self.use_redis:
+                self._progress_sync = multiprocessing.get_context('spawn').Manager()
+                self.task_progress = self._progress_sync.dict()
+            self.process_pool = self._create_process_pool()
+        
+        self.worker_stats = {}
+        self.worker_threads = []
+        for index in range(self.workers):
+            worker_id = f"worker-{index}"
+            self.worker_stats[worker_id] = self._new_worker_stats(worker_id)
+            worker_thread = threading.Thread(target=self._process_queue, args=(worker_id,), name=f"queue-{worker_id}")
+            worker_thread.daemon = True
+            worker_thread.start()
+            self.worker_threads.append(worker_thread)
+        logger.info(f"Queue manager started with {self.workers} {self.worker_mode} worker(s)")
         
     def stop(self):
         self.running = False
-        if self.worker_thread:
-            self.worker_thread.join(timeout=5)
+        for worker_thread in self.worker_threads:
+            worker_thread.join(timeout=5)
+        if self.process_pool:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
+        if self._progress_sync:
+            self._progress_sync.shutdown()
+            self._progress_sync = None
+            self.task_progress = {}
         logger.info("Queue manager stopped")
         
-    def add_task(self, task_id):
+    def _create_process_pool(self):
+        """
+        Start the process pool that runs tasks in process mode
+        
+        Each process builds its own engine and Redis client from URLs; per
+        source concurrency limits therefore apply per process.
+        """
+        database_url = self.database_url
+        if database_url is None:
+            database_url = self.db_session_factory.kw['bind'].url.render_as_string(hide_password=False)
+        options = {
+            "use_redis": self.use_redis,
+            "redis_url": self.redis_url,
+            "bulk_insert": self.bulk_insert,
+            "batch_size": self.batch_size,
+            "chunk_commits": self.chunk_commits,
+            "source_concurrency": self.source_concurrency,
+            "queue_backend": self.queue_backend,
+        }
+        task_progress = self.task_progress if self._progress_sync else None
+        # spawn rather than fork: the parent already runs threads
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_process_worker, initargs=(database_url, options, task_progress))
+        
+    def add_task(self, task_id, parameters=None, user=None):
+        """
+        Queue a task
+        
+        Tasks are queued in a lane picked from their estimated cost, so small
+        lookups are not stuck behind bulk tasks, and users take turns within
+        a lane (see scheduling). The stream backend keeps a single FIFO.
+        
+        Args:
+            task_id (int): Task id
+            parameters (dict): Task parameters the cost is estimated from;
+                unknown parameters use the standard lane
+            user (str): User the task is shared fairly for
+        """
+        lane, cost = lane_for(parameters)
+        user = user or DEFAULT_USER
         if self.use_redis:
             try:
-                # Add task to Redis list
-                self.redis_client.rpush("task_queue", task_id)
-                # Store initial task metadata
-                self.redis_client.hset(f"task:{task_id}", "status", "queued")
-                self.redis_client.hset(f"task:{task_id}", "queued_at", datetime.utcnow().isoformat())
-                # Add to the set of all tasks
-                self.redis_client.sadd("all_tasks", task_id)
-                logger.info(f"Task {task_id} added to Redis queue")
+                self._redis_enqueue(task_id, lane, user, cost)
+                logger.info(f"Task {task_id} added to Redis queue ({lane} lane)")
             except Exception as e:
                 logger.error(f"Error adding task to Redis queue: {str(e)}")
                 logger.error(f"Falling back to in-memory queue for this task")
                 if not hasattr(self, 'queue'):
-                    import queue
-                    self.queue = queue.Queue()
-                self.queue.put(task_id)
+                    self.queue = FairQueue()
+                self.queue.put(task_id, lane, user)
         else:
             # Fallback to in-memory queue
-            self.queue.put(task_id)
-            logger.info(f"Task {task_id} added to in-memory queue")
+            self.queue.put(task_id, lane, user)
+            logger.info(f"Task {task_id} added to in-memory queue ({lane} lane)")
         
-    def _process_queue(self):
+    def _process_queue(self, worker_id="worker-0"):
+        consumer = consumer_name(worker_id)
         while self.running:
             try:
-                if self.use_redis:
-                    # Pop task from Redis list with a blocking timeout
-                    result = self.redis_client.blpop("task_queue", timeout=1)
-                    if result:
-                        _, task_id_bytes = result
-                        task_id = int(task_id_bytes.decode('utf-8'))
-                        # Update task status in Redis
-                        self.redis_client.hset(f"task:{task_id}", "status", "processing")
-                        self.redis_client.hset(f"task:{task_id}", "started_at", datetime.utcnow().isoformat())
-                        
-                        # Process the task
-                        self._process_task(task_id)
-                        
-                        # Mark as done in Redis
-                        self.redis_client.hset(f"task:{task_id}", "status", "completed")
-                        self.redis_client.hset(f"task:{task_id}", "completed_at", datetime.utcnow().isoformat())
+                if self.use_redis and self.stream_queue:
+                    entry = self.stream_queue.read(consumer)
+                    if entry:
+                        task_id = entry.task_id
+                        self._process_stream_entry(worker_id, consumer, entry)
+                elif self.use_redis:
+                    # Pop the next task, already marked processing
+                    task_id = self._redis_claim(timeout=1)
+                    if task_id is not None:
+                        records = self._run_task(worker_id, task_id)
+                        self._redis_complete(task_id, records)
                     # No else block needed - if no result, we'll just loop back and wait again
                 else:
                     try:
                         # Use in-memory queue with timeout
                         task_id = self.queue.get(block=True, timeout=1)
-                        self._process_task(task_id)
+                        self._run_task(worker_id, task_id)
                         self.queue.task_done()
                     except Exception as e:
                         # This is likely just a queue.Empty exception which is expected 
@@ -123,15 +315,217 @@ class QueueManager:
                 if self.use_redis and 'task_id' in locals():
                     try:
                         # Track failed tasks in Redis
-                        self.redis_client.hset(f"task:{task_id}", "status", "failed")
-                        self.redis_client.hset(f"task:{task_id}", "error", str(e))
-                        self.redis_client.hset(f"task:{task_id}", "failed_at", datetime.utcnow().isoformat())
-                        self.redis_client.sadd("failed_tasks", task_id)
+                        self._redis_fail(task_id, str(e))
                     except Exception as redis_e:
                         logger.error(f"Failed to record task failure in Redis: {str(redis_e)}")
                 
                 time.sleep(1)  # Prevent tight loop in case of persistent errors
                 
+    def _process_stream_entry(self, worker_id, consumer, entry):
+        """
+        Run the task of a stream entry and acknowledge it
+        
+        The entry is acknowledged whether the task succeeds or fails, as
+        failed tasks are not retried; only entries of consumers that died
+        before acknowledging are delivered again.
+        """
+        task_id = entry.task_id
+        if entry.deliveries > self.stream_queue.max_deliveries:
+            reason = f"abandoned after {entry.deliveries} deliveries"
+            logger.error(f"Task {task_id} {reason}, moving it to the dead-letter stream")
+            self.stream_queue.dead_letter(entry, reason)
+            self._fail_task(task_id, reason)
+            return
+        
+        # Update task status in Redis. Unlike the list backend's claim
+        # script this is a second round trip after XREADGROUP: the task id
+        # is only known once the read returns, and the first hold/metrics
+        # write comes when the task is done (see bench_redis_roundtrips)
+        self.redis_client.hset(f"task:{task_id}", mapping={
+            "status": "processing",
+            "started_at": datetime.utcnow().isoformat(),
+        })
+        
+        start = time.perf_counter()
+        try:
+            with self.stream_queue.hold(consumer, entry):
+                records = self._run_task(worker_id, task_id)
+        except Exception:
+            pipe = self.redis_client.pipeline()
+            self.stream_queue.ack(entry, pipe)
+            self.stream_queue.record(consumer, time.perf_counter() - start, failed=True, pipe=pipe)
+            pipe.execute()
+            raise
+        
+        # Acknowledge, count and mark as done in one round trip
+        pipe = self.redis_client.pipeline()
+        self.stream_queue.ack(entry, pipe)
+        self.stream_queue.record(consumer, time.perf_counter() - start, pipe=pipe)
+        self._redis_complete(task_id, records, pipe)
+        
+    def _fail_task(self, task_id, reason):
+        """Mark a task FAILED without processing it"""
+        db = self.db_session_factory()
+        try:
+            task = db.query(Task).filter(Task.id == task_id).first()
+            if task:
+                task.status = TaskStatus.FAILED
+                settle_followers(db, task)
+                db.commit()
+        finally:
+            db.close()
+        if self.use_redis:
+            self._redis_fail(task_id, reason)
+        
+    def _redis_enqueue(self, task_id, lane='standard', user=DEFAULT_USER, cost=None):
+        """Queue a task and store its metadata in one MULTI/EXEC round trip"""
+        pipe = self.redis_client.pipeline()
+        if self.stream_queue:
+            # Add task to the Redis stream read by the consumer group
+            self.stream_queue.add(task_id, pipe)
+        else:
+            # Add task to its lane, behind the user's earlier tasks
+            self.fair_queue.add(task_id, lane, user, pipe)
+        # Store initial task metadata
+        metadata = {
+            "status": "queued",
+            "queued_at": datetime.utcnow().isoformat(),
+            "lane": lane,
+            "user": user,
+        }
+        if cost is not None:
+            metadata["cost"] = round(cost, 4)
+        pipe.hset(f"task:{task_id}", mapping=metadata)
+        pipe.expire(f"task:{task_id}", self.task_ttl)
+        # Count the task and keep it among the most recent ones
+        pipe.incr(TASK_COUNT_KEY)
+        pipe.zadd(RECENT_TASKS_KEY, {task_id: time.time()})
+        pipe.zremrangebyrank(RECENT_TASKS_KEY, 0, -RECENT_TASKS_LIMIT - 1)
+        pipe.execute()
+        
+    def _redis_claim(self, timeout=1):
+        """
+        Take the next task from the Redis lanes and mark it processing
+        
+        A non-empty queue is served by a single claim script call (see
+        RedisFairQueue.claim); an idle worker blocks until a task is queued.
+        
+        Returns:
+            int: Task id, or None if nothing arrived within timeout seconds
+        """
+        claimed = self.fair_queue.claim(timeout)
+        return claimed[0] if claimed else None
+        
+    def _redis_complete(self, task_id, records, pipe=None):
+        """
+        Mark a task completed with its progress and timestamp
+        
+        Args:
+            task_id (int): Task id
+            records (int): Rows saved for the task
+            pipe: Pipeline to add the commands to before executing it
+        """
+        pipe = pipe if pipe is not None else self.redis_client.pipeline()
+        fields = {
+            "status": "completed",
+            "completed_at": datetime.utcnow().isoformat(),
+            "progress": 100,
+        }
+        if records is not None:
+            fields["records_processed"] = records
+        pipe.hset(f"task:{task_id}", mapping=fields)
+        pipe.expire(f"task:{task_id}", self.task_ttl)
+        pipe.execute()
+        
+    def _redis_fail(self, task_id, error):
+        """Mark a task failed with its error in one MULTI/EXEC round trip"""
+        now = datetime.utcnow().isoformat()
+        pipe = self.redis_client.pipeline()
+        pipe.hset(f"task:{task_id}", mapping={
+            "status": "failed",
+            "error": error,
+            "error_details": error,
+            "error_time": now,
+            "failed_at": now,
+        })
+        pipe.expire(f"task:{task_id}", self.task_ttl)
+        pipe.incr(FAILED_COUNT_KEY)
+        pipe.execute()
+        
+    def _migrate_task_sets(self):
+        """
+        Replace the unbounded all_tasks / failed_tasks sets of older versions
+        
+        Their sizes seed the counters if those do not exist yet; the sets
+        themselves are unlinked so Redis frees them in the background.
+        """
+        if not self.redis_client.exists("all_tasks", "failed_tasks"):
+            return
+        pipe = self.redis_client.pipeline()
+        pipe.scard("all_tasks")
+        pipe.scard("failed_tasks")
+        total, failed = pipe.execute()
+        pipe = self.redis_client.pipeline()
+        pipe.setnx(TASK_COUNT_KEY, total)
+        pipe.setnx(FAILED_COUNT_KEY, failed)
+        pipe.unlink("all_tasks", "failed_tasks")
+        pipe.execute()
+        logger.info(f"Migrated task sets to counters ({total} tasks, {failed} failed)")
+        
+    def _new_worker_stats(self, worker_id):
+        return {
+            "worker_id": worker_id,
+            "mode": self.worker_mode,
+            "state": "idle",
+            "current_task": None,
+            "last_task": None,
+            "tasks_completed": 0,
+            "tasks_failed": 0,
+            "busy_seconds": 0.0,
+        }
+        
+    def _run_task(self, worker_id, task_id):
+        """
+        Process one task on behalf of a worker, in this thread or in the
+        process pool, and keep that worker's stats
+        """
+        with self._stats_lock:
+            stats = self.worker_stats.setdefault(worker_id, self._new_worker_stats(worker_id))
+            stats["state"] = "busy"
+            stats["current_task"] = task_id
+        start = time.perf_counter()
+        pool = self.process_pool
+        try:
+            if pool:
+                records = pool.submit(_process_task_in_worker, task_id).result()
+            else:
+                records = self._process_task(task_id)
+        except BrokenProcessPool:
+            # A pool process died (e.g. killed for memory); replace the pool.
+            # Every worker using it sees the breakage, only the first
+            # replaces it
+            with self._stats_lock:
+                stats["tasks_failed"] += 1
+                if self.running and self.process_pool is pool:
+                    logger.error("Process pool is broken, starting a new one")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.process_pool = self._create_process_pool()
+            raise
+        except Exception:
+            with self._stats_lock:
+                stats["tasks_failed"] += 1
+            raise
+        else:
+            with self._stats_lock:
+                stats["tasks_completed"] += 1
+            return records
+        finally:
+            with self._stats_lock:
+                stats["state"] = "idle"
+                stats["current_task"] = None
+                stats["last_task"] = task_id
+                stats["busy_seconds"] += time.perf_counter() - start
+                
     def _process_task(self, task_id):
         logger.info(f"Processing task {task_id}")
         
@@ -143,38 +537,54 @@ class QueueManager:
                 logger.error(f"Task {task_id} not found")
                 return
             
-            # Update status to IN_PROGRESS
+            # A redelivered task may already be done, or half done by a
+            # worker that died; never save its rows twice
+            if task.status == TaskStatus.COMPLETED:
+                logger.info(f"Task {task_id} already completed, skipping")
+                return 0
+            if task.result_task_id:
+                logger.info(f"Task {task_id} shares the result of task {task.result_task_id}, skipping")
+                return 0
+            sources = create_sources()
+            version = source_version(sources)
+            resume = None
+            if task.status == TaskStatus.IN_PROGRESS or task.checkpoint is not None:
+                # Committed rows always match the checkpoint, so an earlier
+                # run over the same source data can be continued
+                if task.checkpoint is not None and version is not None and task.source_version == version:
+                    resume = {key: rows for key, rows in task.checkpoint.items()
+                              if getattr(sources.get(key), 'resumable', False)}
+                    # Sources without a stable order (the API) start over; rows
+                    # are saved with their source key as source
+                    refetch = [key for key in task.checkpoint if key not in resume]
+                    if refetch:
+                        deleted = db.query(SalesData).filter(SalesData.task_id == task_id,
+                                                             SalesData.source.in_(refetch)).delete()
+                        logger.info(f"Task {task_id} fetching {', '.join(refetch)} again, "
+                                    f"discarding {deleted} saved rows")
+                    logger.info(f"Task {task_id} resuming after {sum(resume.values())} saved rows")
+                else:
+                    deleted = db.query(SalesData).filter(SalesData.task_id == task_id).delete()
+                    logger.warning(f"Task {task_id} cannot be resumed, discarding {deleted} saved rows")
+            
+            # Update status to IN_PROGRESS, noting which source data is read
             task.status = TaskStatus.IN_PROGRESS
+            task.source_version = version
+            task.checkpoint = dict(resume or {})
             db.commit()
             
-            # Process data from source A (JSON)
-            json_source = JSONDataSource()
-            source_a_data = json_source.get_data(task.parameters.get('source_a', {}))
-            
-            # Process data from source B (CSV)
-            csv_source = CSVDataSource()
-            source_b_data = csv_source.get_data(task.parameters.get('source_b', {}))
-            
-            # Process data from source C (API) if provided
-            api_source = APIDataSource()
-            source_c_data = api_source.get_data(task.parameters.get('source_c', {}))
+            # Fetch all sources concurrently and save their chunks as they arrive
+            counts = self._fetch_and_save(db, task, sources, resume)
             
-            # Save data to database
-            json_source.save_data(db, task.id, source_a_data)
-            csv_source.save_data(db, task.id, source_b_data)
-            api_source.save_data(db, task.id, source_c_data)
-            
-            # Track progress in Redis if enabled
-            if self.use_redis:
-                self.redis_client.hset(f"task:{task_id}", "progress", 100)
-                self.redis_client.hset(f"task:{task_id}", "records_processed", 
-                    len(source_a_data) + len(source_b_data) + len(source_c_data))
-            
-            # Update status to COMPLETED
+            # Store the summary and update status to COMPLETED, along with
+            # identical tasks attached to it, in one transaction
+            store_summary(db, task.id)
             task.status = TaskStatus.COMPLETED
+            settle_followers(db, task)
             db.commit()
             
             logger.info(f"Task {task_id} completed successfully")
+            return sum(counts.values())
             
         except Exception as e:
             logger.error(f"Error processing task {task_id}: {str(e)}")
@@ -182,44 +592,175 @@ class QueueManager:
             
             # Update task status to FAILED
             try:
+                db.rollback()
                 task.status = TaskStatus.FAILED
+                settle_followers(db, task)
                 db.commit()
             except Exception as db_e:
                 logger.error(f"Failed to update task status: {str(db_e)}")
             
-            # Record error details in Redis if enabled
-            if self.use_redis:
-                try:
-                    self.redis_client.hset(f"task:{task_id}", "error_details", str(e))
-                    self.redis_client.hset(f"task:{task_id}", "error_time", datetime.utcnow().isoformat())
-                except Exception as redis_e:
-                    logger.error(f"Failed to record error in Redis: {str(redis_e)}")
-                
+            # Progress and error details are written to Redis by the worker
+            # loop together with the status change
             raise  # Re-raise to be caught by the outer exception handler
         finally:
             db.close()
+            if not self.use_redis:
+                self.task_progress.pop(task_id, None)
+            
+    def _fetch_and_save(self, db, task, sources, resume=None):
+        """
+        Run every source's fetch/filter stage in its own thread and pipe the
+        resulting chunks into the save stage
+        
+        Saving stays on the calling thread because the session is not thread
+        safe, so a task takes roughly as long as its slowest source instead of
+        the sum of all of them.
+        
+        With chunk_commits, every chunk is committed in one transaction with
+        the task's checkpoint; otherwise nothing is committed here and the
+        whole task lands in the caller's final commit. Row counts are
+        reported as progress either way.
+        
+        Args:
+            db: SQLAlchemy session for the task
+            task (Task): Task being processed
+            sources (dict): Source key ('source_a', ...) to data source
+            resume (dict): Rows per source key saved by an earlier run,
+                skipped rather than saved again
+            
+        Returns:
+            dict: Number of rows saved per source key, including resumed ones
+        """
+        parameters = task.parameters or {}
+        chunks = queue.Queue(maxsize=FETCH_QUEUE_SIZE)
+        cancelled = threading.Event()
+        save_options = {"bulk": self.bulk_insert, "batch_size": self.batch_size, "commit": False}
+        resume = resume or {}
+        progress = TaskProgress(task.id, sources, self._progress_writer(task.id), resume)
+        
+        def put(item):
+            # Give up once the save stage has stopped consuming
+            while not cancelled.is_set():
+                try:
+                    chunks.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def fetch(key, source):
+            try:
+                skip = resume.get(key, 0)
+                with self.source_limits.setdefault(key, threading.BoundedSemaphore(1)):
+                    for chunk in source.get_data_chunks(parameters.get(key, {})):
+                        if skip:
+                            # Rows come in the same order for the same source version
+                            skipped = min(skip, len(chunk))
+                            chunk = chunk[skipped:]
+                            skip -= skipped
+                            if not chunk:
+                                continue
+                        progress.add_fetched(key, len(chunk))
+                        if not put((key, chunk)):
+                            return
+                put((key, _SOURCE_DONE))
+            except Exception as e:
+                put((key, e))
+        
+        counts = {key: resume.get(key, 0) for key in sources}
+        with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix=f"task-{task.id}-fetch") as pool:
+            for key, source in sources.items():
+                pool.submit(fetch, key, source)
+            
+            try:
+                pending = len(sources)
+                while pending:
+                    key, item = chunks.get()
+                    if item is _SOURCE_DONE:
+                        pending -= 1
+                        progress.source_done(key)
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        rows = sources[key].save_data(db, task.id, item, **save_options)["rows"]
+                        counts[key] += rows
+                        if self.chunk_commits:
+                            task.checkpoint = dict(counts)
+                            db.commit()
+                        progress.add_persisted(key, rows)
+            finally:
+                cancelled.set()
+        
+        progress.report(force=True)
+        return counts
+        
+    def _progress_writer(self, task_id):
+        """Where a task's progress goes: its Redis hash, or this manager's memory"""
+        if self.use_redis:
+            return lambda fields: self.redis_client.hset(f"task:{task_id}", mapping=fields)
+        return lambda fields: self.task_progress.__setitem__(task_id, fields)
+        
+    def get_task_progress(self, task_id):
+        """
+        Latest progress reported by a task's worker
+        
+        Args:
+            task_id (int): Task id
             
+        Returns:
+            dict: progress, eta_seconds, row counts and per-source counts,
+                empty if nothing has been reported or, without Redis, once
+                the task has finished
+        """
+        if self.use_redis:
+            fields = {k.decode('utf-8'): v.decode('utf-8')
+                      for k, v in self.redis_client.hgetall(f"task:{task_id}").items()}
+            names = ("progress", "eta_seconds", "rows_fetched", "rows_persisted", "rows_expected",
+                     "records_processed", "sources")
+            fields = {name: value for name, value in fields.items() if name in names}
+        else:
+            fields = self.task_progress.get(task_id, {})
+        return parse_progress(fields)
+            
+    def get_worker_stats(self):
+        """Per-worker state, current task, task counts and busy time"""
+        with self._stats_lock:
+            return [dict(stats, busy_seconds=round(stats["busy_seconds"], 3)) for stats in self.worker_stats.values()]
+        
     def get_queue_stats(self):
         """Get statistics about the task queue"""
         if not self.use_redis or not self.redis_client:
             return {
                 "queue_size": self.queue.qsize() if hasattr(self, 'queue') else "unknown",
-                "redis_status": "disabled"
+                "lanes": self.queue.stats() if hasattr(self, 'queue') else None,
+                "redis_status": "disabled",
+                "worker_mode": self.worker_mode,
+                "workers": self.get_worker_stats()
             }
             
         try:
-            queue_size = self.redis_client.llen("task_queue")
-            total_tasks = self.redis_client.scard("all_tasks")
-            failed_tasks = self.redis_client.scard("failed_tasks")
+            stream_stats = self.stream_queue.stats() if self.stream_queue else None
+            pipe = self.redis_client.pipeline(transaction=False)
+            # Tasks left in the list of earlier versions
+            pipe.llen("task_queue")
+            pipe.get(TASK_COUNT_KEY)
+            pipe.get(FAILED_COUNT_KEY)
+            # The last 5 queued tasks, oldest first
+            pipe.zrange(RECENT_TASKS_KEY, -5, -1)
+            legacy_size, total_tasks, failed_tasks, recent_ids = pipe.execute()
+            lane_stats = self.fair_queue.stats() if self.fair_queue else None
+            if stream_stats:
+                queue_size = stream_stats["waiting"]
+            else:
+                queue_size = sum(lane["depth"] for lane in lane_stats.values()) + legacy_size
             
-            # Get the last 5 processed tasks
-            all_tasks = self.redis_client.smembers("all_tasks")
+            recent_ids = [i.decode('utf-8') if isinstance(i, bytes) else i for i in recent_ids]
+            pipe = self.redis_client.pipeline(transaction=False)
+            for task_id in recent_ids:
+                pipe.hgetall(f"task:{task_id}")
             recent_tasks = []
             
-            for task_id_bytes in list(sorted(all_tasks))[-5:]:
-                task_id = task_id_bytes.decode('utf-8') if isinstance(task_id_bytes, bytes) else task_id_bytes
-                task_data = self.redis_client.hgetall(f"task:{task_id}")
-                
+            for task_id, task_data in zip(recent_ids, pipe.execute()):
                 if task_data:
                     # Convert bytes to strings
                     task_info = {k.decode('utf-8') if isinstance(k, bytes) else k: 
@@ -230,15 +771,22 @@ class QueueManager:
             
             return {
                 "queue_size": queue_size,
-                "total_tasks": total_tasks,
-                "failed_tasks": failed_tasks,
+                "total_tasks": int(total_tasks or 0),
+                "failed_tasks": int(failed_tasks or 0),
                 "recent_tasks": recent_tasks,
-                "redis_status": "connected"
+                "redis_status": "connected",
+                "queue_backend": self.queue_backend,
+                "lanes": lane_stats,
+                "stream": stream_stats,
+                "worker_mode": self.worker_mode,
+                "workers": self.get_worker_stats()
             }
         except redis.RedisError as e:
             logger.error(f"Redis error when getting stats: {str(e)}")
             return {
                 "queue_size": "unknown",
                 "redis_status": "error",
-                "error": str(e)
+                "error": str(e),
+                "worker_mode": self.worker_mode,
+                "workers": self.get_worker_stats()
             }
\ No newline at end of file
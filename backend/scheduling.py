@@ -0,0 +1,314 @@
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Queue lanes from most to least latency sensitive
+LANES = ('interactive', 'standard', 'bulk')
+
+# Out of every 12 claims, a worker prefers the interactive lane 8 times, the
+# standard lane 3 times and the bulk lane once. An empty preferred lane
+# never blocks the others, so bulk tasks still get every idle worker.
+LANE_WEIGHTS = {'interactive': 8, 'standard': 3, 'bulk': 1}
+
+# Highest estimated cost (see estimate_cost) of each lane but the last
+LANE_MAX_COST = {'interactive': 0.15, 'standard': 1.0}
+
+# Lane of tasks queued without parameters
+DEFAULT_LANE = 'standard'
+DEFAULT_USER = 'anonymous'
+
+# Date span assumed when a source filter leaves either end open
+FULL_SPAN_DAYS = 5 * 365
+
+# Company or model filters with this many values or more are treated as
+# reading every label
+FULL_LABEL_COUNT = 10
+
+# Recent wait times kept per lane for percentiles
+WAIT_SAMPLES = 1000
+
+SOURCE_KEYS = ('source_a', 'source_b', 'source_c')
+
+
+def estimate_cost(parameters):
+    """
+    Rough cost of a task from its filters
+
+    Each source contributes the fraction of a full scan its filters keep:
+    the date span over FULL_SPAN_DAYS, scaled down when only a few
+    companies or models are requested.
+
+    Args:
+        parameters (dict): Task parameters, filters per source key
+
+    Returns:
+        float: Between 0 and the number of sources; 1.0 is one unfiltered source
+    """
+    cost = 0.0
+    for key in SOURCE_KEYS:
+        filters = (parameters or {}).get(key) or {}
+        span = FULL_SPAN_DAYS
+        if filters.get('start_date') and filters.get('end_date'):
+            try:
+                span = (datetime.fromisoformat(filters['end_date']) -
+                        datetime.fromisoformat(filters['start_date'])).days + 1
+            except ValueError:
+                pass
+        fraction = min(max(span, 1), FULL_SPAN_DAYS) / FULL_SPAN_DAYS
+        for labels in (filters.get('companies'), filters.get('models')):
+            if labels:
+                fraction *= min(len(labels), FULL_LABEL_COUNT) / FULL_LABEL_COUNT
+        cost += fraction
+    return cost
+
+
+def lane_for(parameters):
+    """
+    Lane a task is queued in
+
+    Args:
+        parameters (dict): Task parameters, or None if unknown
+
+    Returns:
+        tuple: (lane, estimated cost)
+    """
+    if parameters is None:
+        return DEFAULT_LANE, None
+    cost = estimate_cost(parameters)
+    for lane in LANES[:-1]:
+        if cost <= LANE_MAX_COST[lane]:
+            return lane, cost
+    return LANES[-1], cost
+
+
+def wait_percentiles(samples):
+    """p50/p90/p99 of wait times in seconds, as milliseconds"""
+    if not samples:
+        return {"p50": None, "p90": None, "p99": None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {f"p{p}": round(ordered[min(last, int(p / 100 * len(ordered)))] * 1000, 1) for p in (50, 90, 99)}
+
+
+class LaneSchedule:
+    """
+    Order in which a worker tries the lanes
+
+    Smooth weighted round robin over LANE_WEIGHTS picks the preferred lane
+    of each claim; the other lanes follow in priority order.
+    """
+    def __init__(self, weights=None):
+        self.weights = dict(weights or LANE_WEIGHTS)
+        self._current = {lane: 0 for lane in LANES}
+        self._lock = threading.Lock()
+
+    def next_order(self):
+        total = sum(self.weights.values())
+        with self._lock:
+            for lane in LANES:
+                self._current[lane] += self.weights[lane]
+            preferred = max(LANES, key=lambda lane: self._current[lane])
+            self._current[preferred] -= total
+        return [preferred] + [lane for lane in LANES if lane != preferred]
+
+
+class FairQueue:
+    """
+    In-memory task queue with priority lanes and per-user round robin
+
+    Within a lane, users take turns: each claim serves the user who was
+    served least recently, so one user's backlog of tasks cannot delay
+    another user's first task by more than one task per user. Has the
+    put/get/qsize/task_done interface of queue.Queue used by QueueManager.
+    """
+    def __init__(self, weights=None):
+        self.schedule = LaneSchedule(weights)
+        self._lanes = {lane: OrderedDict() for lane in LANES}
+        self._waits = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+        self._size = 0
+        self._not_empty = threading.Condition()
+
+    def put(self, task_id, lane=DEFAULT_LANE, user=DEFAULT_USER):
+        with self._not_empty:
+            self._lanes[lane].setdefault(user, deque()).append((task_id, time.time()))
+            self._size += 1
+            self._not_empty.notify()
+
+    def get(self, block=True, timeout=None):
+        """
+        Take the next task
+
+        Raises:
+            queue.Empty: If no task arrived within timeout
+        """
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._size, timeout if block else 0):
+                raise queue.Empty
+            for lane in self.schedule.next_order():
+                users = self._lanes[lane]
+                if users:
+                    break
+            user, tasks = next(iter(users.items()))
+            task_id, queued_at = tasks.popleft()
+            if tasks:
+                users.move_to_end(user)
+            else:
+                del users[user]
+            self._size -= 1
+            self._waits[lane].append(time.time() - queued_at)
+            return task_id
+
+    def task_done(self):
+        pass
+
+    def qsize(self):
+        return self._size
+
+    def stats(self):
+        """Depth, queued users and wait percentiles per lane"""
+        with self._not_empty:
+            return {lane: {
+                "depth": sum(len(tasks) for tasks in self._lanes[lane].values()),
+                "users": len(self._lanes[lane]),
+                "wait_ms": wait_percentiles(list(self._waits[lane])),
+            } for lane in LANES}
+
+
+# Claims the next task: for each lane in the order given, the user served
+# least recently gives up their oldest task, which is marked processing and
+# its wait recorded. Keys are built from the lane and user names, so this
+# assumes a single Redis node rather than a cluster.
+#   ARGV: now (epoch seconds), now (ISO), wait samples kept, lanes...
+FAIR_CLAIM_SCRIPT = """
+for i = 4, #ARGV do
+    local lane = ARGV[i]
+    local prefix = KEYS[1] .. ':' .. lane
+    local user = redis.call('ZRANGE', prefix .. ':users', 0, 0)[1]
+    if user then
+        local tasks = prefix .. ':user:' .. user
+        local entry = redis.call('LPOP', tasks)
+        if redis.call('LLEN', tasks) == 0 then
+            redis.call('ZREM', prefix .. ':users', user)
+        else
+            redis.call('ZADD', prefix .. ':users', ARGV[1], user)
+        end
+        if entry then
+            local sep = string.find(entry, ':', 1, true)
+            local task_id = string.sub(entry, 1, sep - 1)
+            redis.call('DECR', prefix .. ':depth')
+            redis.call('LPUSH', prefix .. ':waits', tonumber(ARGV[1]) - tonumber(string.sub(entry, sep + 1)))
+            redis.call('LTRIM', prefix .. ':waits', 0, tonumber(ARGV[3]) - 1)
+            redis.call('HSET', 'task:' .. task_id, 'status', 'processing', 'started_at', ARGV[2])
+            return {task_id, lane}
+        end
+    end
+end
+local task_id = redis.call('LPOP', KEYS[1])
+if task_id then
+    redis.call('HSET', 'task:' .. task_id, 'status', 'processing', 'started_at', ARGV[2])
+    return {task_id, 'legacy'}
+end
+return nil
+"""
+
+
+class RedisFairQueue:
+    """
+    FairQueue on Redis, shared by every worker process
+
+    Per lane, each user's tasks are a list of "task_id:queued_at" entries
+    and the users with queued tasks a sorted set scored by when they were
+    last served (or first queued), so the lowest score is served next.
+    Depth is a counter and recent waits a capped list, keeping stats O(1).
+    Enqueueing also pushes a wake-up token that idle workers block on.
+
+    Tasks left in the plain task_queue list by earlier versions are served
+    after every lane.
+
+    Args:
+        client: Redis client
+        prefix (str): Key prefix, also the legacy list key
+    """
+    def __init__(self, client, prefix="task_queue", weights=None):
+        self.client = client
+        self.prefix = prefix
+        self.wakeup_key = f"{prefix}:wakeup"
+        self.schedule = LaneSchedule(weights)
+        self._claim_script = client.register_script(FAIR_CLAIM_SCRIPT)
+
+    def _lane_key(self, lane, suffix):
+        return f"{self.prefix}:{lane}:{suffix}"
+
+    def add(self, task_id, lane=DEFAULT_LANE, user=DEFAULT_USER, pipe=None):
+        """Queue a task, or queue the commands doing so on pipe"""
+        now = time.time()
+        execute = pipe is None
+        pipe = self.client.pipeline() if execute else pipe
+        pipe.rpush(self._lane_key(lane, f"user:{user}"), f"{task_id}:{now}")
+        pipe.zadd(self._lane_key(lane, "users"), {user: now}, nx=True)
+        pipe.incr(self._lane_key(lane, "depth"))
+        pipe.rpush(self.wakeup_key, 1)
+        pipe.ltrim(self.wakeup_key, 0, 99)
+        if execute:
+            pipe.execute()
+
+    def claim(self, timeout=1):
+        """
+        Take the next task and mark it processing
+
+        One script call when a task is queued; otherwise the worker blocks
+        on the wake-up list for up to timeout seconds and tries once more.
+
+        Returns:
+            tuple: (task_id, lane), or None if nothing arrived in time
+        """
+        claimed = self._claim_once()
+        if claimed is None and self.client.blpop(self.wakeup_key, timeout=timeout):
+            claimed = self._claim_once()
+        return claimed
+
+    def _claim_once(self):
+        now = time.time()
+        result = self._claim_script(keys=[self.prefix],
+                                    args=[now, datetime.utcnow().isoformat(), WAIT_SAMPLES, *self.schedule.next_order()])
+        if result is None:
+            return None
+        task_id, lane = result
+        return int(task_id), _decode(lane)
+
+    def size(self):
+        """Tasks queued in every lane, plus legacy list entries"""
+        pipe = self.client.pipeline(transaction=False)
+        for lane in LANES:
+            pipe.get(self._lane_key(lane, "depth"))
+        pipe.llen(self.prefix)
+        *depths, legacy = pipe.execute()
+        return sum(int(depth or 0) for depth in depths) + legacy
+
+    def stats(self):
+        """Depth, queued users and wait percentiles per lane"""
+        pipe = self.client.pipeline(transaction=False)
+        for lane in LANES:
+            pipe.get(self._lane_key(lane, "depth"))
+            pipe.zcard(self._lane_key(lane, "users"))
+            pipe.lrange(self._lane_key(lane, "waits"), 0, -1)
+        results = pipe.execute()
+        stats = {}
+        for i, lane in enumerate(LANES):
+            depth, users, waits = results[3 * i:3 * i + 3]
+            stats[lane] = {
+                "depth": int(depth or 0),
+                "users": users,
+                "wait_ms": wait_percentiles([float(w) for w in waits]),
+            }
+        return stats
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
@@ -0,0 +1,234 @@
+import os
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from typing import NamedTuple
+import redis
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TASK_STREAM = "task_stream"
+TASK_GROUP = "task_workers"
+
+# A pending entry whose consumer has not touched it for this long is
+# reclaimed by another consumer
+DEFAULT_CLAIM_IDLE_MS = 60000
+
+# Deliveries after which an entry is moved to the dead-letter stream
+DEFAULT_MAX_DELIVERIES = 3
+
+# Consumers with nothing pending that have been idle this long are removed
+CONSUMER_EXPIRY_MS = 3600 * 1000
+
+# Per-consumer metric hashes outlive their consumer by this many seconds
+METRICS_TTL = 24 * 3600
+
+
+class StreamEntry(NamedTuple):
+    entry_id: str
+    task_id: int
+    deliveries: int
+    reclaimed: bool
+
+
+def consumer_name(worker_id):
+    """Consumer name unique to this host, process and worker thread"""
+    return f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
+
+
+class RedisStreamQueue:
+    """
+    Task queue on a Redis stream read through a consumer group
+
+    Unlike RPUSH/BLPOP, a task read with XREADGROUP stays in the group's
+    pending entries list until its consumer acknowledges it. A consumer that
+    dies mid-task leaves the entry pending, and once it has been idle for
+    claim_idle_ms another consumer takes it over with XAUTOCLAIM. Consumers
+    that are still working refresh their entries (see hold), so long tasks
+    are never claimed away from a live worker. Entries delivered more than
+    max_deliveries times are moved to a dead-letter stream instead of being
+    retried forever.
+
+    Args:
+        client: Redis client
+        stream (str): Stream key
+        group (str): Consumer group name
+        claim_idle_ms (int): Idle time before a pending entry is reclaimed
+        max_deliveries (int): Deliveries before an entry is dead-lettered
+    """
+    def __init__(self, client, stream=TASK_STREAM, group=TASK_GROUP,
+                 claim_idle_ms=DEFAULT_CLAIM_IDLE_MS, max_deliveries=DEFAULT_MAX_DELIVERIES):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.dead_stream = f"{stream}:dead"
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.heartbeat_interval = claim_idle_ms / 3000
+        self._next_claim = {}
+        self.ensure_group()
+
+    def ensure_group(self):
+        try:
+            self.client.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def _metrics_key(self, consumer):
+        return f"{self.stream}:consumer:{consumer}"
+
+    def add(self, task_id, pipe=None):
+        return (pipe or self.client).xadd(self.stream, {"task_id": task_id})
+
+    def read(self, consumer, block_ms=1000):
+        """
+        Get the next task for a consumer
+
+        Stalled entries of other consumers are checked for first, at most
+        every claim_idle_ms / 2 per consumer; then new entries are read.
+
+        Args:
+            consumer (str): Consumer name
+            block_ms (int): How long to wait for a new entry
+
+        Returns:
+            StreamEntry: The entry, or None if nothing arrived in time
+        """
+        now = time.monotonic()
+        if consumer not in self._next_claim:
+            self.client.hsetnx(self._metrics_key(consumer), "first_seen", time.time())
+        if now >= self._next_claim.get(consumer, 0):
+            self._next_claim[consumer] = now + self.claim_idle_ms / 2000
+            entry = self._claim(consumer)
+            if entry is not None:
+                return entry
+            self._expire_consumers()
+
+        result = self.client.xreadgroup(self.group, consumer, {self.stream: '>'}, count=1, block=block_ms)
+        for _, entries in result or []:
+            for entry_id, fields in entries:
+                return StreamEntry(_decode(entry_id), int(fields[b'task_id']), 1, False)
+        return None
+
+    def _claim(self, consumer):
+        claimed = self.client.xautoclaim(self.stream, self.group, consumer,
+                                         min_idle_time=self.claim_idle_ms, start_id='0-0', count=1)
+        entries = claimed[1]
+        if not entries:
+            return None
+        entry_id, fields = entries[0]
+        entry_id = _decode(entry_id)
+        if fields is None:
+            # Deleted from the stream while pending
+            self.client.xack(self.stream, self.group, entry_id)
+            return None
+
+        pending = self.client.xpending_range(self.stream, self.group, min=entry_id, max=entry_id, count=1)
+        deliveries = pending[0]['times_delivered'] if pending else 1
+        self.client.hincrby(self._metrics_key(consumer), "reclaimed", 1)
+        logger.warning(f"Consumer {consumer} reclaimed stalled entry {entry_id} "
+                       f"(task {_decode(fields[b'task_id'])}, delivery {deliveries})")
+        return StreamEntry(entry_id, int(fields[b'task_id']), deliveries, True)
+
+    def _expire_consumers(self):
+        for info in self.client.xinfo_consumers(self.stream, self.group):
+            if info['pending'] == 0 and info['idle'] > CONSUMER_EXPIRY_MS:
+                self.client.xgroup_delconsumer(self.stream, self.group, info['name'])
+
+    def dead_letter(self, entry, reason):
+        """Move an entry that keeps failing to the dead-letter stream"""
+        pipe = self.client.pipeline()
+        pipe.xadd(self.dead_stream, {"task_id": entry.task_id, "entry_id": entry.entry_id,
+                                     "deliveries": entry.deliveries, "reason": reason})
+        pipe.xack(self.stream, self.group, entry.entry_id)
+        pipe.xdel(self.stream, entry.entry_id)
+        pipe.execute()
+
+    def ack(self, entry, pipe=None):
+        """Acknowledge and delete a finished entry, or queue that on pipe"""
+        execute = pipe is None
+        pipe = self.client.pipeline() if execute else pipe
+        pipe.xack(self.stream, self.group, entry.entry_id)
+        pipe.xdel(self.stream, entry.entry_id)
+        if execute:
+            pipe.execute()
+
+    @contextmanager
+    def hold(self, consumer, entry):
+        """
+        Keep an entry claimed while its task runs
+
+        Re-claims the entry for the same consumer every claim_idle_ms / 3,
+        which resets its idle time so other consumers leave it alone.
+        """
+        stop = threading.Event()
+
+        def refresh():
+            while not stop.wait(self.heartbeat_interval):
+                try:
+                    self.client.xclaim(self.stream, self.group, consumer, min_idle_time=0,
+                                       message_ids=[entry.entry_id], justid=True)
+                except redis.RedisError as e:
+                    logger.warning(f"Could not refresh stream entry {entry.entry_id}: {str(e)}")
+
+        thread = threading.Thread(target=refresh, name=f"hold-{entry.entry_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def record(self, consumer, seconds, failed=False, pipe=None):
+        """Add a finished task to the consumer's throughput metrics, or queue that on pipe"""
+        key = self._metrics_key(consumer)
+        execute = pipe is None
+        pipe = self.client.pipeline() if execute else pipe
+        pipe.hincrby(key, "failed" if failed else "processed", 1)
+        pipe.hincrbyfloat(key, "busy_seconds", seconds)
+        pipe.hset(key, "last_seen", time.time())
+        pipe.expire(key, METRICS_TTL)
+        if execute:
+            pipe.execute()
+
+    def stats(self):
+        """
+        Stream depth and per-consumer metrics
+
+        Returns:
+            dict: waiting (not yet delivered), pending (delivered, not acked),
+                dead-lettered entries, and for each consumer its pending
+                count, idle time, task counts and tasks per minute
+        """
+        length = self.client.xlen(self.stream)
+        pending = self.client.xpending(self.stream, self.group)['pending']
+        consumers = []
+        for info in self.client.xinfo_consumers(self.stream, self.group):
+            name = _decode(info['name'])
+            metrics = {_decode(k): float(v) for k, v in self.client.hgetall(self._metrics_key(name)).items()}
+            processed = int(metrics.get("processed", 0))
+            elapsed = metrics.get("last_seen", 0) - metrics.get("first_seen", 0)
+            consumers.append({
+                "name": name,
+                "pending": info['pending'],
+                "idle_ms": info['idle'],
+                "processed": processed,
+                "failed": int(metrics.get("failed", 0)),
+                "reclaimed": int(metrics.get("reclaimed", 0)),
+                "busy_seconds": round(metrics.get("busy_seconds", 0.0), 3),
+                "tasks_per_minute": round(processed * 60 / elapsed, 2) if elapsed > 0 else None,
+            })
+        return {
+            "waiting": length - pending,
+            "pending": pending,
+            "dead_lettered": self.client.xlen(self.dead_stream),
+            "consumers": consumers,
+        }
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
@@ -0,0 +1,185 @@
+import io
+import os
+import csv
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import select
+from models import SalesData
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Rows per page of task data when the client pages by cursor without a
+# limit, and the most it may ask for
+DATA_PAGE_SIZE = int(os.environ.get('DATA_PAGE_SIZE', '1000'))
+DATA_MAX_PAGE_SIZE = int(os.environ.get('DATA_MAX_PAGE_SIZE', '10000'))
+
+# Rows fetched per round trip of a streaming export; memory use of an
+# export depends on this, not on the size of the task
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '5000'))
+
+# Export formats and their media types
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+# Fields a client may project; id is always returned since it is the cursor
+DATA_FIELDS = ('id', 'task_id', 'source', 'company', 'car_model', 'sale_date', 'price', 'year', 'month')
+
+
+def parse_fields(fields):
+    """
+    Parse a fields= projection
+
+    Args:
+        fields (str): Comma-separated field names, None or empty for all
+
+    Returns:
+        tuple: Field names in DATA_FIELDS order, starting with id
+
+    Raises:
+        ValueError: If a field is unknown
+    """
+    if not fields:
+        return DATA_FIELDS
+    requested = {name.strip() for name in fields.split(',') if name.strip()}
+    unknown = requested - set(DATA_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in DATA_FIELDS if name == 'id' or name in requested)
+
+
+def parse_date(value):
+    """ISO date or datetime filter, or None"""
+    return datetime.fromisoformat(value) if value else None
+
+
+def data_statement(task_id, fields=DATA_FIELDS, companies=None, models=None, start_date=None, end_date=None):
+    """
+    SELECT of the projected columns of a task's rows, filtered, in id order
+
+    Args:
+        task_id (int): Task owning the rows
+        fields (tuple): Columns to return, as from parse_fields
+        companies (list): Only rows of these companies
+        models (list): Only rows of these car models
+        start_date (datetime): Only rows sold at or after this time
+        end_date (datetime): Only rows sold at or before this time
+
+    Returns:
+        Select: The statement
+    """
+    statement = select(*(getattr(SalesData, name) for name in fields)).where(SalesData.task_id == task_id)
+    if companies:
+        statement = statement.where(SalesData.company.in_(companies))
+    if models:
+        statement = statement.where(SalesData.car_model.in_(models))
+    if start_date:
+        statement = statement.where(SalesData.sale_date >= start_date)
+    if end_date:
+        statement = statement.where(SalesData.sale_date <= end_date)
+    return statement.order_by(SalesData.id)
+
+
+def row_dict(fields, row):
+    """Row of projected columns as a JSON-ready dict"""
+    item = dict(zip(fields, row))
+    if item.get('sale_date') is not None:
+        item['sale_date'] = item['sale_date'].isoformat()
+    return item
+
+
+def fetch_page(db, task_id, fields=DATA_FIELDS, limit=None, cursor=None, **filters):
+    """
+    One page of a task's sales_data rows, in id order
+
+    Only the projected columns are selected, and the page is found by
+    keyset (id > cursor) rather than OFFSET, so every page costs the same
+    however deep into the task it is.
+
+    Args:
+        db: SQLAlchemy session
+        task_id (int): Task owning the rows
+        fields (tuple): Columns to return, as from parse_fields
+        limit (int): Page size, capped at DATA_MAX_PAGE_SIZE
+        cursor (int): Id of the last row of the previous page
+        **filters: companies, models, start_date and end_date, as for
+            data_statement
+
+    Returns:
+        tuple: (list of row dicts, cursor of the next page or None)
+    """
+    limit = min(max(limit or DATA_PAGE_SIZE, 1), DATA_MAX_PAGE_SIZE)
+    statement = data_statement(task_id, fields, **filters)
+    if cursor is not None:
+        statement = statement.where(SalesData.id > cursor)
+
+    # One extra row tells whether another page follows
+    rows = db.execute(statement.limit(limit + 1)).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [row_dict(fields, row) for row in rows[:limit]], next_cursor
+
+
+def export_rows(session_factory, task_id, export_format, fields=DATA_FIELDS, batch_size=None, **filters):
+    """
+    Stream all of a task's rows as NDJSON, CSV or a JSON array
+
+    Rows are fetched EXPORT_BATCH_SIZE at a time (yield_per, a server-side
+    cursor where the driver has one) and each batch is encoded and yielded
+    as one chunk, so only one batch is ever held in memory.
+
+    The rows are read through a session of their own, opened when the
+    first chunk is requested and closed when the generator finishes or is
+    closed, since a streaming response outlives the request's session.
+
+    Args:
+        session_factory: SQLAlchemy sessionmaker
+        task_id (int): Task owning the rows
+        export_format (str): A key of EXPORT_FORMATS
+        fields (tuple): Columns to return, as from parse_fields
+        batch_size (int): Rows per batch, EXPORT_BATCH_SIZE by default
+        **filters: companies, models, start_date and end_date, as for
+            data_statement
+
+    Yields:
+        str: Encoded rows; for CSV the first chunk is the header, for
+            JSON the array's brackets come in chunks of their own
+    """
+    statement = data_statement(task_id, fields, **filters) \
+        .execution_options(yield_per=batch_size or EXPORT_BATCH_SIZE)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+        yield buffer.getvalue()
+    elif export_format == 'json':
+        yield '['
+    separator = ''
+
+    exported = 0
+    db = session_factory()
+    try:
+        for batch in db.execute(statement).partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            if writer:
+                writer.writerows(row_dict(fields, row).values() for row in batch)
+            elif export_format == 'json':
+                for row in batch:
+                    buffer.write(separator)
+                    buffer.write(json.dumps(row_dict(fields, row)))
+                    separator = ','
+            else:
+                for row in batch:
+                    buffer.write(json.dumps(row_dict(fields, row)))
+                    buffer.write('\n')
+            exported += len(batch)
+            yield buffer.getvalue()
+    finally:
+        db.close()
+    if export_format == 'json':
+        yield ']'
+    logger.info(f"Exported {exported} rows of task {task_id} as {export_format}")
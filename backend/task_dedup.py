@@ -0,0 +1,158 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from models import Task, TaskStatus
+from data_sources.snapshot import file_version
+from scheduling import SOURCE_KEYS
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Identical tasks attach to one execution instead of fetching again
+TASK_DEDUP_ENABLED = os.environ.get('TASK_DEDUP', 'true').lower() == 'true'
+
+# Completed results are reused for this many seconds, and only while the
+# source files are unchanged. API data has no file version, so this window
+# is also how stale an API-backed result may get.
+RESULT_REUSE_SECONDS = int(os.environ.get('TASK_RESULT_TTL', '3600'))
+
+# A pending or in-progress task not updated for this many seconds has most
+# likely lost its queue entry (in-memory queue after a restart, API-only
+# mode without Redis), so new tasks no longer attach to it
+TASK_STALE_SECONDS = int(os.environ.get('TASK_STALE_SECONDS', '1800'))
+
+DATE_FILTERS = ('start_date', 'end_date')
+LABEL_FILTERS = ('companies', 'models')
+
+
+def canonical_parameters(parameters):
+    """
+    Normalize task parameters so equivalent tasks compare equal
+
+    Empty filters are dropped (they do not filter), dates are written as
+    full ISO datetimes and company/model lists are sorted and deduplicated.
+
+    Args:
+        parameters (dict): Filters per source key
+
+    Returns:
+        dict: Canonical filters for every source key
+    """
+    canonical = {}
+    for key in SOURCE_KEYS:
+        filters = {}
+        for name, value in ((parameters or {}).get(key) or {}).items():
+            if value in (None, '', [], {}):
+                continue
+            if name in DATE_FILTERS:
+                try:
+                    value = datetime.fromisoformat(value).isoformat()
+                except (TypeError, ValueError):
+                    pass
+            elif name in LABEL_FILTERS and isinstance(value, list):
+                value = sorted(set(value))
+            filters[name] = value
+        canonical[key] = filters
+    return canonical
+
+
+def parameters_hash(parameters):
+    """SHA-256 hex digest of the canonical parameters"""
+    encoded = json.dumps(canonical_parameters(parameters), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def source_version(sources):
+    """
+    Fingerprint of the data the sources currently serve
+
+    File sources contribute their file version (path, mtime, size) and
+    row_order, API sources their URL.
+
+    Args:
+        sources (dict): Source key to data source
+
+    Returns:
+        str: SHA-256 hex digest, or None if a source file cannot be read
+    """
+    parts = []
+    for key in sorted(sources):
+        source = sources[key]
+        if getattr(source, 'file_path', None):
+            try:
+                parts.append((key, file_version(source.file_path, getattr(source, 'hash_content', False)),
+                              source.row_order() if hasattr(source, 'row_order') else None))
+            except OSError:
+                return None
+        else:
+            parts.append((key, type(source).__name__, getattr(source, 'api_url', None)))
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+
+def find_reusable(db, params_hash, version=None, now=None):
+    """
+    Find the execution an identical new task can attach to
+
+    A task still pending or in progress is preferred, if it was updated
+    within TASK_STALE_SECONDS; otherwise a task that completed within
+    RESULT_REUSE_SECONDS from the same source version. Stale in-flight
+    tasks are failed on the way (see fail_stale), for the caller to commit.
+
+    Args:
+        db: SQLAlchemy session
+        params_hash (str): parameters_hash of the new task
+        version (str): Current source_version, None to skip completed results
+        now (datetime): Current time, for tests
+
+    Returns:
+        Task: The executing or completed task owning the rows, or None
+    """
+    if not TASK_DEDUP_ENABLED:
+        return None
+    owners = db.query(Task).filter(Task.params_hash == params_hash, Task.result_task_id.is_(None))
+    now = now or datetime.utcnow()
+    live_after = now - timedelta(seconds=TASK_STALE_SECONDS)
+    in_flight = owners.filter(Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])) \
+        .order_by(Task.id).all()
+    for owner in in_flight:
+        if owner.updated_at >= live_after:
+            return owner
+        fail_stale(db, owner)
+    if version is None:
+        return None
+    fresh_after = now - timedelta(seconds=RESULT_REUSE_SECONDS)
+    return owners.filter(Task.status == TaskStatus.COMPLETED, Task.source_version == version,
+                         Task.updated_at >= fresh_after).order_by(Task.id.desc()).first()
+
+
+def fail_stale(db, task):
+    """
+    Fail an in-flight task that stopped updating, with the tasks attached
+    to it, so it can be resumed; if a worker still picks it up it runs and
+    completes as usual
+    """
+    logger.warning(f"Task {task.id} {task.status.value} without an update since {task.updated_at}, "
+                   f"marking it failed")
+    task.status = TaskStatus.FAILED
+    settle_followers(db, task)
+
+
+def settle_followers(db, task):
+    """
+    Give the tasks attached to task its final status
+
+    Called before the status change of task is committed, so both land in
+    the same transaction.
+
+    Returns:
+        int: Number of attached tasks updated
+    """
+    return db.query(Task).filter(Task.result_task_id == task.id, Task.status != task.status) \
+        .update({Task.status: task.status, Task.updated_at: datetime.utcnow()}, synchronize_session=False)
+
+
+def result_task_id(task):
+    """Id of the task whose sales_data rows hold this task's result"""
+    return task.result_task_id or task.id
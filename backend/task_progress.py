@@ -0,0 +1,130 @@
+import json
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seconds between progress writes of one task
+PROGRESS_INTERVAL = 1.0
+
+
+class TaskProgress:
+    """
+    Row counts of a running task, per source, with an ETA
+
+    Sources report rows as they come out of the fetch stage (fetched) and
+    as their chunks are committed (persisted). A source that knows how many
+    rows its filters match sets an expected_rows attribute, which gives the
+    percentage and ETA; until every unfinished source has one, both are
+    None. Reports are throttled to one write per PROGRESS_INTERVAL, so a
+    task with thousands of chunks still costs only one Redis command per
+    second.
+
+    Args:
+        task_id (int): Task id
+        sources (dict): Source key to data source
+        write (callable): Called with the progress fields to store
+        resumed (dict): Rows per source already persisted by an earlier run
+        interval (float): Minimum seconds between writes
+    """
+    def __init__(self, task_id, sources, write, resumed=None, interval=PROGRESS_INTERVAL):
+        self.task_id = task_id
+        self.sources = sources
+        self.write = write
+        self.interval = interval
+        self.resumed = dict(resumed or {})
+        self.fetched = {key: self.resumed.get(key, 0) for key in sources}
+        self.persisted = dict(self.fetched)
+        self.done = set()
+        self.start = time.monotonic()
+        self._last_write = 0.0
+
+    def add_fetched(self, key, rows):
+        # Called from the source's own fetch thread only
+        self.fetched[key] += rows
+
+    def add_persisted(self, key, rows):
+        self.persisted[key] += rows
+        self.report()
+
+    def source_done(self, key):
+        self.done.add(key)
+        self.report()
+
+    def expected(self, key):
+        if key in self.done:
+            return self.persisted[key]
+        return getattr(self.sources[key], 'expected_rows', None)
+
+    def fields(self):
+        """
+        Current progress
+
+        Returns:
+            dict: progress (0-100), eta_seconds, rows_fetched, rows_persisted,
+                rows_expected and a JSON sources breakdown; unknown values
+                are empty strings
+        """
+        expected = {key: self.expected(key) for key in self.sources}
+        persisted = sum(self.persisted.values())
+        total = None if None in expected.values() else sum(expected.values())
+        progress = eta = None
+        if total:
+            progress = min(99, int(100 * persisted / total))
+            # Rate of this run only: resumed rows took no time
+            rows_per_second = (persisted - sum(self.resumed.values())) / max(time.monotonic() - self.start, 1e-6)
+            if rows_per_second > 0:
+                eta = round(max(total - persisted, 0) / rows_per_second, 1)
+        return {
+            "progress": "" if progress is None else progress,
+            "eta_seconds": "" if eta is None else eta,
+            "rows_fetched": sum(self.fetched.values()),
+            "rows_persisted": persisted,
+            "rows_expected": "" if total is None else total,
+            "sources": json.dumps({key: {
+                "fetched": self.fetched[key],
+                "persisted": self.persisted[key],
+                "expected": expected[key],
+                "done": key in self.done,
+            } for key in self.sources}),
+        }
+
+    def report(self, force=False):
+        """Write the current progress unless the last write was too recent"""
+        now = time.monotonic()
+        if not force and now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        try:
+            self.write(self.fields())
+        except Exception as e:
+            # Progress is informational; never fail the task over it
+            logger.warning(f"Could not record progress of task {self.task_id}: {str(e)}")
+
+
+def parse_progress(fields):
+    """
+    Turn stored progress fields back into values
+
+    Args:
+        fields (dict): Progress fields as strings, e.g. a task hash from Redis
+
+    Returns:
+        dict: Numbers (None when unknown) and the sources breakdown
+    """
+    parsed = {}
+    for name, value in fields.items():
+        if name == "sources":
+            parsed[name] = json.loads(value)
+        elif value == "":
+            parsed[name] = None
+        else:
+            try:
+                parsed[name] = int(value)
+            except (TypeError, ValueError):
+                try:
+                    parsed[name] = float(value)
+                except (TypeError, ValueError):
+                    parsed[name] = value
+    return parsed
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Materialized task summaries
+
+The sales aggregates of a completed task never change, so they are computed
+once, when the task completes, and stored in task_summaries. Summary
+requests then read a single row instead of grouping the task's sales_data.
+
+Backfill tasks completed before summaries were stored, from the backend
+directory:
+    python -m task_summary
+    python -m task_summary --force      # recompute existing summaries too
+"""
+
+import sys
+import logging
+import argparse
+from sqlalchemy import func, tuple_
+from models import SalesData, Task, TaskStatus, TaskSummary
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Summary sections: (response key, group-by columns, output names)
+GROUPINGS = (
+    ("sales_by_company", (SalesData.company,), ("company",)),
+    ("sales_by_time", (SalesData.year, SalesData.month), ("year", "month")),
+    ("sales_by_source", (SalesData.source,), ("source",)),
+    ("sales_by_model", (SalesData.car_model,), ("model",)),
+)
+
+# Every column any section groups by
+GROUP_COLUMNS = (SalesData.company, SalesData.year, SalesData.month, SalesData.source, SalesData.car_model)
+
+# Dialects that support GROUP BY GROUPING SETS and single-column GROUPING()
+GROUPING_SETS_DIALECTS = ('postgresql', 'mssql', 'oracle')
+
+
+def compute_summary(db, task_id):
+    """
+    Aggregate a task's sales_data rows by company, month, source and model
+
+    Where the dialect has GROUP BY GROUPING SETS all four sections come out
+    of a single scan of the task's rows. Elsewhere (SQLite) each section
+    runs its own GROUP BY: grouping by all the section columns at once and
+    rolling the groups up in Python was measured no faster there, as SQLite
+    sorts the task's rows for every GROUP BY either way.
+
+    Args:
+        db: SQLAlchemy session
+        task_id (int): Task owning the rows
+
+    Returns:
+        dict: One list of {..., count, total_sales} groups per section
+    """
+    if db.get_bind().dialect.name in GROUPING_SETS_DIALECTS:
+        groups = _grouping_sets_groups(db, task_id)
+    else:
+        groups = _section_groups(db, task_id)
+
+    summary = {}
+    for key, _, names in GROUPINGS:
+        # Ascending, NULL first, like a GROUP BY on SQLite
+        ordered = sorted(groups[key].items(), key=lambda item: [(v is not None, v) for v in item[0]])
+        summary[key] = [dict(zip(names, values), count=count, total_sales=float(total or 0))
+                        for values, (count, total) in ordered]
+    return summary
+
+
+def _section_positions():
+    """Positions in GROUP_COLUMNS of each section's columns"""
+    return {key: [GROUP_COLUMNS.index(column) for column in columns] for key, columns, _ in GROUPINGS}
+
+
+def grouping_sets_query(db, task_id):
+    """GROUPING SETS query of all summary sections, with a GROUPING() flag per section"""
+    flags = [func.grouping(columns[0]) for _, columns, _ in GROUPINGS]
+    return db.query(
+        *GROUP_COLUMNS,
+        *flags,
+        func.count(SalesData.id),
+        func.sum(SalesData.price)
+    ).filter(
+        SalesData.task_id == task_id
+    ).group_by(
+        func.grouping_sets(*(tuple_(*columns) for _, columns, _ in GROUPINGS))
+    )
+
+
+def _grouping_sets_groups(db, task_id):
+    positions = _section_positions()
+    groups = {key: {} for key, _, _ in GROUPINGS}
+    width = len(GROUP_COLUMNS)
+    for row in grouping_sets_query(db, task_id):
+        # GROUPING(column) is 0 only in the rows of the set grouping by it
+        flags = row[width:width + len(GROUPINGS)]
+        key = GROUPINGS[list(flags).index(0)][0]
+        groups[key][tuple(row[i] for i in positions[key])] = (row[-2], row[-1])
+    return groups
+
+
+def _section_groups(db, task_id):
+    groups = {}
+    for key, columns, _ in GROUPINGS:
+        rows = db.query(
+            *columns,
+            func.count(SalesData.id),
+            func.sum(SalesData.price)
+        ).filter(
+            SalesData.task_id == task_id
+        ).group_by(
+            *columns
+        )
+        groups[key] = {tuple(row[:len(columns)]): (row[-2], row[-1]) for row in rows}
+    return groups
+
+
+def store_summary(db, task_id):
+    """
+    Compute and store a task's summary in the current transaction
+
+    Returns:
+        dict: The summary
+    """
+    summary = compute_summary(db, task_id)
+    db.merge(TaskSummary(task_id=task_id, summary=summary))
+    return summary
+
+
+def load_summary(db, task_id):
+    """
+    Stored summary of a completed task, computed and stored on first use
+    if the task completed before summaries were materialized
+
+    Args:
+        db: SQLAlchemy session
+        task_id (int): Task owning the rows
+
+    Returns:
+        dict: The summary
+    """
+    stored = db.get(TaskSummary, task_id)
+    if stored is not None:
+        return stored.summary
+    summary = store_summary(db, task_id)
+    db.commit()
+    return summary
+
+
+def backfill(db, force=False):
+    """
+    Store summaries of completed tasks that have none
+
+    Args:
+        db: SQLAlchemy session
+        force (bool): Recompute summaries that already exist
+
+    Returns:
+        int: Number of summaries written
+    """
+    query = db.query(Task.id).filter(Task.status == TaskStatus.COMPLETED, Task.result_task_id.is_(None))
+    if not force:
+        query = query.outerjoin(TaskSummary, TaskSummary.task_id == Task.id).filter(TaskSummary.task_id.is_(None))
+    written = 0
+    for (task_id,) in query.order_by(Task.id).all():
+        store_summary(db, task_id)
+        db.commit()
+        written += 1
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Recompute summaries that already exist")
+    args = parser.parse_args(argv)
+
+    from database import MIGRATE_ON_STARTUP, SessionLocal, engine, init_db
+    if MIGRATE_ON_STARTUP:
+        init_db(engine)
+    db = SessionLocal()
+    try:
+        written = backfill(db, force=args.force)
+    finally:
+        db.close()
+    logger.info(f"Stored {written} task summaries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
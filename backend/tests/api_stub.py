@@ -0,0 +1,142 @@
+# backend/tests/api_stub.py
+"""
+Local stand-in for the paginated sales API used by APIDataSource
+
+Serves deterministic synthetic records from a ThreadingHTTPServer on
+127.0.0.1 so the client can be tested and benchmarked offline. Latency and
+transient failures can be injected to exercise concurrency and retries.
+"""
+
+import json
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+COMPANIES = {
+    "Tesla": ["Model 3", "Model Y", "Model S"],
+    "Nissan": ["Leaf", "Ariya"],
+    "BMW": ["i4", "iX"],
+}
+
+
+def generate_records(count):
+    """Build `count` records spread over 2023-2024"""
+    companies = list(COMPANIES)
+    start = datetime(2023, 1, 1)
+    records = []
+    for i in range(count):
+        company = companies[i % len(companies)]
+        models = COMPANIES[company]
+        records.append({
+            "company": company,
+            "car_model": models[(i // len(companies)) % len(models)],
+            "sale_date": (start + timedelta(hours=i * 7 % (2 * 365 * 24))).isoformat(),
+            "price": 30000 + (i * 37) % 50000,
+        })
+    return records
+
+
+class StubSalesAPI:
+    """
+    Paginated sales API server
+
+    Args:
+        records (list): Records to serve
+        latency (float): Seconds to sleep before answering each request
+        fail_first (int): Number of initial requests answered with HTTP 503
+    """
+    def __init__(self, records, latency=0.0, fail_first=0):
+        self.records = records
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/sales"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def query(self, params):
+        """Apply the pushed-down filters to the served records"""
+        records = self.records
+        if "start_date" in params:
+            records = [r for r in records if r["sale_date"] >= params["start_date"]]
+        if "end_date" in params:
+            records = [r for r in records if r["sale_date"] <= params["end_date"]]
+        if "companies" in params:
+            companies = set(params["companies"].split(","))
+            records = [r for r in records if r["company"] in companies]
+        if "models" in params:
+            models = set(params["models"].split(","))
+            records = [r for r in records if r["car_model"] in models]
+        return records
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the client's connection pool is actually exercised
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                with stub._lock:
+                    stub.requests.append(params)
+                    attempt = len(stub.requests)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    if attempt <= stub.fail_first:
+                        self._send(503, {"error": "try again"})
+                        return
+
+                    records = stub.query(params)
+                    page = int(params.get("page", 1))
+                    page_size = int(params.get("page_size", 100))
+                    self._send(200, {
+                        "data": records[(page - 1) * page_size:page * page_size],
+                        "page": page,
+                        "total_pages": max(1, math.ceil(len(records) / page_size)),
+                    })
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,11 +1,16 @@
 # backend/tests/conftest.py
+import time
 import pytest
+from datetime import datetime
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
-from app import app, get_db
-from models import Base
+import app as app_module
+import queue_manager as queue_manager_module
+from app import app, get_db, get_session_factory
+from models import Base, SalesData, Task, TaskStatus
+from tests.api_stub import StubSalesAPI, generate_records
 
 # Use in-memory SQLite for testing
 TEST_DATABASE_URL = "sqlite:///./test.db"
@@ -28,7 +33,11 @@ def test_db():
     Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture
-def client(test_db):
+def client(monkeypatch, test_db):
+    # The startup hook would migrate the real database; the test database
+    # is created by test_db
+    monkeypatch.setattr(app_module, "MIGRATE_ON_STARTUP", False)
+
     # Override the dependency to use the test database
     def override_get_db():
         try:
@@ -37,10 +46,30 @@ def client(test_db):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
     with TestClient(app) as client:
         yield client
     app.dependency_overrides = {}
 
+@pytest.fixture
+def legacy_engine(tmp_path):
+    # Database created before the dedup columns and the indexes were added
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE tasks (id INTEGER PRIMARY KEY, status VARCHAR(11), "
+                                "created_at DATETIME, updated_at DATETIME, parameters JSON)"))
+        connection.execute(text("CREATE TABLE sales_data (id INTEGER PRIMARY KEY, task_id INTEGER, source VARCHAR, "
+                                "company VARCHAR, car_model VARCHAR, sale_date DATETIME, price FLOAT, "
+                                "year INTEGER, month INTEGER)"))
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def api_stub():
+    # Local paginated sales API for APIDataSource
+    with StubSalesAPI(generate_records(250)) as stub:
+        yield stub
+
 @pytest.fixture
 def test_user():
     return {
@@ -60,4 +89,66 @@ def auth_headers(client, test_user):
         }
     )
     token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {token}"}
+
+class SlowSource:
+    """Stand-in data source that takes `delay` seconds to produce its rows"""
+    delay = 0.3
+
+    def __init__(self, company, fail=False, source="test"):
+        self.company = company
+        self.fail = fail
+        self.source = source
+
+    def get_data_chunks(self, filters=None, chunk_size=None):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.company} feed unavailable")
+        yield [{"company": self.company, "car_model": "X", "sale_date": "2024-01-01T00:00:00", "price": 1}]
+
+    def save_data(self, session, task_id, data, bulk=False, batch_size=None, commit=True):
+        rows = [SalesData(task_id=task_id, source=self.source, company=r["company"], price=r["price"]) for r in data]
+        session.add_all(rows)
+        if commit:
+            session.commit()
+        return {"rows": len(rows)}
+
+@pytest.fixture
+def task_id(test_db):
+    task = Task(parameters={"source_a": {}, "source_b": {}, "source_c": {}})
+    test_db.add(task)
+    test_db.commit()
+    return task.id
+
+@pytest.fixture
+def completed_task(test_db):
+    task = Task(parameters={}, status=TaskStatus.COMPLETED)
+    test_db.add(task)
+    test_db.commit()
+    test_db.add_all([SalesData(task_id=task.id, source="source_a", company=company, car_model=model,
+                               sale_date=datetime(2023, month, 1), price=100.0 * month, year=2023, month=month)
+                     for month, (company, model) in enumerate([("Kia", "Rio"), ("BMW", "X3"), ("Kia", "Soul"),
+                                                                ("Ford", "Focus"), ("Kia", "Rio")], start=1)])
+    test_db.commit()
+    return task.id
+
+def use_sources(monkeypatch, failing=()):
+    for name, company in (("JSONDataSource", "A"), ("CSVDataSource", "B"), ("APIDataSource", "C")):
+        monkeypatch.setattr(queue_manager_module, name,
+                            lambda company=company: SlowSource(company, fail=company in failing))
+
+def wait_for_tasks(session, task_ids, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        session.expire_all()
+        statuses = [session.get(Task, task_id).status for task_id in task_ids]
+        if all(status in (TaskStatus.COMPLETED, TaskStatus.FAILED) for status in statuses):
+            return statuses
+        time.sleep(0.05)
+    raise AssertionError(f"Tasks {task_ids} did not finish")
+
+def add_tasks(session, count):
+    tasks = [Task(parameters={"source_a": {}, "source_b": {}, "source_c": {}}) for _ in range(count)]
+    session.add_all(tasks)
+    session.commit()
+    return [task.id for task in tasks]
@@ -1,6 +1,13 @@
 # backend/tests/test_app.py
+import csv
+import json
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+import task_data
+from task_data import export_rows
+from tests.conftest import engine
 
 def test_get_tasks_empty(client, auth_headers):
     response = client.get("/api/tasks", headers=auth_headers)
@@ -51,4 +58,81 @@ def test_get_models_empty(client, auth_headers):
     response = client.get("/api/models", headers=auth_headers)
     assert response.status_code == 200
     # Initially may be empty until data is processed
-    assert isinstance(response.json(), list)
\ No newline at end of file
+    assert isinstance(response.json(), list)
+
+def test_task_data_pages_by_cursor(client, auth_headers, completed_task):
+    url = f"/api/tasks/{completed_task}/data"
+    rows, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client.get(url, params=params, headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        rows += response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert [row["month"] for row in rows] == [1, 2, 3, 4, 5]
+    assert rows[0] == {"id": rows[0]["id"], "task_id": completed_task, "source": "source_a", "company": "Kia",
+                       "car_model": "Rio", "sale_date": "2023-01-01T00:00:00", "price": 100.0, "year": 2023,
+                       "month": 1}
+
+def test_task_data_without_limit_or_cursor_returns_every_row(monkeypatch, client, auth_headers, completed_task):
+    monkeypatch.setattr(task_data, "DATA_PAGE_SIZE", 2)
+    monkeypatch.setattr(task_data, "EXPORT_BATCH_SIZE", 2)
+    url = f"/api/tasks/{completed_task}/data"
+
+    response = client.get(url, headers=auth_headers)
+    assert response.headers["content-type"] == "application/json"
+    assert "X-Next-Cursor" not in response.headers
+    assert [row["month"] for row in response.json()] == [1, 2, 3, 4, 5]
+    assert response.json() == client.get(url, params={"limit": 5}, headers=auth_headers).json()
+
+    assert client.get(url, params={"company": "Audi"}, headers=auth_headers).json() == []
+    assert len(client.get(url, params={"cursor": 0}, headers=auth_headers).json()) == 2
+
+def test_task_data_projection_and_filters(client, auth_headers, completed_task):
+    url = f"/api/tasks/{completed_task}/data"
+    response = client.get(url, params={"fields": "price,company", "company": "Kia", "model": ["Rio", "Soul"],
+                                       "start_date": "2023-02-01"}, headers=auth_headers)
+    assert [sorted(row) for row in response.json()] == [["company", "id", "price"]] * 2
+    assert [row["price"] for row in response.json()] == [300.0, 500.0]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get(url, params={"fields": "price,secret"}, headers=auth_headers).status_code == 400
+    assert client.get(url, params={"end_date": "yesterday"}, headers=auth_headers).status_code == 400
+
+def test_task_export_streams_ndjson_and_csv(monkeypatch, client, auth_headers, completed_task):
+    monkeypatch.setattr(task_data, "EXPORT_BATCH_SIZE", 2)
+    url = f"/api/tasks/{completed_task}/export"
+
+    response = client.get(url, headers=auth_headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["month"] for row in rows] == [1, 2, 3, 4, 5]
+    assert rows[0]["sale_date"] == "2023-01-01T00:00:00"
+
+    response = client.get(url, params={"format": "csv", "fields": "company,price", "company": "Kia"},
+                          headers=auth_headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    assert f'filename="task_{completed_task}.csv"' in response.headers["content-disposition"]
+    lines = list(csv.reader(response.text.splitlines()))
+    assert lines[0] == ["id", "company", "price"]
+    assert [line[1:] for line in lines[1:]] == [["Kia", "100.0"], ["Kia", "300.0"], ["Kia", "500.0"]]
+
+    assert client.get(url, params={"format": "xml"}, headers=auth_headers).status_code == 400
+    assert client.get("/api/tasks/999/export", headers=auth_headers).status_code == 404
+
+def test_task_export_closes_its_session(completed_task):
+    closed = []
+
+    class RecordingSession(Session):
+        def close(self):
+            closed.append(self)
+            super().close()
+
+    rows = export_rows(sessionmaker(bind=engine, class_=RecordingSession), completed_task, "ndjson", batch_size=2)
+    next(rows)
+    assert closed == []
+    rows.close()
+    assert len(closed) == 1
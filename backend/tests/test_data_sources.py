@@ -0,0 +1,321 @@
+# backend/tests/test_data_sources.py
+import csv
+import io
+import json
+import os
+import random
+import pytest
+from datetime import datetime, timedelta
+
+from data_sources.api_source import APIDataSource
+from data_sources.csv_source import CSVDataSource
+from data_sources.dates import DateParser
+from data_sources.records import RecordFilter, SaleRecord, sales_rows
+from models import SalesData
+from data_sources.json_source import JSONDataSource, _iter_json_array
+from data_sources.snapshot import SnapshotCache, SourceSnapshot, snapshot_cache
+from data_sources import column_store, columnar
+from tests.api_stub import StubSalesAPI, generate_records
+
+SAMPLE_RECORDS = [
+    {"company": "Toyota", "car_model": "Camry", "sale_date": "2023-01-15T12:30:00", "price": 28000},
+    {"company": "Honda", "car_model": "Civic", "sale_date": "2023-05-12T11:10:00", "price": 22500},
+    {"company": "Toyota", "car_model": "RAV4", "sale_date": "2024-01-15T12:30:00", "price": 30000},
+    {"company": "Ford", "car_model": "Explorer", "sale_date": "2024-03-05T09:15:00", "price": 38000},
+]
+
+@pytest.fixture
+def json_file(tmp_path):
+    path = tmp_path / "sales.json"
+    path.write_text(json.dumps(SAMPLE_RECORDS, indent=2))
+    return str(path)
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "sales.csv"
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=["company", "car_model", "sale_date", "price"])
+        writer.writeheader()
+        writer.writerows(SAMPLE_RECORDS)
+    return str(path)
+
+@pytest.mark.parametrize("read_size", [1, 7, 64, 65536])
+def test_iter_json_array_across_read_boundaries(read_size):
+    text = json.dumps(SAMPLE_RECORDS + [12345, "a,]b", [1, 2]], indent=2)
+    parsed = list(_iter_json_array(io.StringIO(text), read_size=read_size))
+    assert parsed == SAMPLE_RECORDS + [12345, "a,]b", [1, 2]]
+
+def test_iter_json_array_empty_and_invalid():
+    assert list(_iter_json_array(io.StringIO("  [ ] "))) == []
+    with pytest.raises(ValueError):
+        list(_iter_json_array(io.StringIO('{"company": "Toyota"}')))
+    with pytest.raises(ValueError):
+        list(_iter_json_array(io.StringIO('[{"company": "Toyota"}')))
+
+def test_json_streaming_matches_get_data(json_file):
+    source = JSONDataSource(json_file)
+    filters = {"companies": ["Toyota"], "start_date": "2023-01-01"}
+
+    chunks = list(source.get_data_chunks(filters, chunk_size=1))
+
+    assert all(len(chunk) == 1 for chunk in chunks)
+    assert [record for chunk in chunks for record in chunk] == source.get_data(filters)
+    assert len(chunks) == 2
+
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_csv_filters_match_dictreader_semantics(csv_file, use_cache):
+    with open(csv_file, 'a', newline='') as f:
+        f.write("\nToyota,Corolla,not-a-date,21000\nToyota,Yaris\nHonda,Fit,2023-06-01,18000\n")
+    source = CSVDataSource(csv_file, use_cache=use_cache)
+
+    toyota = source.get_data({"companies": ["Toyota"]})
+    assert [r.car_model for r in toyota] == ["Camry", "RAV4"]
+
+    # Date-only values fall back to strptime; a short row has no sale_date and is dropped
+    by_model = source.get_data({"models": ["Fit", "Yaris"]})
+    assert by_model == [SaleRecord("Honda", "Fit", datetime(2023, 6, 1), 18000.0, 2023, 6)]
+
+def test_csv_missing_columns_read_as_defaults(tmp_path):
+    path = tmp_path / "no_price.csv"
+    path.write_text("car_model,company\nCamry,Toyota\nCivic\n")
+    assert CSVDataSource(str(path), use_cache=False).get_data() == [
+        SaleRecord("Toyota", "Camry", None, 0.0, None, None), SaleRecord(None, "Civic", None, 0.0, None, None)]
+    assert CSVDataSource(str(path), use_cache=False).get_data({"start_date": "2023-01-01"}) == []
+
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_csv_chunks_are_bounded(csv_file, use_cache):
+    source = CSVDataSource(csv_file, use_cache=use_cache)
+    chunks = list(source.get_data_chunks({"start_date": "2023-02-01"}, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert [r for chunk in chunks for r in chunk] == source.get_data({"start_date": "2023-02-01"})
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_save_data_modes_store_identical_rows(test_db, json_file, bulk):
+    source = JSONDataSource(json_file)
+    stats = source.save_data(test_db, 1, source.get_data(), bulk=bulk, batch_size=3)
+
+    assert stats["rows"] == len(SAMPLE_RECORDS)
+    assert stats["rows_per_second"] > 0
+    saved = test_db.query(SalesData).order_by(SalesData.id).all()
+    assert [(r.source, r.company, r.price, r.year, r.month) for r in saved] == [
+        ("source_a", "Toyota", 28000.0, 2023, 1),
+        ("source_a", "Honda", 22500.0, 2023, 5),
+        ("source_a", "Toyota", 30000.0, 2024, 1),
+        ("source_a", "Ford", 38000.0, 2024, 3),
+    ]
+
+def test_api_fetches_every_page_in_order(api_stub):
+    source = APIDataSource(api_stub.url, page_size=20, max_in_flight=4)
+    assert [r.company for r in source.get_data()] == [r["company"] for r in api_stub.records]
+    assert len(api_stub.requests) == 13
+    assert api_stub.max_in_flight <= 4
+
+def test_api_keeps_one_date_parser_per_fetch():
+    records = generate_records(50)
+    records[0]["sale_date"] = records[30]["sale_date"] = "someday"
+    with StubSalesAPI(records) as stub:
+        source = APIDataSource(stub.url, page_size=20)
+        assert len(source.get_data()) == 48
+    stats = source.date_parser.stats()
+    assert (stats["fallbacks"], stats["hits"], stats["failures"]) == (2, 1, 2)
+
+def test_api_pushes_filters_down(api_stub):
+    filters = {"companies": ["Tesla", "BMW"], "models": ["Model Y", "iX"], "start_date": "2023-06-01"}
+    source = APIDataSource(api_stub.url, page_size=10)
+    data = source.get_data(filters)
+
+    expected = api_stub.query({"companies": "Tesla,BMW", "models": "Model Y,iX", "start_date": "2023-06-01"})
+    assert [r.sale_date.isoformat() for r in data] == [r["sale_date"] for r in expected]
+    assert api_stub.requests[0]["companies"] == "Tesla,BMW"
+    assert api_stub.requests[0]["start_date"] == "2023-06-01"
+
+def test_api_retries_transient_errors(api_stub):
+    api_stub.fail_first = 2
+    source = APIDataSource(api_stub.url, page_size=100, backoff=0.01)
+    assert len(source.get_data()) == 250
+
+    api_stub.requests.clear()
+    api_stub.fail_first = 10
+    source = APIDataSource(api_stub.url, page_size=100, max_retries=1, backoff=0.01)
+    with pytest.raises(RuntimeError, match="failed after 2 attempts"):
+        list(source.get_data_chunks())
+
+def test_records_are_parsed_once_into_typed_values(json_file):
+    records = JSONDataSource(json_file).get_data({"models": ["Civic"]})
+    assert records == [SaleRecord("Honda", "Civic", datetime(2023, 5, 12, 11, 10), 22500.0, 2023, 5)]
+    row, = sales_rows(records, 7, "source_a")
+    assert row == {"task_id": 7, "source": "source_a", "company": "Honda", "car_model": "Civic",
+                   "sale_date": datetime(2023, 5, 12, 11, 10), "price": 22500.0, "year": 2023, "month": 5}
+
+def test_date_parser_memoizes_and_remembers_fallback_format():
+    parser = DateParser(formats=("%d/%m/%Y",), memo_size=2)
+
+    assert parser("2023-01-15") == datetime(2023, 1, 15)
+    assert parser("15/02/2023") == datetime(2023, 2, 15)
+    assert parser.preferred_format == "%d/%m/%Y"
+    assert parser("15/02/2023") == datetime(2023, 2, 15)
+    assert parser("16/02/2023") == datetime(2023, 2, 16)
+    assert parser("garbage") is None
+    assert parser(["unhashable"]) is None
+
+    stats = parser.stats()
+    assert (stats["fallbacks"], stats["hits"], stats["misses"]) == (4, 1, 3)
+    assert stats["size"] == 2
+    assert stats["formats"] == {"%d/%m/%Y": 2}
+    assert stats["failures"] == 2
+
+def test_csv_source_reports_date_memo_hits(csv_file):
+    with open(csv_file, 'a', newline='') as f:
+        f.write("Toyota,Camry,2023-1-15,28000\n" * 3)
+    source = CSVDataSource(csv_file)
+    assert len(source.get_data()) == 7
+    assert (source.date_parser.stats()["fallbacks"], source.date_parser.stats()["hits"]) == (3, 2)
+
+def test_date_parser_skips_memo_for_iso_dates():
+    parser = DateParser(memo_size=4)
+    for day in range(1, 11):
+        assert parser(f"2023-01-{day:02d}") == datetime(2023, 1, day)
+
+    stats = parser.stats()
+    assert (stats["fallbacks"], stats["size"]) == (0, 0)
+
+SNAPSHOT_FILTERS = [
+    {},
+    {"companies": ["Toyota"]},
+    {"models": ["Civic", "Explorer"], "companies": ["Honda", "Ford", "Kia"]},
+    {"start_date": "2023-05-12T11:10:00", "end_date": "2024-01-15T12:30:00"},
+    {"start_date": "2024-01-01"},
+    {"end_date": "2022-01-01"},
+]
+
+@pytest.mark.parametrize("filters", SNAPSHOT_FILTERS)
+def test_snapshot_select_matches_streaming(json_file, filters):
+    records = [{"company": "Kia", "car_model": "Soul", "price": 15000}] + SAMPLE_RECORDS[::-1] + SAMPLE_RECORDS[:2]
+    with open(json_file, 'w') as f:
+        json.dump(records, f)
+    streamed = list(JSONDataSource(json_file, use_cache=False).iter_data(filters))
+    snapshot = SourceSnapshot.from_records(JSONDataSource(json_file, use_cache=False).iter_data({}))
+    # Snapshots return rows by sale date, undated rows last, file order within a date
+    expected = sorted(streamed, key=lambda r: (r.sale_date is None, r.sale_date or datetime.min))
+    assert list(snapshot.select(filters)) == expected
+
+def test_snapshot_date_range_only_visits_matching_rows():
+    days = [datetime(2023, 1, 1 + i % 28) for i in range(280)]
+    records = [SaleRecord("Toyota", "Camry", day, 1000.0 + i, day.year, day.month) for i, day in enumerate(days)]
+    snapshot = SourceSnapshot.from_records(records)
+    filters = {"start_date": "2023-01-10", "end_date": "2023-01-11"}
+
+    assert snapshot.row_range(filters) == (90, 110)
+    selected = list(snapshot.select(filters))
+    assert [r.price for r in selected[:10]] == [1009.0 + 28 * i for i in range(10)]
+    assert list(snapshot.select({"start_date": "2023-02-01"})) == []
+    assert list(snapshot.select({"start_date": "2023-01-20", "end_date": "2023-01-10"})) == []
+
+def test_snapshot_cache_reuses_and_rebuilds_on_change(csv_file):
+    hits, misses = snapshot_cache.hits, snapshot_cache.misses
+    first = CSVDataSource(csv_file).get_data({"companies": ["Toyota"]})
+    second = CSVDataSource(csv_file).get_data({"companies": ["Toyota"]})
+    assert first == second and len(first) == 2
+    assert (snapshot_cache.hits - hits, snapshot_cache.misses - misses) == (1, 1)
+
+    with open(csv_file, 'a', newline='') as f:
+        f.write("Toyota,Corolla,2024-06-01,21000\n")
+    assert len(CSVDataSource(csv_file).get_data({"companies": ["Toyota"]})) == 3
+    assert snapshot_cache.misses - misses == 2
+
+def test_snapshot_cache_evicts_least_recently_used(tmp_path):
+    cache = SnapshotCache()
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps(SAMPLE_RECORDS))
+        paths.append(str(path))
+    build = lambda path: lambda: JSONDataSource(path, use_cache=False).build_snapshot()
+
+    size = cache.get(paths[0], build(paths[0])).nbytes
+    cache.max_bytes = 2 * size
+    cache.get(paths[1], build(paths[1]))
+    cache.get(paths[0], build(paths[0]))
+    cache.get(paths[2], build(paths[2]))
+
+    assert cache.stats()["entries"] == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.get(paths[0], build(paths[0]))
+    assert cache.hits == 2
+
+def test_snapshot_indexes_match_a_full_scan():
+    rng = random.Random(7)
+    start = datetime(2022, 1, 1)
+    records = []
+    for i in range(2000):
+        day = start + timedelta(days=rng.randrange(400)) if i % 50 else None
+        records.append(SaleRecord(f"C{rng.randrange(5)}", f"M{rng.randrange(40)}", day, float(i),
+                                  day and day.year, day and day.month))
+    snapshot = SourceSnapshot.from_records(records)
+    by_date = sorted(records, key=lambda r: (r.sale_date is None, r.sale_date or datetime.min))
+
+    for _ in range(50):
+        filters = {}
+        if rng.random() < 0.6:
+            filters["companies"] = rng.sample(["C0", "C1", "C2", "C3", "C4", "C9"], rng.randrange(1, 4))
+        if rng.random() < 0.6:
+            filters["models"] = [f"M{rng.randrange(45)}" for _ in range(rng.randrange(1, 8))]
+        if rng.random() < 0.5:
+            filters["start_date"] = (start + timedelta(days=rng.randrange(400))).isoformat()
+        if rng.random() < 0.5:
+            filters["end_date"] = (start + timedelta(days=rng.randrange(400))).isoformat()
+        record_filter = RecordFilter(filters)
+        expected = [r for r in by_date
+                    if record_filter.matches_labels(r.company, r.car_model) and record_filter.matches_date(r.sale_date)]
+        assert list(snapshot.select(filters)) == expected, filters
+        assert snapshot.count(filters) == len(expected), filters
+
+@pytest.mark.parametrize("filters", SNAPSHOT_FILTERS)
+def test_numpy_engine_matches_streaming(json_file, filters):
+    pytest.importorskip("numpy")
+    records = [{"company": "Kia", "car_model": "Soul", "price": 15000}] + SAMPLE_RECORDS[::-1] + SAMPLE_RECORDS[:2]
+    with open(json_file, 'w') as f:
+        json.dump(records, f)
+    streamed = list(JSONDataSource(json_file, use_cache=False).iter_data(filters))
+    source = JSONDataSource(json_file, engine="numpy")
+    assert list(source.iter_data(filters)) == streamed
+    assert source.count_data(filters) == len(streamed)
+
+def test_snapshot_engines_are_cached_separately(csv_file):
+    pytest.importorskip("numpy")
+    python_rows = CSVDataSource(csv_file, engine="python").get_data({})
+    numpy_rows = CSVDataSource(csv_file, engine="numpy").get_data({})
+    assert python_rows == numpy_rows
+    engines = {engine for engine, version in snapshot_cache._entries if version[0] == csv_file}
+    assert engines == {"python", "numpy"}
+
+def test_numpy_engine_falls_back_without_numpy(monkeypatch):
+    monkeypatch.setattr(columnar, "np", None)
+    assert columnar.snapshot_type("numpy") is SourceSnapshot
+    with pytest.raises(ValueError):
+        columnar.snapshot_type("pandas")
+
+def test_column_store_compiles_once_and_maps_columns(csv_file):
+    np = pytest.importorskip("numpy")
+    source = CSVDataSource(csv_file, use_cache=False, engine="numpy", column_store=True)
+    expected = CSVDataSource(csv_file, use_cache=False).get_data({"companies": ["Toyota"]})
+
+    first = source.build_snapshot()
+    assert isinstance(first.prices, np.memmap)
+    assert sorted(first.select({"companies": ["Toyota"]})) == sorted(expected)
+
+    directory = column_store.store_path(csv_file)
+    mtime = os.path.getmtime(os.path.join(directory, "prices.npy"))
+    source.build_snapshot()
+    assert os.path.getmtime(os.path.join(directory, "prices.npy")) == mtime
+
+def test_column_store_rebuilds_when_source_changes(csv_file):
+    pytest.importorskip("numpy")
+    compiled = column_store.compile_sources([csv_file])
+    with open(csv_file, 'a', newline='') as f:
+        f.write("Toyota,Corolla,2024-06-01,21000\n")
+
+    rows = CSVDataSource(csv_file, engine="numpy").get_data({"companies": ["Toyota"]})
+    assert len(rows) == 3
+    store_dir = os.path.dirname(compiled[csv_file])
+    assert os.listdir(store_dir) == [os.path.basename(column_store.store_path(csv_file))]
@@ -0,0 +1,66 @@
+# backend/tests/test_indexes.py
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event, inspect
+
+from database import migrate_schema
+from tests.conftest import engine
+
+# A full table scan in SQLite's EXPLAIN QUERY PLAN output; scans through an
+# index read "SCAN <table> USING ... INDEX ..."
+FULL_SCAN = re.compile(r"SCAN (sales_data|tasks)$")
+
+@contextmanager
+def captured_selects():
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+def query_plans(statements):
+    with engine.connect() as connection:
+        return [detail for statement, parameters in statements
+                for *_, detail in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+def get_plans(client, auth_headers, url):
+    with captured_selects() as statements:
+        response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    plans = query_plans(statements)
+    assert not [detail for detail in plans if FULL_SCAN.match(detail)], plans
+    assert not [detail for detail in plans if "TEMP B-TREE FOR ORDER BY" in detail or "FOR DISTINCT" in detail], plans
+    return plans
+
+def test_task_list_uses_created_at_index(client, auth_headers, completed_task):
+    plans = get_plans(client, auth_headers, "/api/tasks")
+    assert "SCAN tasks USING INDEX ix_tasks_created_at" in plans
+
+def test_task_data_and_summary_search_by_task(client, auth_headers, completed_task):
+    for url in (f"/api/tasks/{completed_task}/data", f"/api/tasks/{completed_task}/data?limit=1&cursor=1&fields=price",
+                f"/api/tasks/{completed_task}/data?company=Kia&company=BMW",
+                f"/api/tasks/{completed_task}/summary"):
+        plans = get_plans(client, auth_headers, url)
+        assert [detail for detail in plans
+                if detail.startswith("SEARCH sales_data USING INDEX ix_sales_data_task_id_")], (url, plans)
+
+def test_company_and_model_lists_scan_covering_indexes(client, auth_headers, completed_task):
+    assert "SCAN sales_data USING COVERING INDEX ix_sales_data_company" in \
+        get_plans(client, auth_headers, "/api/companies")
+    assert "SCAN sales_data USING COVERING INDEX ix_sales_data_car_model" in \
+        get_plans(client, auth_headers, "/api/models")
+
+def test_migrate_schema_adds_indexes(legacy_engine):
+    added = migrate_schema(legacy_engine)
+    assert {"ix_tasks_created_at", "ix_sales_data_task_id_id", "ix_sales_data_task_id_company",
+            "ix_sales_data_task_id_year_month", "ix_sales_data_company", "ix_sales_data_car_model"} <= set(added)
+    indexes = {index["name"]: index["column_names"] for index in inspect(legacy_engine).get_indexes("sales_data")}
+    assert indexes["ix_sales_data_task_id_year_month"] == ["task_id", "year", "month"]
+    assert migrate_schema(legacy_engine) == []
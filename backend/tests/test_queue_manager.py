@@ -0,0 +1,234 @@
+# backend/tests/test_queue_manager.py
+import time
+import threading
+import pytest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import app as app_module
+import queue_manager as queue_manager_module
+from queue_manager import QueueManager
+from task_dedup import source_version
+from task_progress import TaskProgress, parse_progress
+from models import Task, TaskStatus, SalesData
+from tests.conftest import SlowSource, TestingSessionLocal, add_tasks, use_sources, wait_for_tasks
+
+@pytest.fixture
+def manager():
+    return QueueManager(TestingSessionLocal, use_redis=False)
+
+def test_sources_are_fetched_concurrently(monkeypatch, manager, task_id, test_db):
+    use_sources(monkeypatch)
+
+    start = time.perf_counter()
+    manager._process_task(task_id)
+    elapsed = time.perf_counter() - start
+
+    # Three 0.3s sources run side by side rather than back to back
+    assert elapsed < 3 * SlowSource.delay
+    assert test_db.query(Task).get(task_id).status == TaskStatus.COMPLETED
+    assert sorted(r.company for r in test_db.query(SalesData).all()) == ["A", "B", "C"]
+
+def test_source_failure_fails_task(monkeypatch, manager, task_id, test_db):
+    use_sources(monkeypatch, failing=("B",))
+
+    with pytest.raises(RuntimeError, match="B feed unavailable"):
+        manager._process_task(task_id)
+
+    test_db.expire_all()
+    assert test_db.query(Task).get(task_id).status == TaskStatus.FAILED
+
+def test_thread_workers_process_tasks_concurrently(monkeypatch, test_db):
+    use_sources(monkeypatch)
+    manager = QueueManager(TestingSessionLocal, use_redis=False, workers=3)
+    task_ids = add_tasks(test_db, 3)
+
+    start = time.perf_counter()
+    manager.start()
+    try:
+        for task_id in task_ids:
+            manager.add_task(task_id)
+        assert wait_for_tasks(test_db, task_ids) == [TaskStatus.COMPLETED] * 3
+        elapsed = time.perf_counter() - start
+    finally:
+        manager.stop()
+
+    # Three tasks of one 0.3s fetch each overlap instead of queueing
+    assert elapsed < 3 * SlowSource.delay
+    stats = manager.get_queue_stats()
+    assert [w["worker_id"] for w in stats["workers"]] == ["worker-0", "worker-1", "worker-2"]
+    assert sum(w["tasks_completed"] for w in stats["workers"]) == 3
+    assert all(w["state"] == "idle" and w["current_task"] is None for w in stats["workers"])
+
+def test_process_workers_run_tasks_in_pool(test_db):
+    manager = QueueManager(TestingSessionLocal, use_redis=False, workers=2, worker_mode="process")
+    task_ids = add_tasks(test_db, 2)
+
+    manager.start()
+    try:
+        for task_id in task_ids:
+            manager.add_task(task_id)
+        assert wait_for_tasks(test_db, task_ids, timeout=60) == [TaskStatus.COMPLETED] * 2
+        # Progress is shared with the pool processes, and dropped once a task finishes
+        assert type(manager.task_progress).__name__ == "DictProxy"
+        deadline = time.monotonic() + 5
+        while any(manager.get_task_progress(task_id) for task_id in task_ids) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert [manager.get_task_progress(task_id) for task_id in task_ids] == [{}, {}]
+    finally:
+        manager.stop()
+
+    for task_id in task_ids:
+        assert test_db.query(SalesData).filter(SalesData.task_id == task_id).count() > 0
+    stats = manager.get_queue_stats()
+    assert stats["worker_mode"] == "process"
+    assert sum(w["tasks_completed"] for w in stats["workers"]) == 2
+
+def test_broken_pool_is_replaced_once(monkeypatch):
+    # All three workers are waiting on the pool when it breaks
+    waiting = threading.Barrier(3)
+
+    class BrokenPool:
+        shutdowns = 0
+
+        def submit(self, *args):
+            waiting.wait(timeout=5)
+            future = Future()
+            future.set_exception(BrokenProcessPool("a pool process died"))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shutdowns += 1
+
+    manager = QueueManager(TestingSessionLocal, use_redis=False)
+    broken = manager.process_pool = BrokenPool()
+    manager.running = True
+    replacements = []
+    monkeypatch.setattr(manager, "_create_process_pool", lambda: replacements.append(object()) or replacements[-1])
+
+    errors = []
+    def run(worker_id):
+        try:
+            manager._run_task(worker_id, worker_id)
+        except BrokenProcessPool as e:
+            errors.append(e)
+    workers = [threading.Thread(target=run, args=(worker_id,)) for worker_id in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=10)
+
+    assert len(errors) == 3
+    assert (len(replacements), broken.shutdowns) == (1, 1)
+    assert manager.process_pool is replacements[0]
+
+def test_pool_processes_share_progress_with_the_parent(monkeypatch, task_id):
+    use_sources(monkeypatch)
+    # Stands in for the parent's shared dict in a pool process
+    class SharedProgress(dict):
+        writes = []
+        def __setitem__(self, key, value):
+            self.writes.append(value)
+            super().__setitem__(key, value)
+
+    shared = SharedProgress()
+    database_url = TestingSessionLocal.kw["bind"].url.render_as_string(hide_password=False)
+    queue_manager_module._init_process_worker(database_url, {"use_redis": False}, shared)
+    assert queue_manager_module._process_task_in_worker(task_id) == 3
+    assert shared.writes[-1]["rows_persisted"] == 3 and shared == {}
+
+class ChunkedSource(SlowSource):
+    """Stand-in source yielding three chunks of two rows, failing before the third `failures` times"""
+    delay = 0
+    expected_rows = 6
+    failures = 0
+    resumable = True
+
+    def get_data_chunks(self, filters=None, chunk_size=None):
+        for chunk in range(3):
+            if chunk == 2 and ChunkedSource.failures:
+                ChunkedSource.failures -= 1
+                raise RuntimeError("connection reset")
+            yield [{"company": self.company, "car_model": "X", "sale_date": None, "price": chunk}] * 2
+
+def use_chunked_sources(monkeypatch, failures, resumable=("A", "B", "C")):
+    monkeypatch.setattr(ChunkedSource, "failures", failures)
+    for name, company, key in (("JSONDataSource", "A", "source_a"), ("CSVDataSource", "B", "source_b"),
+                               ("APIDataSource", "C", "source_c")):
+        def create(company=company, key=key):
+            source = ChunkedSource(company, source=key)
+            source.resumable = company in resumable
+            return source
+        monkeypatch.setattr(queue_manager_module, name, create)
+
+def test_failed_task_resumes_after_committed_chunks(monkeypatch, manager, task_id, test_db):
+    use_chunked_sources(monkeypatch, failures=1)
+    writes = []
+    monkeypatch.setattr(manager, "_progress_writer", lambda task_id: writes.append)
+    with pytest.raises(RuntimeError, match="connection reset"):
+        manager._process_task(task_id)
+
+    # The failing source's first two chunks were committed with the checkpoint
+    test_db.expire_all()
+    task = test_db.get(Task, task_id)
+    saved = test_db.query(SalesData).filter(SalesData.task_id == task_id).count()
+    assert task.checkpoint["source_a"] == 4 and sum(task.checkpoint.values()) == saved
+
+    assert manager._process_task(task_id) == 18
+    test_db.expire_all()
+    prices = sorted(r.price for r in test_db.query(SalesData).filter(SalesData.company == "A"))
+    assert prices == [0, 0, 1, 1, 2, 2]
+    progress = parse_progress(writes[-1])
+    assert (progress["rows_persisted"], progress["rows_expected"]) == (18, 18)
+    assert progress["sources"]["source_a"] == {"fetched": 6, "persisted": 6, "expected": 6, "done": True}
+
+def test_unresumable_sources_are_fetched_again(monkeypatch, manager, task_id, test_db):
+    use_chunked_sources(monkeypatch, failures=0, resumable=("A", "B"))
+    task = test_db.get(Task, task_id)
+    task.status = TaskStatus.FAILED
+    task.source_version = source_version(queue_manager_module.create_sources())
+    task.checkpoint = {"source_a": 2, "source_c": 2}
+    # Saved by the earlier run, from what the API served back then
+    test_db.add_all([SalesData(task_id=task_id, source=key, company=company, price=-1)
+                     for key, company in (("source_a", "A"), ("source_c", "C")) for _ in range(2)])
+    test_db.commit()
+
+    assert manager._process_task(task_id) == 18
+    test_db.expire_all()
+    prices = {company: sorted(r.price for r in test_db.query(SalesData).filter(SalesData.company == company))
+              for company in ("A", "C")}
+    # A skipped the rows it had saved; C discarded them and started over
+    assert prices == {"A": [-1, -1, 1, 1, 2, 2], "C": [0, 0, 1, 1, 2, 2]}
+
+def test_task_commits_at_once_without_chunk_commits(monkeypatch, task_id, test_db):
+    use_chunked_sources(monkeypatch, failures=1)
+    manager = QueueManager(TestingSessionLocal, use_redis=False, chunk_commits=False)
+    with pytest.raises(RuntimeError):
+        manager._process_task(task_id)
+
+    test_db.expire_all()
+    assert test_db.query(SalesData).count() == 0
+    assert test_db.get(Task, task_id).checkpoint == {}
+
+def test_progress_reports_eta_once_totals_are_known():
+    sources = {"source_a": ChunkedSource("A"), "source_b": SlowSource("B")}
+    writes = []
+    progress = TaskProgress(1, sources, writes.append, interval=0)
+    progress.add_persisted("source_a", 3)
+    assert writes[-1]["progress"] == "" and writes[-1]["rows_persisted"] == 3
+
+    # Finished sources count with the rows they produced
+    progress.add_persisted("source_b", 1)
+    progress.source_done("source_b")
+    assert writes[-1]["progress"] == 57 and writes[-1]["rows_expected"] == 7
+    assert writes[-1]["eta_seconds"] >= 0
+
+def test_resume_endpoint_requeues_failed_task(monkeypatch, client, auth_headers, task_id, test_db):
+    queued = []
+    monkeypatch.setattr(app_module.queue_manager, "add_task", lambda task_id, *args: queued.append(task_id))
+    assert client.post(f"/api/tasks/{task_id}/resume", headers=auth_headers).status_code == 400
+
+    test_db.get(Task, task_id).status = TaskStatus.FAILED
+    test_db.commit()
+    response = client.post(f"/api/tasks/{task_id}/resume", headers=auth_headers)
+    assert (response.status_code, response.json()["status"], queued) == (200, "pending", [task_id])
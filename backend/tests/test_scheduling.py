@@ -0,0 +1,59 @@
+# backend/tests/test_scheduling.py
+import queue
+from collections import Counter
+import pytest
+
+from scheduling import LANES, FairQueue, LaneSchedule, RedisFairQueue, lane_for
+
+SMALL = {"source_a": {"companies": ["Toyota"], "start_date": "2023-01-01", "end_date": "2023-03-31"},
+         "source_b": {"companies": ["Toyota"], "start_date": "2023-01-01", "end_date": "2023-03-31"},
+         "source_c": {"companies": ["Toyota"], "start_date": "2023-01-01", "end_date": "2023-03-31"}}
+FULL = {"source_a": {}, "source_b": {}, "source_c": {}}
+
+def test_lanes_follow_estimated_cost():
+    assert lane_for(SMALL)[0] == "interactive"
+    one_year = {"start_date": "2022-01-01", "end_date": "2022-12-31"}
+    assert lane_for({key: one_year for key in FULL})[0] == "standard"
+    assert lane_for(FULL) == ("bulk", 3.0)
+    assert lane_for(None) == ("standard", None)
+
+def test_schedule_weights_lanes_without_starving_any():
+    schedule = LaneSchedule()
+    preferred = Counter(schedule.next_order()[0] for _ in range(12))
+    assert preferred == {"interactive": 8, "standard": 3, "bulk": 1}
+
+def test_fair_queue_serves_users_in_turn():
+    tasks = FairQueue()
+    for task_id in range(1, 5):
+        tasks.put(task_id, "standard", "bulk-user")
+    tasks.put(10, "standard", "other-user")
+    tasks.put(20, "interactive", "other-user")
+
+    assert tasks.get(timeout=0) == 20
+    assert [tasks.get(timeout=0) for _ in range(3)] == [1, 10, 2]
+    stats = tasks.stats()
+    assert (stats["standard"]["depth"], stats["standard"]["users"]) == (2, 1)
+    assert stats["interactive"]["wait_ms"]["p50"] is not None
+    with pytest.raises(queue.Empty):
+        FairQueue().get(timeout=0.01)
+
+def test_redis_fair_queue_serves_users_in_turn():
+    fakeredis = pytest.importorskip("fakeredis")
+    tasks = RedisFairQueue(fakeredis.FakeRedis())
+    for task_id in range(1, 5):
+        tasks.add(task_id, "standard", "bulk-user")
+    tasks.add(10, "standard", "other-user")
+    tasks.add(20, "interactive", "other-user")
+
+    assert tasks.claim(timeout=1) == (20, "interactive")
+    assert [tasks.claim(timeout=1)[0] for _ in range(3)] == [1, 10, 2]
+    assert tasks.size() == 2
+    stats = tasks.stats()
+    assert [stats[lane]["depth"] for lane in LANES] == [0, 2, 0]
+    assert stats["standard"]["users"] == 1
+    assert stats["interactive"]["wait_ms"]["p99"] >= 0
+    assert tasks.client.hget("task:20", "status") == b"processing"
+
+    tasks.client.rpush("task_queue", 99)  # queued by an earlier version
+    assert [tasks.claim(timeout=1)[0] for _ in range(3)] == [3, 4, 99]
+    assert tasks.claim(timeout=0.1) is None
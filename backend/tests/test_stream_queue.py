@@ -0,0 +1,181 @@
+# backend/tests/test_stream_queue.py
+import time
+import pytest
+
+import queue_manager as queue_manager_module
+from queue_manager import QueueManager
+from models import Task, TaskStatus, SalesData
+from stream_queue import RedisStreamQueue
+from tests.conftest import TestingSessionLocal, add_tasks, use_sources, wait_for_tasks
+
+fakeredis = pytest.importorskip("fakeredis")
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(queue_manager_module.redis, "from_url", lambda url: fakeredis.FakeRedis(server=server))
+    return server
+
+@pytest.fixture
+def stream(redis_server):
+    return RedisStreamQueue(fakeredis.FakeRedis(server=redis_server), claim_idle_ms=100)
+
+def test_entries_stay_pending_until_acked(stream):
+    stream.add(7)
+    entry = stream.read("node-a", block_ms=10)
+    assert (entry.task_id, entry.deliveries, entry.reclaimed) == (7, 1, False)
+    assert stream.read("node-b", block_ms=10) is None
+    assert (stream.stats()["waiting"], stream.stats()["pending"]) == (0, 1)
+
+    stream.ack(entry)
+    assert (stream.stats()["waiting"], stream.stats()["pending"]) == (0, 0)
+
+def test_stalled_entries_are_reclaimed(stream):
+    stream.add(7)
+    stream.read("node-a", block_ms=10)
+    time.sleep(0.15)
+
+    entry = stream.read("node-b", block_ms=10)
+    assert (entry.task_id, entry.deliveries, entry.reclaimed) == (7, 2, True)
+    consumers = {c["name"]: c for c in stream.stats()["consumers"]}
+    assert consumers["node-b"]["pending"] == 1 and consumers["node-b"]["reclaimed"] == 1
+
+def test_held_entries_are_not_reclaimed(stream):
+    stream.add(7)
+    entry = stream.read("node-a", block_ms=10)
+    with stream.hold("node-a", entry):
+        time.sleep(0.3)
+        stream._next_claim.clear()
+        assert stream.read("node-b", block_ms=10) is None
+
+def test_two_managers_share_the_stream(monkeypatch, redis_server, test_db):
+    use_sources(monkeypatch)
+    managers = [QueueManager(TestingSessionLocal, queue_backend="stream", workers=2) for _ in range(2)]
+    task_ids = add_tasks(test_db, 6)
+
+    for manager in managers:
+        manager.start()
+    try:
+        for task_id in task_ids:
+            managers[0].add_task(task_id)
+        assert wait_for_tasks(test_db, task_ids) == [TaskStatus.COMPLETED] * 6
+    finally:
+        for manager in managers:
+            manager.stop()
+
+    # Every task processed exactly once: one row per source
+    for task_id in task_ids:
+        assert test_db.query(SalesData).filter(SalesData.task_id == task_id).count() == 3
+    stats = managers[0].get_queue_stats()
+    assert stats["queue_backend"] == "stream"
+    assert (stats["stream"]["waiting"], stats["stream"]["pending"]) == (0, 0)
+    assert sum(c["processed"] for c in stats["stream"]["consumers"]) == 6
+
+def test_task_of_crashed_consumer_is_redone_once(monkeypatch, redis_server, stream, test_db):
+    use_sources(monkeypatch)
+    [task_id] = add_tasks(test_db, 1)
+    # A worker took the task, saved part of it and died without acknowledging
+    stream.add(task_id)
+    stream.read("crashed-node", block_ms=10)
+    task = test_db.get(Task, task_id)
+    task.status = TaskStatus.IN_PROGRESS
+    test_db.add(SalesData(task_id=task_id, source="test", company="partial", price=1))
+    test_db.commit()
+    time.sleep(0.15)
+
+    manager = QueueManager(TestingSessionLocal, queue_backend="stream", claim_idle_ms=100)
+    manager.start()
+    try:
+        assert wait_for_tasks(test_db, [task_id]) == [TaskStatus.COMPLETED]
+    finally:
+        manager.stop()
+
+    assert sorted(r.company for r in test_db.query(SalesData).filter(SalesData.task_id == task_id)) == ["A", "B", "C"]
+    assert manager.get_queue_stats()["stream"]["pending"] == 0
+
+def test_repeatedly_abandoned_task_is_dead_lettered(redis_server, stream, test_db):
+    [task_id] = add_tasks(test_db, 1)
+    stream.add(task_id)
+    for consumer in ("node-a", "node-b", "node-c"):
+        time.sleep(0.15)
+        stream._next_claim.clear()
+        assert stream.read(consumer, block_ms=10).task_id == task_id
+
+    manager = QueueManager(TestingSessionLocal, queue_backend="stream", claim_idle_ms=100)
+    time.sleep(0.15)
+    manager.start()
+    try:
+        assert wait_for_tasks(test_db, [task_id]) == [TaskStatus.FAILED]
+    finally:
+        manager.stop()
+    assert manager.get_queue_stats()["stream"]["dead_lettered"] == 1
+
+def test_stream_backend_warns_it_skips_lanes(caplog, redis_server):
+    QueueManager(TestingSessionLocal)
+    assert "priority lanes" not in caplog.text
+    QueueManager(TestingSessionLocal, queue_backend="stream")
+    assert "without priority lanes or per-user fairness" in caplog.text
+
+def test_list_transitions_take_one_round_trip_each(monkeypatch, redis_server):
+    manager = QueueManager(TestingSessionLocal)
+    client = manager.redis_client
+    # Load the claim script first: EVALSHA misses once per server
+    manager.fair_queue._claim_once()
+    connection_class = client.connection_pool.connection_class
+    sent = []
+    send = connection_class.send_packed_command
+    monkeypatch.setattr(connection_class, "send_packed_command",
+                        lambda connection, *args, **kwargs: sent.append(1) or send(connection, *args, **kwargs))
+
+    manager._redis_enqueue(7)
+    assert manager._redis_claim(timeout=1) == 7
+    manager._redis_complete(7, 42)
+    assert len(sent) == 3
+
+    task = {k.decode(): v.decode() for k, v in client.hgetall("task:7").items()}
+    assert (task["status"], task["progress"], task["records_processed"]) == ("completed", "100", "42")
+    assert {"queued_at", "started_at", "completed_at"} <= task.keys()
+    assert 0 < client.ttl("task:7") <= manager.task_ttl
+
+def test_stream_transitions_take_one_round_trip_each_plus_processing_mark(monkeypatch, redis_server):
+    manager = QueueManager(TestingSessionLocal, queue_backend="stream")
+    client = manager.redis_client
+    # Register the consumer and check for stalled entries first: not per task
+    assert manager.stream_queue.read("node-a", block_ms=10) is None
+    monkeypatch.setattr(manager, "_run_task", lambda worker_id, task_id: 42)
+    connection_class = client.connection_pool.connection_class
+    sent = []
+    send = connection_class.send_packed_command
+    monkeypatch.setattr(connection_class, "send_packed_command",
+                        lambda connection, *args, **kwargs: sent.append(1) or send(connection, *args, **kwargs))
+
+    manager._redis_enqueue(7)
+    entry = manager.stream_queue.read("node-a", block_ms=10)
+    manager._process_stream_entry("worker-0", "node-a", entry)
+    # enqueue, XREADGROUP, processing HSET, ack + metrics + completion
+    assert len(sent) == 4
+
+    task = {k.decode(): v.decode() for k, v in client.hgetall("task:7").items()}
+    assert (task["status"], task["records_processed"]) == ("completed", "42")
+    assert {"queued_at", "started_at", "completed_at"} <= task.keys()
+
+def test_queue_stats_stay_bounded(monkeypatch, redis_server):
+    monkeypatch.setattr(queue_manager_module, "RECENT_TASKS_LIMIT", 10)
+    manager = QueueManager(TestingSessionLocal)
+    for task_id in range(1, 31):
+        manager._redis_enqueue(task_id)
+    manager._redis_fail(3, "boom")
+
+    stats = manager.get_queue_stats()
+    assert (stats["queue_size"], stats["total_tasks"], stats["failed_tasks"]) == (30, 30, 1)
+    assert [task["id"] for task in stats["recent_tasks"]] == ["26", "27", "28", "29", "30"]
+    assert manager.redis_client.zcard(queue_manager_module.RECENT_TASKS_KEY) == 10
+
+def test_legacy_task_sets_become_counters(redis_server):
+    client = fakeredis.FakeRedis(server=redis_server)
+    client.sadd("all_tasks", 1, 2, 3)
+    client.sadd("failed_tasks", 2)
+
+    stats = QueueManager(TestingSessionLocal).get_queue_stats()
+    assert (stats["total_tasks"], stats["failed_tasks"]) == (3, 1)
+    assert not client.exists("all_tasks", "failed_tasks")
@@ -0,0 +1,102 @@
+# backend/tests/test_task_dedup.py
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import inspect
+
+import app as app_module
+import database
+from database import migrate_schema
+from models import Task, TaskStatus
+from queue_manager import QueueManager
+from data_sources.json_source import JSONDataSource
+from data_sources.snapshot import snapshot_cache
+from task_dedup import find_reusable, parameters_hash, source_version
+from tests.conftest import TestingSessionLocal, use_sources
+
+TASK = {"source_a": {"companies": ["Toyota", "Honda"], "start_date": "2023-01-01"}}
+
+def test_equivalent_parameters_hash_alike():
+    same = {"source_a": {"companies": ["Honda", "Toyota", "Honda"], "start_date": "2023-01-01T00:00:00",
+                         "models": []},
+            "source_b": {}}
+    assert parameters_hash(TASK) == parameters_hash(same)
+    assert parameters_hash(TASK) != parameters_hash({"source_a": {"companies": ["Toyota"]}})
+
+@pytest.fixture
+def queued(monkeypatch):
+    use_sources(monkeypatch)
+    queued = []
+    monkeypatch.setattr(app_module.queue_manager, "add_task", lambda task_id, *args: queued.append(task_id))
+    return queued
+
+def test_identical_tasks_share_one_execution(client, auth_headers, queued, test_db):
+    first = client.post("/api/tasks", json=TASK, headers=auth_headers).json()
+    second = client.post("/api/tasks", json=TASK, headers=auth_headers).json()
+    assert queued == [first["id"]]
+    assert (second["status"], second["result_task_id"]) == ("pending", first["id"])
+
+    QueueManager(TestingSessionLocal, use_redis=False)._process_task(first["id"])
+    test_db.expire_all()
+    assert test_db.get(Task, second["id"]).status == TaskStatus.COMPLETED
+    data = client.get(f"/api/tasks/{second['id']}/data", headers=auth_headers).json()
+    assert sorted(row["company"] for row in data) == ["A", "B", "C"]
+
+    # A later identical task reuses the completed result without queueing
+    third = client.post("/api/tasks", json=TASK, headers=auth_headers).json()
+    assert (third["status"], third["result_task_id"], queued) == ("completed", first["id"], [first["id"]])
+
+def test_stale_results_are_not_reused(test_db):
+    task = Task(parameters=TASK, params_hash=parameters_hash(TASK), status=TaskStatus.COMPLETED,
+                source_version="v1")
+    test_db.add(task)
+    test_db.commit()
+
+    assert find_reusable(test_db, task.params_hash, "v1").id == task.id
+    assert find_reusable(test_db, task.params_hash, "v2") is None
+    assert find_reusable(test_db, task.params_hash, "v1", now=datetime.utcnow() + timedelta(days=1)) is None
+
+def test_stale_in_flight_tasks_are_failed_not_reused(client, auth_headers, queued, test_db):
+    first = client.post("/api/tasks", json=TASK, headers=auth_headers).json()
+    second = client.post("/api/tasks", json=TASK, headers=auth_headers).json()
+    assert second["result_task_id"] == first["id"]
+
+    # The first task lost its queue entry and never ran
+    test_db.query(Task).update({Task.updated_at: datetime.utcnow() - timedelta(hours=1)})
+    test_db.commit()
+    third = client.post("/api/tasks", json=TASK, headers=auth_headers).json()
+    assert (third["status"], third["result_task_id"], queued) == ("pending", None, [first["id"], third["id"]])
+    test_db.expire_all()
+    assert [test_db.get(Task, task["id"]).status for task in (first, second)] == [TaskStatus.FAILED] * 2
+
+    # The failed owner can be resumed, and the next task attaches to the live one
+    assert client.post(f"/api/tasks/{first['id']}/resume", headers=auth_headers).status_code == 200
+    fourth = client.post("/api/tasks", json=TASK, headers=auth_headers).json()
+    assert fourth["result_task_id"] == first["id"]
+
+def test_source_version_covers_row_order(monkeypatch):
+    # Engines and streamed files yield rows in different orders, and resume
+    # skips rows by count, so each needs its own version
+    python = source_version({"source_a": JSONDataSource(engine="python")})
+    assert python == source_version({"source_a": JSONDataSource(engine="python")})
+    assert python != source_version({"source_a": JSONDataSource(engine="numpy")})
+    assert python != source_version({"source_a": JSONDataSource(use_cache=False)})
+
+    monkeypatch.setattr(snapshot_cache, "max_bytes", 0)
+    assert python != source_version({"source_a": JSONDataSource(engine="python")})
+
+def test_migrate_schema_adds_new_columns(legacy_engine):
+    assert "tasks.params_hash" in migrate_schema(legacy_engine)
+    columns = {column["name"] for column in inspect(legacy_engine).get_columns("tasks")}
+    assert {"params_hash", "result_task_id", "source_version"} <= columns
+    assert migrate_schema(legacy_engine) == []
+
+def test_concurrent_migrations_do_not_fail(monkeypatch, legacy_engine):
+    # A second process inspected the schema before the first one migrated it
+    stale = inspect(legacy_engine)
+    for table in ("tasks", "sales_data"):
+        stale.get_columns(table), stale.get_indexes(table)
+    assert "tasks.params_hash" in migrate_schema(legacy_engine)
+    inspectors = iter([stale])
+    monkeypatch.setattr(database, "inspect", lambda bind: next(inspectors, None) or inspect(bind))
+    assert "tasks.params_hash" not in migrate_schema(legacy_engine)
+    assert database.init_db(legacy_engine) == []
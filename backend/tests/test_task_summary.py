@@ -0,0 +1,59 @@
+# backend/tests/test_task_summary.py
+from models import SalesData, Task, TaskStatus, TaskSummary
+from queue_manager import QueueManager
+from sqlalchemy.dialects import postgresql
+from task_summary import backfill, compute_summary, grouping_sets_query
+from tests.conftest import TestingSessionLocal, use_sources
+
+def test_summary_is_stored_at_completion(monkeypatch, client, auth_headers, task_id, test_db):
+    use_sources(monkeypatch)
+    QueueManager(TestingSessionLocal, use_redis=False)._process_task(task_id)
+
+    stored = test_db.get(TaskSummary, task_id).summary
+    assert stored == compute_summary(test_db, task_id)
+    assert sorted(group["company"] for group in stored["sales_by_company"]) == ["A", "B", "C"]
+
+    # Served from the stored row, not from sales_data
+    test_db.query(SalesData).delete()
+    test_db.commit()
+    response = client.get(f"/api/tasks/{task_id}/summary", headers=auth_headers)
+    assert response.json() == stored
+
+def test_backfill_stores_missing_summaries(test_db):
+    task = Task(parameters={}, status=TaskStatus.COMPLETED)
+    test_db.add(task)
+    test_db.commit()
+    test_db.add_all([SalesData(task_id=task.id, source="source_a", company="Kia", car_model="Rio",
+                               year=2023, month=m, price=10.0) for m in (1, 1, 2)])
+    test_db.commit()
+
+    assert backfill(test_db) == 1
+    assert backfill(test_db) == 0
+    summary = test_db.get(TaskSummary, task.id).summary
+    assert summary["sales_by_time"] == [{"year": 2023, "month": 1, "count": 2, "total_sales": 20.0},
+                                        {"year": 2023, "month": 2, "count": 1, "total_sales": 10.0}]
+    assert backfill(test_db, force=True) == 1
+
+def test_compute_summary_rolls_up_every_section(test_db):
+    rows = [("source_a", "Kia", "Rio", 2023, 1, 10.0), ("source_b", "Kia", "Rio", 2023, 2, 5.0),
+            ("source_a", "Kia", "Soul", 2023, 1, None), ("source_a", "BMW", "X3", 2022, 12, 40.0)]
+    test_db.add_all([SalesData(task_id=7, source=source, company=company, car_model=model, year=year,
+                               month=month, price=price) for source, company, model, year, month, price in rows])
+    test_db.add(SalesData(task_id=8, source="source_a", company="Kia", car_model="Rio", year=2023, month=1, price=1.0))
+    test_db.commit()
+
+    summary = compute_summary(test_db, 7)
+    assert summary["sales_by_company"] == [{"company": "BMW", "count": 1, "total_sales": 40.0},
+                                           {"company": "Kia", "count": 3, "total_sales": 15.0}]
+    assert summary["sales_by_time"] == [{"year": 2022, "month": 12, "count": 1, "total_sales": 40.0},
+                                        {"year": 2023, "month": 1, "count": 2, "total_sales": 10.0},
+                                        {"year": 2023, "month": 2, "count": 1, "total_sales": 5.0}]
+    assert summary["sales_by_source"] == [{"source": "source_a", "count": 3, "total_sales": 50.0},
+                                          {"source": "source_b", "count": 1, "total_sales": 5.0}]
+    assert [group["model"] for group in summary["sales_by_model"]] == ["Rio", "Soul", "X3"]
+    assert summary["sales_by_model"][1] == {"model": "Soul", "count": 1, "total_sales": 0.0}
+
+def test_grouping_sets_query_for_capable_dialects(test_db):
+    sql = str(grouping_sets_query(test_db, 7).statement.compile(dialect=postgresql.dialect()))
+    assert "GROUP BY GROUPING SETS((sales_data.company), (sales_data.year, sales_data.month), " \
+           "(sales_data.source), (sales_data.car_model))" in sql
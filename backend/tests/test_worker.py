@@ -0,0 +1,47 @@
+# backend/tests/test_worker.py
+import threading
+
+import worker
+from fastapi.testclient import TestClient
+import app as app_module
+from queue_manager import create_queue_manager
+from models import TaskStatus
+from tests.conftest import TestingSessionLocal, add_tasks, use_sources, wait_for_tasks
+
+def test_create_queue_manager_reads_environment(monkeypatch):
+    monkeypatch.setenv("REDIS_ENABLED", "false")
+    monkeypatch.setenv("QUEUE_WORKERS", "3")
+    monkeypatch.setenv("QUEUE_WORKER_MODE", "process")
+    monkeypatch.setenv("INGEST_BATCH_SIZE", "250")
+
+    manager = create_queue_manager(TestingSessionLocal, workers=5)
+
+    assert (manager.use_redis, manager.workers, manager.worker_mode, manager.batch_size) == (False, 5, "process", 250)
+
+def test_worker_runs_until_stopped(monkeypatch, test_db):
+    use_sources(monkeypatch)
+    manager = create_queue_manager(TestingSessionLocal, use_redis=False, workers=2)
+    stop = threading.Event()
+    runner = threading.Thread(target=worker.run, args=(manager, stop, 0.05))
+    runner.start()
+    try:
+        task_ids = add_tasks(test_db, 2)
+        for task_id in task_ids:
+            manager.add_task(task_id)
+        assert wait_for_tasks(test_db, task_ids) == [TaskStatus.COMPLETED] * 2
+    finally:
+        stop.set()
+        runner.join(timeout=10)
+
+    assert not runner.is_alive() and not manager.running
+
+def test_worker_requires_redis(monkeypatch):
+    monkeypatch.setenv("REDIS_ENABLED", "false")
+    monkeypatch.setattr(worker, "MIGRATE_ON_STARTUP", False)
+    assert worker.main([]) == 1
+
+def test_api_only_mode_does_not_consume(monkeypatch):
+    monkeypatch.setattr(app_module, "RUN_QUEUE_WORKERS", False)
+    monkeypatch.setattr(app_module, "MIGRATE_ON_STARTUP", False)
+    with TestClient(app_module.app):
+        assert not app_module.queue_manager.running
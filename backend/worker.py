@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Standalone queue worker
+
+Consumes the Redis task queue without serving any HTTP, so ingestion can be
+scaled across nodes independently of the API. Run the API with
+RUN_QUEUE_WORKERS=false to have it only enqueue tasks.
+
+Run from the backend directory:
+    python -m worker
+    python -m worker --workers 4 --mode process
+
+Queue settings come from the same environment variables as the API
+(REDIS_URL, QUEUE_BACKEND, QUEUE_WORKERS, QUEUE_WORKER_MODE, BULK_INSERT,
+...). QUEUE_BACKEND=stream reclaims the tasks of a worker node that dies,
+which helps when several nodes share the queue, but it is a single FIFO:
+tasks are not split into priority lanes and users do not take turns.
+"""
+
+import sys
+import signal
+import logging
+import argparse
+import threading
+from database import DATABASE_URL, MIGRATE_ON_STARTUP, SessionLocal, engine, init_db
+from queue_manager import WORKER_MODES, create_queue_manager
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seconds between worker stats log lines
+STATS_INTERVAL = 60
+
+
+def run(manager, stop_event, stats_interval=STATS_INTERVAL):
+    """
+    Process queued tasks until stop_event is set
+
+    Args:
+        manager (QueueManager): Manager to start and stop
+        stop_event (threading.Event): Set to shut down
+        stats_interval (float): Seconds between stats log lines
+    """
+    manager.start()
+    try:
+        while not stop_event.wait(stats_interval):
+            stats = manager.get_queue_stats()
+            busy = sum(1 for worker in stats.get("workers", []) if worker["state"] == "busy")
+            logger.info(f"Queue size {stats.get('queue_size')}, {busy}/{manager.workers} workers busy")
+    finally:
+        manager.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, help="Tasks processed at the same time (default: QUEUE_WORKERS)")
+    parser.add_argument("--mode", choices=WORKER_MODES, help="Run tasks on threads or processes (default: QUEUE_WORKER_MODE)")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.workers is not None:
+        overrides["workers"] = args.workers
+    if args.mode is not None:
+        overrides["worker_mode"] = args.mode
+    if MIGRATE_ON_STARTUP:
+        init_db(engine)
+    manager = create_queue_manager(SessionLocal, DATABASE_URL, **overrides)
+    if not manager.use_redis:
+        # The in-memory fallback queue only exists inside the API process
+        logger.error("Redis is not available; a standalone worker has no queue to consume")
+        return 1
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    logger.info(f"Worker consuming {manager.redis_url} with {manager.workers} {manager.worker_mode} worker(s)")
+    run(manager, stop_event)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
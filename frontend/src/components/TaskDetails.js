@@ -5,6 +5,20 @@ import Visualizations from './Visualizations';
 import '../styles/TaskDetails.css';
 
 const API_BASE_URL = 'http://localhost:8000/api';
+const DATA_PAGE_SIZE = 5000;
+
+// Task data comes in pages; follow the X-Next-Cursor header to the end
+const fetchAllData = async (taskId) => {
+  const rows = [];
+  let cursor = null;
+  do {
+    const params = cursor === null ? { limit: DATA_PAGE_SIZE } : { limit: DATA_PAGE_SIZE, cursor };
+    const response = await axios.get(`${API_BASE_URL}/tasks/${taskId}/data`, { params });
+    rows.push(...response.data);
+    cursor = response.headers['x-next-cursor'] ?? null;
+  } while (cursor !== null);
+  return rows;
+};
 
 const TaskDetails = () => {
   const { taskId } = useParams();
@@ -40,19 +54,19 @@ const TaskDetails = () => {
         // Check if task is completed
         if (taskResponse.data.status === 'completed') {
           // Fetch task data and summary
-          const [dataResponse, summaryResponse] = await Promise.all([
-            axios.get(`${API_BASE_URL}/tasks/${taskId}/data`),
+          const [taskData, summaryResponse] = await Promise.all([
+            fetchAllData(taskId),
             axios.get(`${API_BASE_URL}/tasks/${taskId}/summary`)
           ]);
           
-          setData(dataResponse.data);
+          setData(taskData);
           setSummary(summaryResponse.data);
           
           // Extract filter options from data
-          const years = [...new Set(dataResponse.data.map(item => item.year).filter(Boolean))];
-          const months = [...new Set(dataResponse.data.map(item => item.month).filter(Boolean))];
-          const companies = [...new Set(dataResponse.data.map(item => item.company).filter(Boolean))];
-          const models = [...new Set(dataResponse.data.map(item => item.car_model).filter(Boolean))];
+          const years = [...new Set(taskData.map(item => item.year).filter(Boolean))];
+          const months = [...new Set(taskData.map(item => item.month).filter(Boolean))];
+          const companies = [...new Set(taskData.map(item => item.company).filter(Boolean))];
+          const models = [...new Set(taskData.map(item => item.car_model).filter(Boolean))];
           
           setFilterOptions({
             years: years.sort((a, b) => a - b),